@@ -1,14 +1,15 @@
 import streamlit as st
 
-import pandas as pd
-import plotly.express as px
-from utils.api_client import OpenF1Client
-from utils.styling import apply_dark_theme, apply_team_dark_style, get_team_style, get_plotly_theme
-import os
+from utils.api_client import get_api_client, uncached
+from utils.gpt_helper import GPTHelper, get_openai
+from utils.scheduler import Priority, request_priority
+from utils.session_store import get_session_store
+from utils.summary_backends import LocalBackend
+from utils.styling import apply_team_dark_style, get_team_style
 from dotenv import load_dotenv
-import requests
-from io import BytesIO
-import openai
+
+# pandas, plotly, openai and the audio download stack are imported inside the
+# sections that need them so the sidebar paints before they load
 
 st.set_page_config(
     page_title="F1 Stats",  # Change this to your desired title
@@ -18,9 +19,8 @@ st.set_page_config(
 # Load environment variables
 load_dotenv()
 
-# Initialize client
-api_client = OpenF1Client()
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# One client per process, shared with the other pages and their response caches
+api_client = get_api_client()
 
 def get_compound_color(compound):
     """Return color for each tire compound"""
@@ -38,26 +38,17 @@ def color_compound(val):
     text_color = 'black' if val == 'HARD' else 'white'
     return f'background-color: {color}; color: {text_color}'
 
-def calculate_position_changes(positions: list) -> int:
-    """Calculate total number of position changes"""
-    if not positions:
-        return 0
-    changes = 0
-    prev_pos = positions[0]['position']
-    for pos in positions[1:]:
-        if pos['position'] != prev_pos:
-            changes += abs(pos['position'] - prev_pos)
-            prev_pos = pos['position']
-    return changes
-
 def transcribe_audio(audio_url):
     """Transcribe audio using OpenAI Whisper API"""
+    from io import BytesIO
+
     try:
-        response = requests.get(audio_url)
-        audio_file = BytesIO(response.content)
+        # Recording downloads are bulk traffic: they must not delay sidebar/submit fetches
+        with request_priority(Priority.BULK):
+            audio_file = BytesIO(api_client.download(audio_url))
         audio_file.name = "radio_message.mp3"
-        
-        transcript = openai.Audio.transcribe(
+
+        transcript = get_openai().Audio.transcribe(
             model="whisper-1",
             file=audio_file,
             response_format="text"
@@ -67,174 +58,419 @@ def transcribe_audio(audio_url):
         st.error(f"Transcription failed: {str(e)}")
         return None
 
-def parse_f1_datetime(dt_str):
-    """Robust F1 datetime parser"""
-    try:
-        return pd.to_datetime(dt_str, format='ISO8601')
-    except:
-        try:
-            return pd.to_datetime(dt_str, format='mixed')
-        except:
-            return pd.to_datetime(dt_str, errors='coerce')
-        
-def display_radio_messages(selected_session, selected_driver, radio_messages):
+def load_session_data(session, driver_number):
+    """Fetch everything the dashboard shows for one session and driver"""
+    from utils.sections import weather_window
+
+    session_key = session['session_key']
+    drivers = api_client.get_drivers(session_key)
+    # The session store owns these: kept out of the client's caches, they are
+    # freed when the store evicts the entry
+    with uncached():
+        return {
+            'positions': api_client.get_position_data(session_key, driver_number),
+            # Only the selected session's weather, not the whole meeting's
+            'weather': api_client.get_session_weather(session_key, *weather_window(session)),
+            'laps': api_client.get_laps(session_key, driver_number),
+            'radio_messages': api_client.get_team_radio(session_key, driver_number),
+            'pit_data': api_client.get_pit_data(session_key, driver_number),
+            'stints': api_client.get_stints(session_key, driver_number),
+            'race_control': api_client.get_race_control(session_key),
+            'driver_details': next((d for d in drivers if d['driver_number'] == driver_number), {}),
+        }
+
+def get_session_entry():
+    """Lease this viewer's entry in the shared session store, reloading it if it was evicted"""
+    ref = st.session_state.session_ref
+    return get_session_store().acquire(
+        (ref['session_key'], ref['driver_number']), st.session_state.viewer_id,
+        lambda: load_session_data(ref['session'], ref['driver_number'])
+    )
+
+def release_session_entry():
+    ref = st.session_state.get('session_ref')
+    if ref:
+        get_session_store().release((ref['session_key'], ref['driver_number']), st.session_state.viewer_id)
+    st.session_state.session_ref = None
+
+def get_section(section, builder, *args, version=None):
+    """Compute a section once per (session_key, driver_number, section), shared by every viewer"""
+    return get_session_store().section(get_session_entry(), section, builder, *args, version=version)
+
+@st.fragment
+def render_race_summary(selected_driver_details, selected_team, selected_session,
+                        positions, laps, stints, weather, radio_messages, pit_data, track_status=None):
+    from utils.analysis import RaceAnalyzer
+
+    selected_session_name = selected_session['session_name']
+    st.subheader("🏁 Race Summary")
+
+    # Statistical summary from the offline backend renders immediately; the
+    # remote model is only called for the on-demand narrative below
+    race_metrics = get_section(
+        'race_metrics', RaceAnalyzer().compute_race_metrics,
+        selected_driver_details, radio_messages, laps, positions, stints, pit_data, track_status
+    )
+    st.markdown(get_section('statistical_summary', LocalBackend().race_summary, "", race_metrics))
+
+    if st.button("Generate Comprehensive Race Analysis"):
+        from utils.sections import build_summary_data
+
+        with st.spinner("Analyzing race data..."):
+            summary_data = get_section(
+                'summary_data', build_summary_data, selected_driver_details, selected_team,
+                selected_session_name, positions, laps, stints, weather, radio_messages
+            )
+
+            prompt = f"""
+            Generate a concise 3-paragraph statistical race summary for {summary_data['driver_name']} ({summary_data['team']})
+            during the {summary_data['session']} session.
+
+            Key data:
+            - Total laps: {summary_data['total_laps']}
+            - Final position: {summary_data['final_position']}
+            - Position changes: {summary_data['position_changes']}
+            - Fastest lap: {summary_data['fastest_lap']:.3f}s
+            - Tire strategy: {summary_data['tire_strategy']}
+            - Weather changes: {summary_data['weather_changes']}
+            - Radio messages: {summary_data['radio_messages_count']}
+
+            Provide a detailed analysis covering:
+            1. Overall performance assessment
+            2. Tire strategy effectiveness
+            3. Position change patterns
+            4. Key moments from radio communications
+            5. Weather impact (if relevant)
+
+            Include only verifiable data from the API. No subjective assessments. Dont calculate starting position or talk about it
+            """
+
+        # Stream the analysis so text appears as soon as the first tokens arrive
+        st.markdown("### Full Race Analysis")
+        gpt = GPTHelper()
+        st.write_stream(gpt.stream_race_summary(
+            prompt,
+            race_metrics,
+            max_tokens=500,
+            system_prompt="You are an expert F1 analyst. Provide detailed race summaries."
+        ))
+        if gpt.last_timing:
+            st.caption(f"First token after {gpt.last_timing['ttft_ms']:.0f} ms, "
+                       f"complete after {gpt.last_timing['total_ms']:.0f} ms")
+
+@st.fragment
+def render_position_chart(positions, laps, track_status=None):
+    from utils.sections import build_position_section
+
+    st.subheader("📈 Position Changes")
+    result = get_section('positions', build_position_section, positions, laps, track_status)
+    if result.warning:
+        st.warning(result.warning)
+    else:
+        st.plotly_chart(result.figure, use_container_width=True)
+
+@st.fragment
+def render_weather(weather):
+    from utils.sections import build_weather_section
+
+    st.subheader("🌤️ Weather Conditions")
+    result = get_section('weather', build_weather_section, weather)
+    if result.warning:
+        st.warning(result.warning)
+    else:
+        st.plotly_chart(result.figure, use_container_width=True)
+
+def render_degradation(session, driver_number, stints, laps_df):
+    """Expected lap-time curves per stint from the (season, circuit, compound) models"""
+    from utils.tire_model import build_degradation_section, get_tire_store
+
+    store = get_tire_store()
+    # A finished race is folded into the models the first time anyone views it,
+    # in the background so the page never waits on the download
+    ingested = store.ingest_in_background(api_client, session)
+    # Versioned by the model generation, so the section is rebuilt once the models change
+    result = get_section('degradation', build_degradation_section, store, session, driver_number, stints, laps_df,
+                         version=store.generation)
+    if result.warning:
+        st.info(result.warning)
+        return
+    if result.figure is not None:
+        st.plotly_chart(result.figure, use_container_width=True)
+    else:
+        st.caption("No tire degradation model for this circuit and season yet")
+    if not ingested and store.is_ingesting(session['session_key']):
+        st.caption("This race is being added to the tire models; rerun to see the updated curves")
+    st.dataframe(
+        result.frame.style.map(color_compound, subset=['Compound']).format(
+            {"Model Deg (s/lap)": "{:+.3f}", "Expected Avg": "{:.3f}", "Actual Avg": "{:.3f}",
+             "Vs Model": "{:+.3f}", "Driver Offset": "{:+.3f}"}, na_rep="N/A"
+        ),
+        hide_index=True
+    )
+
+@st.fragment
+def render_lap_performance(laps, pit_data, stints, track_status=None, lap_weather=None,
+                           session=None, driver_number=None):
+    from utils.sections import build_lap_metrics, build_lap_section, build_stint_table
+
+    st.subheader("⏱️ Lap Time Performance")
+    result = get_section('laps', build_lap_section, laps, pit_data, track_status, lap_weather)
+    if result.warning:
+        st.warning(result.warning)
+        return
+    st.plotly_chart(result.figure, use_container_width=True)
+
+    # Show tire strategy table separately if stints exist
+    if stints:
+        st.subheader("🔄 Tire Strategy")
+        strategy_table = get_section('stints', build_stint_table, stints, result.frame)
+        st.dataframe(
+            strategy_table.style.map(
+                color_compound,
+                subset=['Compound']
+            )
+        )
+        if session is not None:
+            render_degradation(session, driver_number, stints, result.frame)
+
+    # Show performance metrics (excluding pit and safety car/VSC/red flag laps)
+    metrics = get_section('lap_metrics', build_lap_metrics, result.frame)
+    excluded = [label for label, flag in (("pits", metrics['excludes_pits']),
+                                          ("SC/VSC", metrics['excludes_neutralized'])) if flag]
+    suffix = f" (excl. {', '.join(excluded)})" if excluded else ""
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Fastest Lap", f"{metrics['fastest_lap']:.3f}s" + suffix)
+    with col2:
+        st.metric("Average Lap", f"{metrics['avg_lap']:.3f}s" + suffix)
+
+@st.cache_resource
+def get_location_store():
+    """Process-wide memory-mapped location store shared by every browser session"""
+    from utils.track_map import LocationStore
+    return LocationStore()
+
+@st.fragment
+def render_track_map(session, driver_number, laps, team_color):
+    """Track map with a replay slider; scrubbing only slices the local memory map"""
+    import numpy as np
+    from utils.track_map import ZOOM_LEVELS, build_track_map_figure, lap_start_offsets
+
+    st.subheader("🗺️ Track Map")
+    session_key = session['session_key']
+    store = get_location_store()
+    with st.spinner("Loading car locations..."):
+        store.ensure(api_client, session, driver_number)
+    samples = store.samples(session_key, driver_number)
+    if not len(samples):
+        st.warning("No location data available for this session")
+        return
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        zoom = st.selectbox("Path shown", list(ZOOM_LEVELS.keys()), key="track_map_zoom")
+    with col2:
+        t_first, t_last = float(samples[0, 0]), float(samples[-1, 0])
+        t = st.slider("Replay (seconds into session)", t_first, t_last, t_first, step=1.0, key="track_map_t")
+
+    window = ZOOM_LEVELS[zoom]
+    outline = store.window(session_key, driver_number)
+    trail = store.window(session_key, driver_number, None if window is None else t - window, t)
+    car = store.position_at(session_key, driver_number, t)
+    st.plotly_chart(build_track_map_figure(outline, trail, car, team_color), use_container_width=True)
+
+    # Current lap from lap start times, parsed once per session and driver
+    lap_starts, lap_numbers = get_section('lap_offsets', lap_start_offsets, laps, store.start_time(session_key))
+    i = int(np.searchsorted(lap_starts, t, side='right')) - 1
+    if i >= 0:
+        st.caption(f"Lap {lap_numbers[i]}")
+
+@st.cache_resource
+def get_radio_index():
+    """Process-wide transcript index shared by every browser session"""
+    from utils.radio_index import RadioTranscriptIndex
+    return RadioTranscriptIndex()
+
+@st.fragment
+def render_radio_message(idx, row, radio_context):
+    """Render one radio message; its Transcribe button only reruns this message"""
+    recording_url = row['recording_url']
+    radio_index = get_radio_index()
+
+    # Reuse a transcript anyone has already indexed before offering to transcribe
+    if recording_url not in st.session_state.transcriptions:
+        indexed = radio_index.get(recording_url)
+        if indexed:
+            st.session_state.transcriptions[recording_url] = indexed
+
+    with st.expander(f"📻 Lap {row['lap_number']} - {row['date'].strftime('%H:%M:%S')}", expanded=False):
+        col1, col2 = st.columns([1, 3])
+
+        with col1:
+            st.audio(recording_url)
+
+        with col2:
+            if recording_url not in st.session_state.transcriptions:
+                if st.button("Transcribe", key=f"transcribe_{idx}"):
+                    with st.spinner("Transcribing..."):
+                        transcription = transcribe_audio(recording_url)
+                        if transcription:
+                            st.session_state.transcriptions[recording_url] = transcription
+                            radio_index.add(recording_url, transcription, {
+                                **radio_context,
+                                'lap_number': row['lap_number'],
+                                'date': row['date'].isoformat(),
+                            })
+                            ai_summary = GPTHelper().summarize_text(
+                                transcription,
+                                max_tokens=100,
+                                system_prompt="You are an F1 analyst summarizing team radio communications in 1-2 sentences."
+                            )
+                            st.session_state.ai_summaries[recording_url] = ai_summary
+
+            # Feed the text through session state so a transcript added in this
+            # fragment rerun replaces the widget's earlier empty value
+            transcription = st.session_state.transcriptions.get(recording_url, "")
+            st.session_state[f"msg_{idx}"] = transcription
+            st.text_area("Message", height=100, key=f"msg_{idx}",disabled=True)
+            if transcription:
+                st.caption(f"Sentiment: {LocalBackend().analyze_sentiment(transcription)}")
+
+            if recording_url in st.session_state.ai_summaries:
+                st.text_area("AI Summary",
+                           st.session_state.ai_summaries[recording_url],
+                           height=68,
+                           key=f"sum_{idx}",disabled=True)
+
+def display_radio_messages(radio_messages):
+    from utils.sections import build_radio_frame
+
     if not radio_messages:
         st.warning("No radio messages available for this session")
         return
-    
-    # Create DataFrame and process timestamps
-    radio_df = pd.DataFrame(radio_messages)
-    radio_df['date'] = radio_df['date'].apply(parse_f1_datetime)
-    radio_df = radio_df.sort_values('date')
-    radio_df['lap_number'] = "?"  # Initialize with default value
-    
-    # Get lap data for this driver
-    laps = api_client.get_laps(selected_session['session_key'], selected_driver)
-    if laps:
-        laps_df = pd.DataFrame(laps)
-        
-        # Convert and clean lap data
-        laps_df['date_start'] = laps_df['date_start'].apply(parse_f1_datetime)
-        laps_df = laps_df.dropna(subset=['date_start', 'lap_duration'])
-        laps_df = laps_df.sort_values('lap_number')
-        
-        # Match radio messages to laps
-        for idx, radio_row in radio_df.iterrows():
-            radio_time = radio_row['date']
-            
-            for _, lap_row in laps_df.iterrows():
-                try:
-                    lap_start = lap_row['date_start']
-                    lap_duration = lap_row['lap_duration']
-                    
-                    # Skip if we have invalid lap data
-                    if pd.isna(lap_duration):
-                        continue
-                        
-                    lap_end = lap_start + pd.Timedelta(seconds=float(lap_duration))
-                    
-                    if lap_start <= radio_time <= lap_end:
-                        radio_df.at[idx, 'lap_number'] = int(lap_row['lap_number'])
-                        break
-                        
-                except (TypeError, ValueError):
-                    continue
-    
+
+    if 'transcriptions' not in st.session_state:
+        st.session_state.transcriptions = {}
+    if 'ai_summaries' not in st.session_state:
+        st.session_state.ai_summaries = {}
+
+    session_data = get_session_entry().data
+    laps = session_data['laps']
+    radio_df = get_section('radio', build_radio_frame, radio_messages, laps)
+
+    # Metadata stored with every transcript in the search index, all from the
+    # submitted selection: the sidebar may already show another one
+    ref = st.session_state.session_ref
+    session = ref['session']
+    driver_details = session_data['driver_details']
+    radio_context = {
+        'session_key': session['session_key'],
+        'meeting_key': session.get('meeting_key'),
+        'year': session.get('year'),
+        'meeting_name': ref['meeting_name'],
+        'session_name': session.get('session_name'),
+        'team_name': driver_details.get('team_name'),
+        'driver_number': ref['driver_number'],
+        'driver_name': driver_details.get('full_name'),
+    }
+
     # Display each radio message
     for idx, row in radio_df.iterrows():
-        if 'transcriptions' not in st.session_state:
-            st.session_state.transcriptions = {}
-        if 'ai_summaries' not in st.session_state:
-            st.session_state.ai_summaries = {}
-        
-        with st.expander(f"📻 Lap {row['lap_number']} - {row['date'].strftime('%H:%M:%S')}", expanded=False):
-            col1, col2 = st.columns([1, 3])
-            
-            with col1:
-                st.audio(row['recording_url'])
-            
-            with col2:
-                if idx not in st.session_state.transcriptions:
-                    if st.button("Transcribe", key=f"transcribe_{idx}"):
-                        with st.spinner("Transcribing..."):
-                            transcription = transcribe_audio(row['recording_url'])
-                            if transcription:
-                                st.session_state.transcriptions[idx] = transcription
-                                summary_prompt = f"Summarize this F1 team radio message in 1-2 sentences: {transcription}"
-                                ai_summary = openai.ChatCompletion.create(
-                                    model="gpt-3.5-turbo",
-                                    messages=[
-                                        {"role": "system", "content": "You are an F1 analyst summarizing team radio communications."},
-                                        {"role": "user", "content": summary_prompt}
-                                    ],
-                                    max_tokens=100
-                                ).choices[0].message.content
-                                st.session_state.ai_summaries[idx] = ai_summary
-                
-                transcription = st.session_state.transcriptions.get(idx, "")
-                st.text_area("Message", transcription, height=100, key=f"msg_{idx}",disabled=True)
-                
-                if idx in st.session_state.ai_summaries:
-                    st.text_area("AI Summary", 
-                               st.session_state.ai_summaries[idx], 
-                               height=68, 
-                               key=f"sum_{idx}",disabled=True)
+        render_radio_message(idx, row, radio_context)
 
 def main():
     st.title("🏎️ Formula 1 Team Strategy Analyzer")
-    
+
     # Initialize session state
     if 'submitted' not in st.session_state:
         st.session_state.submitted = False
-    if 'fetched_data' not in st.session_state:
-        st.session_state.fetched_data = {}
-    
+    # Only keys into the process-wide session store live in session state
+    if 'session_ref' not in st.session_state:
+        st.session_state.session_ref = None
+    if 'viewer_id' not in st.session_state:
+        from uuid import uuid4
+        st.session_state.viewer_id = uuid4().hex
+
     # Sidebar filters
     with st.sidebar:
         st.header("Session Selection")
         selected_year = st.selectbox("Season", [2023, 2024], index=0)
-        
+
         meetings = api_client.get_meetings(selected_year)
         meeting_names = [m['meeting_name'] for m in meetings]
         selected_meeting_name = st.selectbox("Grand Prix", meeting_names)
         selected_meeting = next(m for m in meetings if m['meeting_name'] == selected_meeting_name)
-        
+
         sessions = api_client.get_sessions(selected_meeting['meeting_key'])
         session_names = [s['session_name'] for s in sessions]
         selected_session_name = st.selectbox("Session", session_names)
         selected_session = next(s for s in sessions if s['session_name'] == selected_session_name)
-        
+
         drivers = api_client.get_drivers(selected_session['session_key'])
         teams = sorted(list(set([d['team_name'] for d in drivers])))
         selected_team = st.selectbox("Team", teams)
-        
+
         team_drivers = [d for d in drivers if d['team_name'] == selected_team]
         driver_options = {f"{d['driver_number']} - {d['full_name']}": d['driver_number'] for d in team_drivers}
         selected_driver_label = st.selectbox("Driver", list(driver_options.keys()))
         selected_driver = driver_options[selected_driver_label]
-        
+
         selected_driver_details = next(d for d in team_drivers if d['driver_number'] == selected_driver)
         st.image(selected_driver_details['headshot_url'], width=100)
-        
+
         # Submit button that updates session state
         if st.button("Submit Analysis Request"):
             st.session_state.submitted = True
-            # Clear previous data when new submission is made
-            st.session_state.fetched_data = {}
-            
-            # Get all relevant data only when submitted
+            # Drop the previous selection's lease when a new submission is made
+            release_session_entry()
+            st.session_state.session_ref = {
+                'session_key': selected_session['session_key'],
+                'driver_number': selected_driver,
+                'session': selected_session,
+                'meeting_name': selected_meeting_name,
+            }
+
+            # Get all relevant data only when submitted (once per process for each selection)
             with st.spinner("Loading session data..."):
-                st.session_state.fetched_data['positions'] = api_client.get_position_data(selected_session['session_key'], selected_driver)
-                st.session_state.fetched_data['weather'] = api_client.get_weather(selected_meeting['meeting_key'])
-                st.session_state.fetched_data['laps'] = api_client.get_laps(selected_session['session_key'], selected_driver)
-                st.session_state.fetched_data['radio_messages'] = api_client.get_team_radio(selected_session['session_key'], selected_driver)
-                st.session_state.fetched_data['pit_data'] = api_client.get_pit_data(selected_session['session_key'], selected_driver)
-                st.session_state.fetched_data['stints'] = api_client.get_stints(selected_session['session_key'], selected_driver)
-                st.session_state.fetched_data['driver_details'] = selected_driver_details
-        
+                get_session_entry()
+
         # Reset button
         if st.button("Reset All"):
             st.session_state.submitted = False
-            st.session_state.fetched_data = {}
-            st.experimental_rerun()
-    
+            release_session_entry()
+            st.rerun()
+
+        cache = get_session_store().stats()
+        st.caption(f"Shared session cache: {cache['entries']} sessions, "
+                   f"{cache['resident_bytes'] / 2 ** 20:.1f} of {cache['max_bytes'] / 2 ** 20:.0f} MiB")
+        scheduler = api_client.scheduler_metrics()
+        backoff = f", backing off {scheduler['backoff_remaining_s']:.0f} s" if scheduler['backoff_remaining_s'] else ""
+        st.caption(f"OpenF1 requests: {sum(scheduler['queue_depth'].values())} queued, "
+                   f"{scheduler['throttled']} throttled{backoff}")
+
     # Check submission state
     if not st.session_state.submitted:
         st.info("Please select your analysis parameters and click 'Submit Analysis Request'")
         return
-    
-    # Access data from session state
-    positions = st.session_state.fetched_data.get('positions', [])
-    weather = st.session_state.fetched_data.get('weather', [])
-    laps = st.session_state.fetched_data.get('laps', [])
-    radio_messages = st.session_state.fetched_data.get('radio_messages', [])
-    pit_data = st.session_state.fetched_data.get('pit_data', [])
-    stints = st.session_state.fetched_data.get('stints', [])
-    selected_driver_details = st.session_state.fetched_data.get('driver_details', {})
-    
+
+    # Access data from the shared session store
+    session_data = get_session_entry().data
+    positions = session_data['positions']
+    weather = session_data['weather']
+    laps = session_data['laps']
+    radio_messages = session_data['radio_messages']
+    pit_data = session_data['pit_data']
+    stints = session_data['stints']
+    selected_driver_details = session_data['driver_details']
+    race_control = session_data['race_control']
+    # The sidebar may show an unsubmitted selection; sections tied to the
+    # loaded data take the session and driver it was loaded for
+    submitted_session = st.session_state.session_ref['session']
+    submitted_driver = st.session_state.session_ref['driver_number']
+
     # Apply team styling
     st.markdown(apply_team_dark_style(selected_team), unsafe_allow_html=True)
-    
+
     # Header
     team_style = get_team_style(selected_team)
     st.markdown(
@@ -250,229 +486,32 @@ def main():
         """,
         unsafe_allow_html=True
     )
-    
-    # Comprehensive Race Summary
-    st.subheader("🏁 Race Summary")
-    if st.button("Generate Comprehensive Race Analysis"):
-        with st.spinner("Analyzing race data..."):
-            summary_data = {
-                "driver_name": selected_driver_details['full_name'],
-                "team": selected_team,
-                "session": selected_session_name,
-                "total_laps": len(laps) if laps else 0,
-                "final_position": positions[-1]['position'] if positions else "N/A",
-                "position_changes": calculate_position_changes(positions) if positions else 0,
-                "fastest_lap": min([lap['lap_duration'] for lap in laps if isinstance(lap.get('lap_duration'), (int, float))], default=0),
-                "tire_strategy": [{"stint": s['stint_number'], "compound": s['compound'], "laps": s['lap_end'] - s['lap_start'] + 1} for s in stints] if stints else [],
-                "weather_changes": len(weather) > 1 if weather else False,
-                "radio_messages_count": len(radio_messages)
-            }
-            
-            prompt = f"""
-            Generate a concise 3-paragraph statistical race summary for {summary_data['driver_name']} ({summary_data['team']}) 
-            during the {summary_data['session']} session.
-            
-            Key data:
-            - Total laps: {summary_data['total_laps']}
-            - Final position: {summary_data['final_position']}
-            - Position changes: {summary_data['position_changes']}
-            - Fastest lap: {summary_data['fastest_lap']:.3f}s
-            - Tire strategy: {summary_data['tire_strategy']}
-            - Weather changes: {summary_data['weather_changes']}
-            - Radio messages: {summary_data['radio_messages_count']}
-            
-            Provide a detailed analysis covering:
-            1. Overall performance assessment
-            2. Tire strategy effectiveness
-            3. Position change patterns
-            4. Key moments from radio communications
-            5. Weather impact (if relevant)
 
-            Include only verifiable data from the API. No subjective assessments. Dont calculate starting position or talk about it
-            """
-            
-            race_summary = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are an expert F1 analyst. Provide detailed race summaries."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            ).choices[0].message.content
-            
-            st.markdown("### Full Race Analysis")
-            st.write(race_summary)
-
-    # Position Chart vs Lap Number
-    st.subheader("📈 Position Changes")
-    if positions and laps:
-        pos_df = pd.DataFrame(positions)
-        pos_df['date'] = pos_df['date'].apply(parse_f1_datetime)
-        
-        laps_df = pd.DataFrame(laps)
-        laps_df['date_start'] = laps_df['date_start'].apply(parse_f1_datetime)
-        
-        pos_df = pos_df.dropna(subset=['date'])
-        laps_df = laps_df.dropna(subset=['date_start', 'lap_number'])
-        
-        if not pos_df.empty and not laps_df.empty:
-            merged_df = pd.merge_asof(
-                pos_df.sort_values('date'),
-                laps_df[['date_start', 'lap_number']].sort_values('date_start'),
-                left_on='date',
-                right_on='date_start',
-                direction='nearest'
-            )
-            
-            merged_df = merged_df.dropna(subset=['lap_number'])
-            
-            if not merged_df.empty:
-                fig = px.line(
-                    merged_df,
-                    x='lap_number',
-                    y='position',
-                    markers=True,
-                    title="Position by Lap Number",
-                    labels={'lap_number': 'Lap Number', 'position': 'Position'}
-                )
-                fig.update_yaxes(autorange="reversed")
-                fig.update_layout(**get_plotly_theme()['layout'])
-                st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.warning("Could not merge position and lap data")
-        else:
-            st.warning("Not enough valid position or lap data available")
-    else:
-        st.warning("No position or lap data available for this session")
+    # Every section below is a fragment: widgets inside one only rerun that
+    # section, and its frame/figure are memoized per session and driver
+    from utils.race_control import build_track_status_periods
+    from utils.sections import build_lap_weather
 
-    # Weather Data
-    st.subheader("🌤️ Weather Conditions")
-    if weather:
-        weather_df = pd.DataFrame(weather)
-        weather_df['date'] = weather_df['date'].apply(parse_f1_datetime)
-        
-        fig = px.line(
-            weather_df,
-            x='date',
-            y=['air_temperature', 'track_temperature'],
-            title="Temperature Trends",
-            labels={'value': 'Temperature (°C)', 'variable': 'Metric'}
-        )
-        fig.update_layout(**get_plotly_theme()['layout'])
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("No weather data available for this session")
-
-    # Lap Time Performance
-
-    if "Race" in selected_session_name:
-        st.subheader("⏱️ Lap Time Performance")
-        if laps:
-            laps_df = pd.DataFrame(laps)
-            laps_df = laps_df[laps_df['lap_duration'].notna()]
-            
-            if not laps_df.empty:
-                # Get pit data from session state
-                pit_data = st.session_state.fetched_data.get('pit_data', [])
-                
-                # Mark pit laps
-                pit_laps = []
-                if pit_data:
-                    pit_df = pd.DataFrame(pit_data)
-                    pit_laps = pit_df['lap_number'].unique().tolist()
-                    # Add pit stop indicator column
-                    laps_df['is_pit'] = laps_df['lap_number'].isin(pit_laps)
-                
-                # Create plot
-                fig = px.line(
-                    laps_df,
-                    x='lap_number',
-                    y='lap_duration',
-                    title="Lap Times",
-                    labels={'lap_number': 'Lap Number', 'lap_duration': 'Lap Time (s)'},
-                    height=500
-                )
-                
-                # Highlight pit stops if they exist
-                if pit_laps:
-                    pit_lap_data = laps_df[laps_df['is_pit']]
-                    fig.add_trace(px.scatter(
-                        pit_lap_data,
-                        x='lap_number',
-                        y='lap_duration',
-                        color_discrete_sequence=['red'],
-                        hover_data={'is_pit': True}
-                    ).data[0])
-                    
-                    for _, pit in pit_df.iterrows():
-                        fig.add_annotation(
-                            x=pit['lap_number'],
-                            y=laps_df[laps_df['lap_number'] == pit['lap_number']]['lap_duration'].values[0],
-                            text=f"Pit: {pit['pit_duration']:.2f}s",
-                            showarrow=True,
-                            arrowhead=1,
-                            yshift=10
-                        )
-                
-                fig.update_layout(**get_plotly_theme()['layout'])
-                st.plotly_chart(fig, use_container_width=True)
-                
-                # Show tire strategy table separately if stints exist
-                if stints:
-                    st.subheader("🔄 Tire Strategy")
-                    stint_df = pd.DataFrame(stints)
-                    
-                    # Calculate fastest lap per stint
-                    stint_fastest = []
-                    for _, stint in stint_df.iterrows():
-                        stint_laps = laps_df[
-                            (laps_df['lap_number'] >= stint['lap_start']) & 
-                            (laps_df['lap_number'] <= stint['lap_end'])
-                        ]
-                        fastest = stint_laps['lap_duration'].min()
-                        stint_fastest.append(fastest)
-                    
-                    stint_df['fastest_lap'] = stint_fastest
-                    
-                    # Prepare table data
-                    strategy_table = []
-                    for _, stint in stint_df.iterrows():
-                        strategy_table.append({
-                            "Laps": f"{stint['lap_start']}-{stint['lap_end']}",
-                            "Compound": stint['compound'],
-                            "Stint Length": stint['lap_end'] - stint['lap_start'] + 1,
-                            "Fastest Lap": f"{stint['fastest_lap']:.3f}s",
-                        })
-                    
-                    # Display styled table
-                    st.dataframe(
-                        pd.DataFrame(strategy_table).style.applymap(
-                            color_compound, 
-                            subset=['Compound']
-                        )
-                    )
-                
-                # Show performance metrics (excluding pit laps)
-                normal_laps = laps_df[~laps_df['lap_number'].isin(pit_laps)] if pit_laps else laps_df
-                fastest_lap = normal_laps['lap_duration'].min()
-                avg_lap = normal_laps['lap_duration'].mean()
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Fastest Lap", f"{fastest_lap:.3f}s" + (" (excl. pits)" if pit_laps else ""))
-                with col2:
-                    st.metric("Average Lap", f"{avg_lap:.3f}s" + (" (excl. pits)" if pit_laps else ""))
-            
-            else:
-                st.warning("No valid lap time data available")
-        else:
-            st.warning("No lap data available for this session")
+    # Safety car, VSC, red and yellow flag periods shade the lap charts and keep
+    # neutralized laps out of the pace metrics
+    track_status = get_section('track_status', build_track_status_periods,
+                               race_control, submitted_session.get('date_end'))
+    # Conditions on every lap, joined once per session and driver
+    lap_weather = get_section('lap_weather', build_lap_weather, laps, weather)
+    render_race_summary(selected_driver_details, selected_team, selected_session,
+                        positions, laps, stints, weather, radio_messages, pit_data, track_status)
+    render_position_chart(positions, laps, track_status)
+    track_color = get_team_style(selected_driver_details.get('team_name', selected_team))['primary']
+    render_track_map(submitted_session, submitted_driver, laps, track_color)
+    render_weather(weather)
+
+    if "Race" in submitted_session['session_name']:
+        render_lap_performance(laps, pit_data, stints, track_status, lap_weather,
+                               submitted_session, submitted_driver)
 
     # Radio Messages with Transcription and AI Summary
     st.subheader("📻 Team Radio Messages")
-    radio_messages = st.session_state.fetched_data.get('radio_messages', [])
-    display_radio_messages(selected_session, selected_driver, radio_messages)
+    display_radio_messages(radio_messages)
 
     st.markdown("""
     ---
@@ -480,4 +519,4 @@ def main():
     """, unsafe_allow_html=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,414 @@
+"""Synthetic OpenF1 payloads and local stand-ins for benchmarking without network access"""
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlsplit
+
+SESSION_START = datetime(2023, 3, 5, 15, 0, tzinfo=timezone.utc)
+TEAMS = [
+    "Red Bull Racing", "Mercedes", "Ferrari", "McLaren", "Aston Martin",
+    "Alpine", "Williams", "AlphaTauri", "Alfa Romeo", "Haas F1 Team",
+]
+COMPOUNDS = ["SOFT", "MEDIUM", "HARD"]
+
+
+def iso(dt: datetime) -> str:
+    return dt.isoformat(timespec='milliseconds')
+
+
+@lru_cache(maxsize=8)
+def build_race(session_key: int = 9001, meeting_key: int = 1200, total_laps: int = 57, seed: int = 7) -> dict:
+    """Build one synthetic race weekend with OpenF1-shaped records for every driver"""
+    rng = random.Random(seed)
+    drivers = []
+    for i in range(20):
+        number = i + 1
+        drivers.append({
+            'session_key': session_key,
+            'meeting_key': meeting_key,
+            'driver_number': number,
+            'full_name': f"Driver {number}",
+            'name_acronym': f"D{number:02d}",
+            'team_name': TEAMS[i // 2],
+            'headshot_url': f"https://example.invalid/headshots/{number}.png",
+        })
+
+    laps, positions, stints, pits, radio = [], [], [], [], []
+    for grid_slot, driver in enumerate(drivers):
+        number = driver['driver_number']
+        pace = 94.0 + grid_slot * 0.08
+        pit_laps = sorted(rng.sample(range(12, total_laps - 5), 2))
+        stint_bounds = [1] + [lap + 1 for lap in pit_laps] + [total_laps + 1]
+        lap_start = SESSION_START + timedelta(seconds=grid_slot * 0.3)
+        for stint_number in range(len(stint_bounds) - 1):
+            compound = COMPOUNDS[(stint_number + grid_slot) % len(COMPOUNDS)]
+            first, last = stint_bounds[stint_number], stint_bounds[stint_number + 1] - 1
+            stints.append({
+                'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                'stint_number': stint_number + 1, 'compound': compound,
+                'lap_start': first, 'lap_end': last, 'tyre_age_at_start': 0 if stint_number else 3,
+            })
+            for lap_number in range(first, last + 1):
+                age = lap_number - first
+                duration = pace + 0.05 * age + rng.gauss(0, 0.25)
+                if lap_number in pit_laps:
+                    duration += 21.0
+                laps.append({
+                    'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                    'lap_number': lap_number, 'date_start': iso(lap_start),
+                    'lap_duration': round(duration, 3),
+                    'duration_sector_1': round(duration * 0.31, 3),
+                    'duration_sector_2': round(duration * 0.42, 3),
+                    'duration_sector_3': round(duration * 0.27, 3),
+                    'i1_speed': rng.randint(280, 310), 'i2_speed': rng.randint(250, 290),
+                    'st_speed': rng.randint(300, 330), 'is_pit_out_lap': lap_number - 1 in pit_laps,
+                })
+                lap_start += timedelta(seconds=duration)
+        for lap in pit_laps:
+            pits.append({
+                'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                'lap_number': lap, 'pit_duration': round(rng.uniform(20.5, 24.0), 1),
+                'date': iso(SESSION_START + timedelta(seconds=lap * pace)),
+            })
+        position = grid_slot + 1
+        positions.append({'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                          'position': position, 'date': iso(SESSION_START - timedelta(minutes=5))})
+        for lap in sorted(rng.sample(range(1, total_laps), 12)):
+            position = min(20, max(1, position + rng.choice([-2, -1, 1, 2])))
+            positions.append({'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                              'position': position, 'date': iso(SESSION_START + timedelta(seconds=lap * pace + 3))})
+        for lap in sorted(rng.sample(range(1, total_laps), 15)):
+            radio.append({'session_key': session_key, 'meeting_key': meeting_key, 'driver_number': number,
+                          'date': iso(SESSION_START + timedelta(seconds=lap * pace + 20)),
+                          'recording_url': f"https://example.invalid/radio/{session_key}/{number}/{lap}.mp3"})
+
+    # Weather is published once a minute for the whole meeting (practice to race);
+    # samples before the race's formation lap belong to earlier sessions
+    weather = []
+    for minute in range(-3 * 24 * 60, 2 * 60, 6):
+        weather.append({
+            'meeting_key': meeting_key, 'session_key': session_key if minute >= -60 else session_key - 1,
+            'date': iso(SESSION_START + timedelta(minutes=minute)),
+            'air_temperature': round(22 + 4 * rng.random(), 1),
+            'track_temperature': round(35 + 8 * rng.random(), 1),
+            'humidity': round(40 + 20 * rng.random(), 1), 'pressure': 1012.0,
+            'rainfall': 0, 'wind_direction': rng.randint(0, 359), 'wind_speed': round(3 * rng.random(), 1),
+        })
+
+    # One sector yellow, a VSC and a full safety car, timed against the leader's pace
+    def rc(lap: float, category: str, message: str, flag: str = None, scope: str = None, sector: int = None):
+        return {'session_key': session_key, 'meeting_key': meeting_key, 'category': category,
+                'date': iso(SESSION_START + timedelta(seconds=lap * 94.0)), 'driver_number': None,
+                'flag': flag, 'lap_number': int(lap) + 1, 'message': message, 'scope': scope, 'sector': sector}
+    race_control = [
+        rc(0.0, 'Flag', "GREEN LIGHT - PIT EXIT OPEN", 'GREEN', 'Track'),
+        rc(8.3, 'Flag', "YELLOW IN TRACK SECTOR 7", 'YELLOW', 'Sector', 7),
+        rc(8.6, 'Flag', "CLEAR IN TRACK SECTOR 7", 'CLEAR', 'Sector', 7),
+        rc(18.2, 'SafetyCar', "VIRTUAL SAFETY CAR DEPLOYED"),
+        rc(19.4, 'SafetyCar', "VIRTUAL SAFETY CAR ENDING"),
+        rc(33.5, 'SafetyCar', "SAFETY CAR DEPLOYED"),
+        rc(36.1, 'SafetyCar', "SAFETY CAR IN THIS LAP"),
+        rc(37.0, 'Flag', "TRACK CLEAR", 'GREEN', 'Track'),
+        rc(total_laps, 'Flag', "CHEQUERED FLAG", 'CHEQUERED', 'Track'),
+    ]
+
+    meeting = {'meeting_key': meeting_key, 'meeting_name': "Synthetic Grand Prix", 'year': 2023,
+               'circuit_short_name': "Synthetic", 'country_name': "Nowhere"}
+    session = {'session_key': session_key, 'meeting_key': meeting_key, 'session_name': "Race",
+               'session_type': "Race", 'date_start': iso(SESSION_START),
+               'date_end': iso(SESSION_START + timedelta(hours=2)), 'year': 2023,
+               'circuit_short_name': "Synthetic"}
+    return {'meeting': meeting, 'session': session, 'drivers': drivers, 'laps': laps,
+            'positions': positions, 'stints': stints, 'pit': pits, 'team_radio': radio, 'weather': weather,
+            'race_control': race_control}
+
+
+def build_location(race: dict, driver_number: int, hz: float = 3.7) -> list:
+    """Location samples tracing an oval once per lap, at OpenF1's ~3.7 Hz"""
+    samples = []
+    for lap in race['laps']:
+        if lap['driver_number'] != driver_number:
+            continue
+        start = datetime.fromisoformat(lap['date_start'])
+        count = int(lap['lap_duration'] * hz)
+        for i in range(count):
+            phase = 2 * math.pi * i / count
+            samples.append({
+                'session_key': lap['session_key'], 'meeting_key': lap['meeting_key'],
+                'driver_number': driver_number, 'date': iso(start + timedelta(seconds=i / hz)),
+                'x': round(4000 * math.cos(phase) + 600 * math.cos(3 * phase)),
+                'y': round(2200 * math.sin(phase)), 'z': round(40 * math.sin(2 * phase)),
+            })
+    return samples
+
+
+def build_car_data(race: dict, driver_number: int, hz: float = 3.7) -> list:
+    """car_data samples with three straights and braking zones per lap, at OpenF1's ~3.7 Hz
+
+    Speeds scale with the lap's duration, so slower laps are slower everywhere.
+    """
+    samples = []
+    for lap in race['laps']:
+        if lap['driver_number'] != driver_number:
+            continue
+        start = datetime.fromisoformat(lap['date_start'])
+        count = int(lap['lap_duration'] * hz)
+        for i in range(count):
+            phase = 2 * math.pi * i / count
+            speed = round((215 + 95 * math.cos(3 * phase)) * 94.0 / lap['lap_duration'])
+            accelerating = -math.sin(3 * phase)
+            samples.append({
+                'session_key': lap['session_key'], 'meeting_key': lap['meeting_key'],
+                'driver_number': driver_number, 'date': iso(start + timedelta(seconds=i / hz)),
+                'speed': speed, 'throttle': 100 if accelerating > -0.3 else 0,
+                'brake': 100 if accelerating < -0.8 else 0, 'n_gear': min(8, 1 + speed // 40),
+                'rpm': 9000 + speed * 15, 'drs': 0,
+            })
+    return samples
+
+
+def _for_driver(records: list, driver_number: int = None) -> list:
+    if not driver_number:
+        return list(records)
+    return [r for r in records if r['driver_number'] == driver_number]
+
+
+def _in_window(records: list, session_key: int, date_start: str = None, date_end: str = None) -> list:
+    # Server-side session_key and date>= / date<= filtering
+    start = datetime.fromisoformat(date_start) if date_start else None
+    end = datetime.fromisoformat(date_end) if date_end else None
+    return [r for r in records if r['session_key'] == session_key
+            and (start is None or datetime.fromisoformat(r['date']) >= start)
+            and (end is None or datetime.fromisoformat(r['date']) <= end)]
+
+
+def _table(records: list, endpoint: str):
+    # Same boundary conversion as OpenF1Client._get_records
+    from utils.records import RecordTable
+    return RecordTable.from_records(records, endpoint)
+
+
+class FakeOpenF1Client:
+    """Drop-in OpenF1Client stand-in serving the synthetic race and counting upstream calls"""
+    calls = Counter()
+
+    def __init__(self, race: dict = None):
+        self.race = race or build_race()
+
+    def _record(self, endpoint: str):
+        FakeOpenF1Client.calls[endpoint] += 1
+
+    def scheduler_metrics(self) -> dict:
+        # Nothing is scheduled: calls are answered in-process
+        from utils.scheduler import RequestScheduler
+        return RequestScheduler().metrics()
+
+    def get_meetings(self, year: int) -> list:
+        self._record('meetings')
+        return [self.race['meeting']]
+
+    def get_sessions(self, meeting_key: int) -> list:
+        self._record('sessions')
+        return [self.race['session']]
+
+    def get_drivers(self, session_key: int) -> list:
+        self._record('drivers')
+        return list(self.race['drivers'])
+
+    def get_team_radio(self, session_key: int, driver_number: int = None) -> list:
+        self._record('team_radio')
+        return _table(_for_driver(self.race['team_radio'], driver_number), 'team_radio')
+
+    def get_all_team_radio(self, session_key: int) -> list:
+        return self.get_team_radio(session_key)
+
+    def get_laps(self, session_key: int, driver_number: int = None) -> list:
+        self._record('laps')
+        return _table(_for_driver(self.race['laps'], driver_number), 'laps')
+
+    def get_session_data(self, session_key: int) -> dict:
+        self._record('sessions')
+        return self.race['session']
+
+    def get_position_data(self, session_key: int, driver_number: int = None) -> list:
+        self._record('position')
+        return _table(_for_driver(self.race['positions'], driver_number), 'position')
+
+    def get_stints(self, session_key: int, driver_number: int = None) -> list:
+        self._record('stints')
+        return _table(_for_driver(self.race['stints'], driver_number), 'stints')
+
+    def get_weather(self, meeting_key: int) -> list:
+        self._record('weather')
+        return _table(self.race['weather'], 'weather')
+
+    def get_session_weather(self, session_key: int, date_start: str = None, date_end: str = None) -> list:
+        self._record('weather')
+        return _table(_in_window(self.race['weather'], session_key, date_start, date_end), 'weather')
+
+    def get_pit_data(self, session_key: int, driver_number: int = None) -> list:
+        self._record('pit')
+        return _table(_for_driver(self.race['pit'], driver_number), 'pit')
+
+    def get_race_control(self, session_key: int) -> list:
+        self._record('race_control')
+        return list(self.race['race_control'])
+
+    def get_location(self, session_key: int, driver_number: int) -> list:
+        self._record('location')
+        return build_location(self.race, driver_number)
+
+    def get_car_data(self, session_key: int, driver_number: int, date_start: str = None,
+                     date_end: str = None) -> list:
+        self._record('car_data')
+        return _table(_in_window(build_car_data(self.race, driver_number), session_key, date_start, date_end),
+                      'car_data')
+
+    def download(self, url: str) -> bytes:
+        self._record('download')
+        return b"\x00" * 1024
+
+
+class _FakeMessage(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+# Simulated model latency: time to first token and time per streamed chunk
+LLM_FIRST_TOKEN_S = 0.4
+LLM_CHUNK_S = 0.02
+
+
+def fake_chat_completion(stream: bool = False, max_tokens: int = 100, **kwargs):
+    """openai.ChatCompletion.create stand-in returning a fixed answer, optionally streamed"""
+    words = ("Synthetic analysis of the provided race data. " * 40).split()[:max_tokens]
+    if not stream:
+        time.sleep(LLM_FIRST_TOKEN_S + LLM_CHUNK_S * len(words))
+        content = " ".join(words)
+        return _FakeMessage(choices=[_FakeMessage(message=_FakeMessage(content=content))])
+
+    def chunks():
+        time.sleep(LLM_FIRST_TOKEN_S)
+        for word in words:
+            yield _FakeMessage(choices=[_FakeMessage(delta=_FakeMessage(content=word + " "))])
+            time.sleep(LLM_CHUNK_S)
+    return chunks()
+
+
+def fake_transcribe(**kwargs):
+    """openai.Audio.transcribe stand-in"""
+    return "Box box, box this lap. Tyres are gone."
+
+
+class _FakeResponse:
+    content = b"\x00" * 1024
+    status_code = 200
+    headers = {}
+
+    def raise_for_status(self):
+        pass
+
+
+class _JSONResponse(_FakeResponse):
+    def __init__(self, body: str):
+        self._body = body
+
+    def json(self):
+        return json.loads(self._body)
+
+
+class LocalOpenF1Server:
+    """HTTP-level OpenF1 stand-in serving synthetic race weekends through requests.get
+
+    Unlike FakeOpenF1Client it sits below the real OpenF1Client, so its caches,
+    scheduler and record validation are exercised and `calls` counts what would
+    actually reach api.openf1.org. Every request waits `latency_s` like a
+    network round trip.
+    """
+
+    def __init__(self, meetings: int = 4, latency_s: float = 0.05):
+        self.latency_s = latency_s
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self.races = {}
+        for i in range(meetings):
+            race = dict(build_race(session_key=9001 + i, meeting_key=1200 + i, seed=7 + i))
+            race['meeting'] = {**race['meeting'], 'meeting_name': f"Synthetic Grand Prix {i + 1}"}
+            self.races[race['session']['session_key']] = race
+
+    def _race(self, params: dict) -> dict:
+        if 'session_key' in params:
+            return self.races.get(params['session_key'])
+        return next((r for r in self.races.values() if r['meeting']['meeting_key'] == params.get('meeting_key')), None)
+
+    def _payload(self, endpoint: str, params: dict):
+        if endpoint == 'meetings':
+            return [{**r['meeting'], 'year': params.get('year')} for r in self.races.values()]
+        race = self._race(params)
+        if race is None:
+            return []
+        if endpoint == 'sessions':
+            return [race['session']]
+        if endpoint == 'drivers':
+            return race['drivers']
+        if endpoint == 'location':
+            return build_location(race, params.get('driver_number'))
+        if endpoint == 'car_data':
+            return _in_window(build_car_data(race, params.get('driver_number')), params['session_key'],
+                              params.get('date>'), params.get('date<'))
+        records = race.get({'position': 'positions'}.get(endpoint, endpoint), [])
+        if endpoint == 'weather' and 'session_key' in params:
+            return _in_window(records, params['session_key'], params.get('date>'), params.get('date<'))
+        return _for_driver(records, params.get('driver_number'))
+
+    def get(self, url: str, timeout: float = None, **kwargs):
+        parts = urlsplit(url)
+        endpoint = parts.path.rsplit('/', 1)[-1]
+        if not parts.path.startswith('/v1/'):
+            endpoint = 'download'
+        with self._lock:
+            self.calls[endpoint] += 1
+        time.sleep(self.latency_s)
+        if endpoint == 'download':
+            return _FakeResponse()
+
+        # Serialize each distinct response once; the client still pays for parsing it
+        with self._lock:
+            body = self._bodies.get(url)
+        if body is None:
+            params = {k: int(v) if v.isdigit() else v for k, v in parse_qsl(parts.query)}
+            body = json.dumps(self._payload(endpoint, params))
+            with self._lock:
+                self._bodies[url] = body
+        return _JSONResponse(body)
+
+
+def install_stand_ins(llm: bool = True, server: LocalOpenF1Server = None):
+    """Patch the OpenF1 client, OpenAI calls and audio downloads with local stand-ins
+
+    Pass llm=False to leave openai/requests unimported, e.g. when profiling startup.
+    With a LocalOpenF1Server the real OpenF1Client is kept and served over it.
+    """
+    import utils.api_client
+
+    if server is None:
+        utils.api_client.OpenF1Client = FakeOpenF1Client
+    else:
+        import requests
+        requests.get = server.get
+    if not llm:
+        return
+
+    import openai
+    import requests
+
+    openai.ChatCompletion.create = staticmethod(fake_chat_completion)
+    openai.Audio.transcribe = staticmethod(fake_transcribe)
+    if server is None:
+        requests.get = lambda *args, **kwargs: _FakeResponse()
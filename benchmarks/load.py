@@ -0,0 +1,262 @@
+"""Multi-user load test of the dashboard against local OpenF1 and LLM stand-ins
+
+Each simulated viewer is its own AppTest session running app.py's main() in
+this process, so they share module state, st.cache_resource values, the
+OpenF1 client caches and the request scheduler just like browser sessions on
+one Streamlit server. Viewers pick random sidebar selections, submit, then
+perform a random mix of reruns, transcriptions, track map scrubbing, race
+analyses and driver changes. For every concurrency level the harness reports
+per-interaction latency percentiles, throughput, upstream OpenF1 calls, how
+long the request scheduler queued them and how often the host throttled,
+resident memory growth and what the shared session store holds.
+
+Usage: python -m benchmarks.load [--levels 1 2 4 8] [--interactions 8] [--latency-ms 50]
+"""
+import argparse
+import gc
+import os
+import random
+import resource
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fixtures import LocalOpenF1Server, install_stand_ins
+from utils.api_client import get_api_client
+from utils.session_store import get_session_store
+
+SIDEBAR = ["Grand Prix", "Session", "Team", "Driver"]
+
+# Relative frequency of each interaction after the first Submit
+INTERACTIONS = {
+    'rerun': 4,
+    'track_replay': 3,
+    'transcribe': 2,
+    'change_driver': 2,
+    'race_analysis': 1,
+}
+
+
+def rss_mib() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def share_app_test_runtime():
+    """Let AppTest sessions run concurrently in one process
+
+    AppTest installs a mock Runtime before each run and clears it afterwards,
+    which pulls it out from under viewers still running; keep the most recent
+    one visible instead. Likewise the global.appTest option is switched on for
+    the whole process rather than per run. Script compilation is serialized,
+    as concurrent compile() calls are not reliable on every CPython version.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    shared = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            shared['runtime'] = cls._instance
+        if 'runtime' not in shared:
+            raise RuntimeError("Runtime hasn't been created!")
+        return shared['runtime']
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: cls._instance is not None or 'runtime' in shared)
+
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    ScriptCache.get_bytecode = locked_get_bytecode
+    config.set_option("global.appTest", True)
+
+
+class Viewer:
+    """One simulated browser session"""
+
+    def __init__(self, script: str, rng: random.Random, record):
+        self.at = AppTest.from_file(script, default_timeout=120)
+        self.rng = rng
+        self.record = record
+
+    def _timed(self, name: str, action):
+        start = time.perf_counter()
+        action()
+        self.record(name, (time.perf_counter() - start) * 1000, bool(self.at.exception))
+
+    def _sidebar(self, label: str):
+        return next(w for w in self.at.sidebar.selectbox if w.label == label)
+
+    def pick(self, label: str):
+        box = self._sidebar(label)
+        self._timed('sidebar', lambda: box.set_value(self.rng.choice(box.options)).run())
+
+    def submit(self):
+        button = next(b for b in self.at.sidebar.button if b.label == "Submit Analysis Request")
+        self._timed('submit', lambda: button.click().run())
+
+    def start(self):
+        self._timed('first_paint', self.at.run)
+        for label in SIDEBAR:
+            self.pick(label)
+        self.submit()
+
+    def act(self, name: str):
+        at = self.at
+        if name == 'rerun':
+            self._timed(name, at.run)
+        elif name == 'track_replay':
+            slider = next((s for s in at.slider if s.key == "track_map_t"), None)
+            if slider is not None:
+                value = self.rng.uniform(slider.min, slider.max)
+                self._timed(name, lambda: slider.set_value(float(int(value))).run())
+        elif name == 'transcribe':
+            buttons = [b for b in at.button if b.label == "Transcribe"]
+            if buttons:
+                button = self.rng.choice(buttons)
+                self._timed(name, lambda: button.click().run())
+        elif name == 'change_driver':
+            self.pick("Driver")
+            self.submit()
+        elif name == 'race_analysis':
+            button = next((b for b in at.button if b.label == "Generate Comprehensive Race Analysis"), None)
+            if button is not None:
+                self._timed(name, lambda: button.click().run())
+
+
+def run_level(users: int, script: str, interactions: int, server: LocalOpenF1Server, seed: int) -> dict:
+    lock = threading.Lock()
+    timings, errors = defaultdict(list), defaultdict(int)
+
+    def record(name: str, ms: float, failed: bool):
+        with lock:
+            timings[name].append(ms)
+            errors[name] += failed
+
+    def simulate(user: int) -> Viewer:
+        rng = random.Random(seed * 1000 + user)
+        viewer = Viewer(script, rng, record)
+        viewer.start()
+        names, weights = zip(*INTERACTIONS.items())
+        for name in rng.choices(names, weights, k=interactions):
+            viewer.act(name)
+        return viewer
+
+    gc.collect()
+    server.calls.clear()
+    store_before = get_session_store().stats()
+    scheduler_before = get_api_client().scheduler_metrics()
+    rss_before = rss_mib()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        # Keep every viewer (and its session state) alive until memory is read
+        viewers = list(pool.map(simulate, range(users)))
+    wall_s = time.perf_counter() - start
+    rss_after = rss_mib()
+    store = get_session_store().stats()
+    scheduler = get_api_client().scheduler_metrics()
+    del viewers
+    gc.collect()
+
+    count = sum(len(v) for v in timings.values())
+    return {
+        'users': users,
+        'wall_s': wall_s,
+        'interactions': count,
+        'throughput': count / wall_s,
+        'latency': {name: _percentiles(values) for name, values in sorted(timings.items())},
+        'errors': sum(errors.values()),
+        'upstream_calls': dict(server.calls),
+        'rss_growth_mib': rss_after - rss_before,
+        'rss_mib': rss_after,
+        'store': {**store, **{k: store[k] - store_before[k]
+                              for k in ('hits', 'loads', 'section_builds', 'section_hits', 'evictions')}},
+        'scheduler': _scheduler_delta(scheduler_before, scheduler),
+    }
+
+
+def _scheduler_delta(before: dict, after: dict) -> dict:
+    """Admissions, average wait and 429s of one level from two cumulative scheduler snapshots"""
+    delta = {'priorities': {}, 'throttled': after['throttled'] - before['throttled'], 'rate': after['rate']}
+    for priority, admitted in after['admitted'].items():
+        count = admitted - before['admitted'][priority]
+        wait_ms = (after['avg_wait_ms'][priority] * admitted
+                   - before['avg_wait_ms'][priority] * before['admitted'][priority])
+        delta['priorities'][priority] = {
+            'admitted': count,
+            'avg_wait_ms': wait_ms / count if count else 0.0,
+            # Peaks are process-wide, not per level
+            'max_wait_ms': after['max_wait_ms'][priority],
+            'max_queue_depth': after['max_queue_depth'][priority],
+        }
+    return delta
+
+
+def _percentiles(values: list) -> dict:
+    if len(values) == 1:
+        return {'n': 1, 'p50': values[0], 'p95': values[0], 'p99': values[0]}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'n': len(values), 'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+
+def print_level(result: dict):
+    print(f"\n== {result['users']} concurrent viewers: {result['interactions']} interactions in "
+          f"{result['wall_s']:.1f} s ({result['throughput']:.1f}/s), {result['errors']} errors")
+    print(f"{'interaction':>14} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, p in result['latency'].items():
+        print(f"{name:>14} {p['n']:>5} {p['p50']:>8.0f} {p['p95']:>8.0f} {p['p99']:>8.0f}")
+    calls = result['upstream_calls']
+    print(f"  upstream calls: {sum(calls.values())} "
+          f"({', '.join(f'{k}={v}' for k, v in sorted(calls.items(), key=lambda kv: -kv[1]))})")
+    scheduler = result['scheduler']
+    print(f"  scheduler: {scheduler['throttled']} throttled (429), rate {scheduler['rate']:.1f}/s; " + "; ".join(
+        f"{name} {p['admitted']} admitted, avg wait {p['avg_wait_ms']:.0f} ms "
+        f"(peak {p['max_wait_ms']:.0f} ms, queue {p['max_queue_depth']})"
+        for name, p in scheduler['priorities'].items()))
+    print(f"  RSS: {result['rss_mib']:.0f} MiB (+{result['rss_growth_mib']:.1f} MiB during level, "
+          f"{result['rss_growth_mib'] / result['users']:.1f} MiB per viewer)")
+    store = result['store']
+    print(f"  session store: {store['entries']} entries ({store['referenced']} referenced), "
+          f"{store['resident_bytes'] / 2 ** 20:.1f} MiB resident; {store['loads']} loads, {store['hits']} hits, "
+          f"{store['section_builds']} section builds, {store['section_hits']} section hits, "
+          f"{store['evictions']} evictions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--script', default='app.py')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--interactions', type=int, default=8, help="random interactions per viewer after Submit")
+    parser.add_argument('--latency-ms', type=float, default=50, help="simulated OpenF1 round trip")
+    parser.add_argument('--meetings', type=int, default=4, help="synthetic race weekends to choose from")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    server = LocalOpenF1Server(meetings=args.meetings, latency_s=args.latency_ms / 1000)
+    install_stand_ins(server=server)
+    share_app_test_runtime()
+    # Locations and transcripts are persisted; keep the run's files out of the real data dir
+    os.environ.setdefault('F1_DATA_DIR', os.path.join('.f1_data', 'load_test'))
+
+    script = os.path.abspath(args.script)
+    for users in args.levels:
+        print_level(run_level(users, script, args.interactions, server, args.seed))
+
+
+if __name__ == "__main__":
+    main()
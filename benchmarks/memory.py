@@ -0,0 +1,79 @@
+"""Memory held per browser session by fetched OpenF1 data: lists of dicts vs RecordTables
+
+Sizes are for the synthetic 20-driver, 57-lap race. "Driver view" is what
+one shared session store entry holds after Submit (one driver plus meeting-wide
+weather); "Session-wide" is what report generation and season ingestion hold.
+
+Usage: python -m benchmarks.memory
+"""
+import sys
+
+import numpy as np
+
+from benchmarks.fixtures import _for_driver, build_race
+from utils.records import RecordTable
+
+# (race key, endpoint schema, fetched per driver?)
+ENDPOINTS = [
+    ('laps', 'laps', True),
+    ('positions', 'position', True),
+    ('stints', 'stints', True),
+    ('pit', 'pit', True),
+    ('team_radio', 'team_radio', True),
+    ('weather', 'weather', False),
+]
+
+
+def deep_sizeof(obj, seen: set = None) -> int:
+    """Bytes held by a JSON-like structure, counting shared objects once"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    return size
+
+
+def _fresh(records: list) -> list:
+    # Rebuild the records as json.loads would: no objects shared between rows
+    import json
+    return json.loads(json.dumps(records))
+
+
+def measure(driver_number: int = 1) -> list:
+    race = build_race()
+    rows = []
+    for key, endpoint, per_driver in ENDPOINTS:
+        for scope, records in (('driver', _for_driver(race[key], driver_number) if per_driver else race[key]),
+                               ('session', race[key])):
+            records = _fresh(records)
+            table = RecordTable.from_records(records, endpoint)
+            frame = table.to_frame()
+            shared = all(
+                np.shares_memory(frame[field].array._data if field in table.masks else frame[field].to_numpy(), column)
+                for field, column in table.columns.items() if column.dtype.kind in 'ifb'
+            )
+            rows.append({'endpoint': key, 'scope': scope, 'records': len(records),
+                         'dicts_bytes': deep_sizeof(records), 'table_bytes': table.nbytes, 'zero_copy': shared})
+    return rows
+
+
+def main():
+    rows = measure()
+    print(f"{'endpoint':>12} {'scope':>8} {'records':>8} {'dicts KiB':>10} {'table KiB':>10} {'ratio':>6}  zero-copy")
+    for row in rows:
+        print(f"{row['endpoint']:>12} {row['scope']:>8} {row['records']:>8} {row['dicts_bytes'] / 1024:>10.1f} "
+              f"{row['table_bytes'] / 1024:>10.1f} {row['dicts_bytes'] / row['table_bytes']:>6.1f}  {row['zero_copy']}")
+    for scope, label in (('driver', "Driver view"), ('session', "Session-wide")):
+        dicts = sum(r['dicts_bytes'] for r in rows if r['scope'] == scope)
+        tables = sum(r['table_bytes'] for r in rows if r['scope'] == scope)
+        print(f"{label}: {dicts / 1024:.0f} KiB as dicts -> {tables / 1024:.0f} KiB as RecordTables "
+              f"({dicts / tables:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
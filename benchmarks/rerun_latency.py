@@ -0,0 +1,59 @@
+"""Measure Streamlit rerun latency of the dashboard against local stand-ins
+
+Usage: python -m benchmarks.rerun_latency [--script app.py] [--repeat 10]
+"""
+import argparse
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fixtures import install_stand_ins
+
+
+def _timed(action) -> float:
+    start = time.perf_counter()
+    action()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(script: str, repeat: int) -> dict:
+    install_stand_ins()
+    at = AppTest.from_file(os.path.abspath(script), default_timeout=60)
+    first_paint = _timed(at.run)
+
+    submit = next(b for b in at.sidebar.button if b.label == "Submit Analysis Request")
+    submit_ms = _timed(lambda: submit.click().run())
+
+    # Any widget change outside the sections triggers a full rerun
+    full_rerun = [_timed(at.run) for _ in range(repeat)]
+
+    # Transcribe buttons live inside the radio list
+    transcribe = []
+    for _ in range(repeat):
+        buttons = [b for b in at.button if b.label == "Transcribe"]
+        if not buttons:
+            break
+        transcribe.append(_timed(lambda: buttons[0].click().run()))
+
+    return {
+        'first_paint_ms': first_paint,
+        'submit_ms': submit_ms,
+        'full_rerun_ms': statistics.median(full_rerun),
+        'transcribe_click_ms': statistics.median(transcribe) if transcribe else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--script', default='app.py')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    for name, value in measure(args.script, args.repeat).items():
+        print(f"{name:>22}: {value:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
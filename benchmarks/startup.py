@@ -0,0 +1,120 @@
+"""Cold-start profile of the dashboard: import-time breakdown and time to first paint
+
+Every measurement runs in a fresh interpreter so module caches are cold. Results
+are checked against STARTUP_BUDGET_MS and can be appended to a history file so
+first paint can be tracked across releases.
+
+Usage: python -m benchmarks.startup [--top 15] [--record benchmarks/startup_history.jsonl]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budget for a cold start, in milliseconds
+STARTUP_BUDGET_MS = {
+    'import_app_ms': 1500,
+    'first_paint_ms': 2500,
+}
+
+# Modules that must not be loaded before the sidebar has rendered
+DEFERRED_MODULES = ['openai', 'pandas', 'plotly.express', 'utils.sections']
+
+_FIRST_PAINT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+from benchmarks.fixtures import install_stand_ins
+install_stand_ins(llm=False)
+ready = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+painted = time.perf_counter()
+print(json.dumps({{
+    'harness_ms': (ready - start) * 1000,
+    'first_paint_ms': (painted - ready) * 1000,
+    'sidebar_widgets': len(at.sidebar.selectbox),
+    'loaded_at_first_paint': [m for m in {deferred!r} if m in sys.modules],
+}}))
+"""
+
+
+def _python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+
+def import_profile(top: int) -> dict:
+    """Run `python -X importtime -c 'import app'` and rank modules by cumulative time"""
+    start = time.perf_counter()
+    result = _python('-X', 'importtime', '-c', 'import app')
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace('import time:', '|').split('|')
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us) / 1000, int(cumulative_us) / 1000))
+
+    app_row = next(row for row in rows if row[0] == 'app' and row[1] == 0)
+    return {
+        'import_app_ms': app_row[3],
+        'process_wall_ms': wall_ms,
+        'top_modules': sorted((row for row in rows if row[1] <= 1), key=lambda row: row[3], reverse=True)[:top],
+    }
+
+
+def first_paint() -> dict:
+    """Time the first script run (sidebar only, nothing submitted) in a fresh process"""
+    probe = _FIRST_PAINT_PROBE.format(app=os.path.join(REPO_ROOT, 'app.py'), deferred=DEFERRED_MODULES)
+    return json.loads(_python('-c', probe).stdout.strip().splitlines()[-1])
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help="number of modules to list in the import profile")
+    parser.add_argument('--record', help="append the result as one JSON line to this history file")
+    args = parser.parse_args()
+
+    profile = import_profile(args.top)
+    paint = first_paint()
+
+    print(f"{'module':<40}{'self ms':>10}{'cumulative ms':>16}")
+    for name, _, self_ms, cumulative_ms in profile['top_modules']:
+        print(f"{name:<40}{self_ms:>10.1f}{cumulative_ms:>16.1f}")
+    print()
+
+    results = {'import_app_ms': profile['import_app_ms'], 'first_paint_ms': paint['first_paint_ms']}
+    over_budget = False
+    for metric, value in results.items():
+        budget = STARTUP_BUDGET_MS[metric]
+        status = "ok" if value <= budget else "OVER BUDGET"
+        over_budget |= value > budget
+        print(f"{metric:>16}: {value:8.1f} ms (budget {budget} ms) {status}")
+    print(f"{'loaded early':>16}: {', '.join(paint['loaded_at_first_paint']) or 'none'}")
+
+    if args.record:
+        record = {'revision': _git_revision(), 'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                  **results, 'loaded_at_first_paint': paint['loaded_at_first_paint']}
+        with open(args.record, 'a') as history:
+            history.write(json.dumps(record) + '\n')
+
+    sys.exit(1 if over_budget or paint['loaded_at_first_paint'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import time
+
+import streamlit as st
+
+from utils.api_client import get_api_client
+from utils.styling import get_team_style
+from utils.telemetry import build_lap_delta_figure, compare_lap_pair
+
+st.set_page_config(
+    page_title="F1 Advanced View",
+    page_icon="🔬",
+    layout="wide"
+)
+
+def select_lap(label: str, drivers: list, session_key: int, api_client, default_driver: int = 0,
+               default_lap: int = 0) -> tuple:
+    """Driver and lap pickers for one side of the comparison; returns (driver details, lap number, lap time)"""
+    st.subheader(label)
+    driver_labels = [f"{d['driver_number']} - {d['full_name']} ({d['team_name']})" for d in drivers]
+    driver = drivers[driver_labels.index(st.selectbox("Driver", driver_labels, index=default_driver,
+                                                      key=f"{label}_driver"))]
+    laps = api_client.get_laps(session_key, driver['driver_number'])
+    lap_times = {lap['lap_number']: lap['lap_duration'] for lap in laps if lap['lap_duration'] is not None}
+    if not lap_times:
+        st.warning("No timed laps for this driver")
+        return driver, None, None
+    lap_numbers = list(lap_times)
+    lap_number = st.selectbox("Lap", lap_numbers, index=min(default_lap, len(lap_numbers) - 1),
+                              key=f"{label}_lap")
+    return driver, lap_number, lap_times[lap_number]
+
+def main():
+    st.title("🔬 Telemetry Lap Comparison")
+    api_client = get_api_client()
+
+    with st.sidebar:
+        st.header("Session Selection")
+        year = st.selectbox("Season", [2023, 2024], index=0)
+        meetings = api_client.get_meetings(year)
+        meeting_name = st.selectbox("Grand Prix", [m['meeting_name'] for m in meetings])
+        meeting = next(m for m in meetings if m['meeting_name'] == meeting_name)
+        sessions = api_client.get_sessions(meeting['meeting_key'])
+        session_name = st.selectbox("Session", [s['session_name'] for s in sessions])
+        session = next(s for s in sessions if s['session_name'] == session_name)
+        drivers = api_client.get_drivers(session['session_key'])
+        if not drivers:
+            st.warning("No drivers for this session")
+            return
+
+        # Lap B defaults to a later lap of the same driver; pick a teammate to compare drivers
+        driver_a, lap_a, time_a = select_lap("Lap A", drivers, session['session_key'], api_client)
+        driver_b, lap_b, time_b = select_lap("Lap B", drivers, session['session_key'], api_client,
+                                             default_driver=drivers.index(driver_a), default_lap=10)
+
+    if lap_a is None or lap_b is None:
+        st.info("Select two timed laps to compare")
+        return
+
+    start = time.perf_counter()
+    with st.spinner("Loading telemetry..."):
+        comparison = compare_lap_pair(api_client, session['session_key'],
+                                      (driver_a['driver_number'], lap_a), (driver_b['driver_number'], lap_b))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if comparison is None:
+        st.warning("No telemetry available for one of these laps")
+        return
+
+    label_a = f"{driver_a['name_acronym']} L{lap_a}"
+    label_b = f"{driver_b['name_acronym']} L{lap_b}"
+    color_a = get_team_style(driver_a['team_name'])['primary']
+    # Teammates share a primary colour
+    style_b = get_team_style(driver_b['team_name'])
+    color_b = style_b['secondary'] if driver_b['team_name'] == driver_a['team_name'] else style_b['primary']
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(f"{label_a} time", f"{time_a:.3f}s")
+    with col2:
+        st.metric(f"{label_b} time", f"{time_b:.3f}s")
+    with col3:
+        st.metric("Delta (B - A)", f"{comparison['delta'].iloc[-1]:+.3f}s")
+
+    st.plotly_chart(build_lap_delta_figure(comparison, label_a, label_b, color_a, color_b), use_container_width=True)
+    st.caption(f"{len(comparison)} points on a common distance grid, compared in {elapsed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
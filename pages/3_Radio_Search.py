@@ -0,0 +1,57 @@
+import time
+
+import streamlit as st
+
+from utils.radio_index import RadioTranscriptIndex
+
+st.set_page_config(
+    page_title="F1 Radio Search",
+    page_icon="📻",
+    layout="wide"
+)
+
+@st.cache_resource
+def get_radio_index():
+    """Process-wide transcript index shared by every browser session"""
+    return RadioTranscriptIndex()
+
+def main():
+    st.title("📻 Team Radio Search")
+    radio_index = get_radio_index()
+    facets = radio_index.facets()
+
+    with st.sidebar:
+        st.header("Filters")
+        year = st.selectbox("Season", ["All"] + facets['years'])
+        team = st.selectbox("Team", ["All"] + facets['teams'])
+
+    st.caption(f"{facets['count']} transcribed messages indexed. "
+               'Use "double quotes" for phrases and OR between alternatives, e.g. "box box" OR "tyres are gone".')
+    query = st.text_input("Search transcripts")
+    if not query:
+        st.info("Transcribe radio messages on the main page to add them to the index, then search them here")
+        return
+
+    start = time.perf_counter()
+    results = radio_index.search(
+        query,
+        team_name=None if team == "All" else team,
+        year=None if year == "All" else year,
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    st.subheader(f"{len(results)} matches ({elapsed_ms:.1f} ms)")
+    for result in results:
+        lap = result['lap_number'] if result['lap_number'] is not None else "?"
+        title = (f"{result['year'] or ''} {result['meeting_name'] or ''} {result['session_name'] or ''} - "
+                 f"{result['driver_name'] or result['driver_number']} ({result['team_name']}) - Lap {lap}")
+        with st.expander(title, expanded=False):
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                st.audio(result['recording_url'])
+            with col2:
+                st.markdown(result['snippet'])
+                st.caption(result['date'] or "")
+
+if __name__ == "__main__":
+    main()
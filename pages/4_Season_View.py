@@ -0,0 +1,119 @@
+import time
+
+import streamlit as st
+
+from utils.api_client import get_api_client
+from utils.season_store import SeasonAggregateStore
+from utils.tire_model import get_tire_store
+
+st.set_page_config(
+    page_title="F1 Season View",
+    page_icon="📊",
+    layout="wide"
+)
+
+@st.cache_resource
+def get_season_store():
+    """Process-wide aggregate store shared by every browser session"""
+    return SeasonAggregateStore()
+
+def main():
+    import pandas as pd
+    import plotly.express as px
+
+    st.title("📊 Season View")
+    store = get_season_store()
+
+    with st.sidebar:
+        st.header("Season")
+        year = st.selectbox("Season", [2023, 2024], index=0)
+        st.caption(f"{store.ingested_count(year)} sessions aggregated")
+        if st.button("Update season aggregates"):
+            # Only finished sessions not yet in the store are fetched
+            status = st.empty()
+            api_client = get_api_client()
+            added = store.ingest_season(
+                api_client, year,
+                progress=lambda meeting, session: status.caption(
+                    f"{meeting['meeting_name']} - {session['session_name']}")
+            )
+            tire_added = get_tire_store().ingest_season(
+                api_client, year,
+                progress=lambda meeting, session: status.caption(
+                    f"Tire models: {meeting['meeting_name']} - {session['session_name']}")
+            )
+            status.caption(f"Added {added} new sessions, {tire_added} races to the tire models")
+
+    start = time.perf_counter()
+    pit_stops = store.pit_duration_by_team(year)
+    positions = store.positions_gained_by_driver(year)
+    circuits = store.circuits(year)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not circuits:
+        st.info("No sessions aggregated for this season yet. Use 'Update season aggregates' in the sidebar")
+        return
+    st.caption(f"Aggregates read in {elapsed_ms:.1f} ms")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("⏱️ Average Pit Stop Duration by Team")
+        st.caption("Race and sprint pit stops only")
+        if pit_stops:
+            pit_df = pd.DataFrame(pit_stops)
+            fig = px.bar(pit_df, x='team_name', y='avg_pit_duration', hover_data=['stops', 'fastest'],
+                         labels={'team_name': 'Team', 'avg_pit_duration': 'Average pit duration (s)'})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("No pit stop data available")
+    with col2:
+        st.subheader("📈 Positions Gained by Driver")
+        if positions:
+            pos_df = pd.DataFrame(positions)
+            fig = px.bar(pos_df, x='driver_name', y='positions_gained', color='team_name',
+                         hover_data=['races', 'best_gain'],
+                         labels={'driver_name': 'Driver', 'positions_gained': 'Positions gained'})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.warning("No race position data available")
+
+    st.subheader("🛞 Stint Length by Compound")
+    st.caption("Race and sprint stints only")
+    circuit = st.selectbox("Circuit", circuits)
+    stints = store.stint_length_by_compound(year, circuit)
+    if stints:
+        st.dataframe(pd.DataFrame(stints), hide_index=True, use_container_width=True)
+    else:
+        st.warning("No stint data available")
+
+    st.subheader("🏎️ Lap Pace by Team")
+    st.caption("Race and sprint laps only, pit laps excluded")
+    pace = store.lap_pace_by_team(year, circuit)
+    if pace:
+        st.dataframe(pd.DataFrame(pace), hide_index=True, use_container_width=True)
+    else:
+        st.warning("No lap data available")
+
+    st.subheader("📉 Tire Degradation")
+    tire_store = get_tire_store()
+    models = []
+    stint_laps = list(range(31))
+    curves = []
+    for compound in tire_store.compounds(year, circuit):
+        fit = tire_store.fit(year, circuit, compound)
+        if fit is None:
+            continue
+        models.append({'compound': compound, 'laps': fit['n'], 'rmse': fit['rmse'],
+                       'deg_per_lap': tire_store.degradation(year, circuit, compound)})
+        # A 30-lap stint on a new set starting on lap 20, at the reference track temperature
+        curve = tire_store.expected_curve(year, circuit, compound, stint_laps, [20 + a for a in stint_laps])
+        curves.append(pd.DataFrame({'compound': compound, 'tyre_age': stint_laps, 'lap_time': curve}))
+    if models:
+        fig = px.line(pd.concat(curves), x='tyre_age', y='lap_time', color='compound',
+                      labels={'tyre_age': 'Tyre age (laps)', 'lap_time': 'Expected lap time (s)'})
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(pd.DataFrame(models), hide_index=True, use_container_width=True)
+    else:
+        st.warning("No tire degradation model for this circuit yet")
+
+if __name__ == "__main__":
+    main()
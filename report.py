@@ -0,0 +1,179 @@
+"""Headless race reports: the dashboard's per-driver sections rendered to static HTML/JSON
+
+Session-wide data is fetched once, split per driver and rendered in parallel worker
+processes, so a full grid costs one fetch per endpoint and scales with cores.
+
+Usage:
+    python report.py --session-key 9158 --out reports
+    python report.py --session-key 9158 --drivers 1 11 --workers 4 --summary
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from utils.api_client import OpenF1Client
+from utils.scheduler import Priority, request_priority
+
+
+def fetch_session_bundle(api_client, session_key: int) -> dict:
+    """Fetch every endpoint the report needs once for the whole session"""
+    from utils.sections import weather_window
+
+    session = api_client.get_session_data(session_key)
+    return {
+        'session': session,
+        'drivers': api_client.get_drivers(session_key),
+        'positions': api_client.get_position_data(session_key),
+        'weather': api_client.get_session_weather(session_key, *weather_window(session)),
+        'laps': api_client.get_laps(session_key),
+        'radio_messages': api_client.get_team_radio(session_key),
+        'pit_data': api_client.get_pit_data(session_key),
+        'stints': api_client.get_stints(session_key),
+        'race_control': api_client.get_race_control(session_key),
+    }
+
+
+# Endpoints fetched once for the session and split into per-driver payloads
+DRIVER_ENDPOINTS = ('positions', 'laps', 'radio_messages', 'pit_data', 'stints')
+
+
+def split_by_driver(bundle: dict, driver_numbers: list = None) -> list:
+    """One payload per driver holding only that driver's rows plus the shared session data"""
+    per_driver = {endpoint: bundle[endpoint].group_by('driver_number') for endpoint in DRIVER_ENDPOINTS}
+
+    payloads = []
+    for driver in bundle['drivers']:
+        number = driver['driver_number']
+        if driver_numbers and number not in driver_numbers:
+            continue
+        payloads.append({
+            'session': bundle['session'],
+            'weather': bundle['weather'],
+            'race_control': bundle['race_control'],
+            'driver_details': driver,
+            # Empty slice of the session table when the driver has no rows
+            **{endpoint: per_driver[endpoint].get(number, bundle[endpoint][:0]) for endpoint in DRIVER_ENDPOINTS},
+        })
+    return payloads
+
+
+def _json_default(value):
+    # numpy scalars and timestamps coming out of the section frames
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def render_driver_report(payload: dict, out_dir: str, with_summary: bool = False) -> str:
+    """Build the dashboard sections for one driver and write <driver>.html and <driver>.json"""
+    from utils.race_control import build_track_status_periods
+    from utils.sections import (
+        build_lap_metrics, build_lap_section, build_lap_weather, build_position_section,
+        build_stint_table, build_summary_data, build_weather_section,
+    )
+
+    driver = payload['driver_details']
+    session = payload['session']
+    title = f"{driver['team_name']} - {driver['driver_number']} - {driver['full_name']}"
+    subtitle = f"{session.get('session_name', '')} - {session.get('circuit_short_name', '')} {session.get('year', '')}"
+
+    report = {
+        'driver_number': driver['driver_number'],
+        'full_name': driver['full_name'],
+        'team': driver['team_name'],
+        'session_key': session['session_key'],
+        'summary_data': build_summary_data(driver, driver['team_name'], session.get('session_name', ''),
+                                           payload['positions'], payload['laps'], payload['stints'],
+                                           payload['weather'], payload['radio_messages']),
+    }
+
+    track_status = build_track_status_periods(payload['race_control'], session.get('date_end'))
+    sections = [('Position Changes', build_position_section(payload['positions'], payload['laps'], track_status)),
+                ('Weather Conditions', build_weather_section(payload['weather']))]
+    lap_weather = build_lap_weather(payload['laps'], payload['weather'])
+    laps_result = build_lap_section(payload['laps'], payload['pit_data'], track_status, lap_weather)
+    sections.append(('Lap Time Performance', laps_result))
+
+    html = [f"<h2>{title}</h2>", f"<p>{subtitle}</p>"]
+    include_plotlyjs = 'cdn'
+    for heading, result in sections:
+        html.append(f"<h3>{heading}</h3>")
+        if result.warning:
+            html.append(f"<p><em>{result.warning}</em></p>")
+            continue
+        html.append(result.figure.to_html(full_html=False, include_plotlyjs=include_plotlyjs))
+        include_plotlyjs = False
+
+    if not laps_result.warning:
+        report['lap_metrics'] = build_lap_metrics(laps_result.frame)
+        report['lap_weather'] = lap_weather.to_dict('records')
+        if payload['stints']:
+            strategy_table = build_stint_table(payload['stints'], laps_result.frame)
+            report['tire_strategy'] = strategy_table.to_dict('records')
+            html.append("<h3>Tire Strategy</h3>")
+            html.append(strategy_table.to_html(index=False))
+
+    if with_summary:
+        from utils.analysis import RaceAnalyzer
+
+        report['race_summary'] = RaceAnalyzer().generate_race_summary(
+            driver, payload['radio_messages'], payload['laps'], payload['positions'],
+            payload['stints'], session, payload['pit_data']
+        )
+        html.append("<h3>Race Summary</h3>")
+        html.append(f"<p>{report['race_summary']}</p>")
+
+    base = os.path.join(out_dir, str(driver['driver_number']))
+    with open(base + '.html', 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{title}</title></head>"
+                f"<body>{''.join(html)}</body></html>")
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=_json_default)
+    return base
+
+
+def generate_reports(session_key: int, out_dir: str, driver_numbers: list = None,
+                     workers: int = None, with_summary: bool = False, api_client=None) -> list:
+    """Fetch one session and render every requested driver's report in parallel"""
+    api_client = api_client or OpenF1Client()
+    # Report generation is background work; interactive dashboard fetches go first
+    with request_priority(Priority.BULK):
+        bundle = fetch_session_bundle(api_client, session_key)
+    payloads = split_by_driver(bundle, driver_numbers)
+
+    session_dir = os.path.join(out_dir, str(session_key))
+    os.makedirs(session_dir, exist_ok=True)
+
+    written = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_driver_report, payload, session_dir, with_summary) for payload in payloads]
+        for future in as_completed(futures):
+            written.append(future.result())
+
+    index = [{'driver_number': p['driver_details']['driver_number'],
+              'full_name': p['driver_details']['full_name'],
+              'team': p['driver_details']['team_name']} for p in payloads]
+    with open(os.path.join(session_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump({'session': bundle['session'], 'drivers': index}, f, indent=2, default=_json_default)
+    return sorted(written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--session-key', type=int, required=True)
+    parser.add_argument('--drivers', type=int, nargs='*', help="driver numbers to render (default: full grid)")
+    parser.add_argument('--out', default='reports', help="output directory")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--summary', action='store_true', help="include the LLM race summary (needs OPENAI_API_KEY)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    for path in generate_reports(args.session_key, args.out, args.drivers, args.workers, args.summary):
+        print(f"wrote {path}.html / .json")
+
+
+if __name__ == "__main__":
+    main()
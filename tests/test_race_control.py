@@ -0,0 +1,44 @@
+import pandas as pd
+
+from utils.race_control import _classify, build_track_status_periods, tag_laps
+
+
+def _message(date: str, category: str = 'Flag', message: str = '', flag: str = None, scope: str = None,
+             sector: int = None) -> dict:
+    return {'date': f'2023-03-05T15:{date}+00:00', 'category': category, 'message': message,
+            'flag': flag, 'scope': scope, 'sector': sector}
+
+
+def test_classify():
+    assert _classify(_message('00:00', 'SafetyCar', 'SAFETY CAR DEPLOYED')) == ('SC', [])
+    assert _classify(_message('00:00', 'SafetyCar', 'VIRTUAL SAFETY CAR DEPLOYED')) == ('VSC', [])
+    assert _classify(_message('00:00', 'SafetyCar', 'VIRTUAL SAFETY CAR ENDING')) == (None, ['VSC'])
+    assert _classify(_message('00:00', 'SafetyCar', 'SAFETY CAR IN THIS LAP')) == (None, [])
+    assert _classify(_message('00:00', flag='RED', scope='Track')) == ('RED', [])
+    assert _classify(_message('00:00', flag='DOUBLE YELLOW', scope='Sector', sector=4)) == ('YELLOW', [])
+    assert _classify(_message('00:00', flag='GREEN', scope='Track')) == (None, ['SC', 'RED', 'YELLOW'])
+    assert _classify(_message('00:00', flag='CLEAR', scope='Sector', sector=4)) == (None, ['YELLOW'])
+    # Missing fields come back as None or NaN
+    assert _classify({'category': 'Flag', 'message': float('nan'), 'flag': None}) == (None, [])
+
+
+def test_tag_laps():
+    periods = build_track_status_periods([
+        _message('10:00', 'SafetyCar', 'SAFETY CAR DEPLOYED'),
+        _message('14:00', flag='GREEN', scope='Track'),
+        _message('20:00', flag='YELLOW', scope='Sector', sector=3),
+        _message('20:30', flag='CLEAR', scope='Sector', sector=3),
+    ], session_end='2023-03-05T16:30:00+00:00')
+    assert list(periods['status']) == ['SC', 'YELLOW']
+
+    laps = pd.DataFrame({
+        'lap_number': [1, 2, 3, 4, 5],
+        'date_start': ['2023-03-05T15:08:30+00:00', '2023-03-05T15:10:00+00:00', '2023-03-05T15:14:00+00:00',
+                       '2023-03-05T15:19:45+00:00', None],
+        'lap_duration': [90.0, 95.0, 90.0, 90.0, 90.0],
+    })
+    tagged = tag_laps(laps, periods)
+    # A lap ending exactly when a period starts, or starting as it ends, is green
+    assert list(tagged['track_status']) == ['GREEN', 'SC', 'GREEN', 'YELLOW', 'GREEN']
+    assert list(tagged['neutralized']) == [False, True, False, False, False]
+    assert list(tag_laps(laps, None)['track_status']) == ['GREEN'] * 5
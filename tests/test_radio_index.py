@@ -0,0 +1,23 @@
+from utils.radio_index import RadioTranscriptIndex, to_match_query
+
+
+def test_to_match_query():
+    assert to_match_query('box box') == '"box" "box"'
+    assert to_match_query('"tyres are gone" OR grip') == '"tyres are gone" OR "grip"'
+    # Punctuation and FTS5 operators in the input are never parsed as syntax;
+    # a bare word with punctuation inside becomes a phrase of its tokens
+    assert to_match_query('NEAR(plan* b) - "x') == '"near plan" "b" "x"'
+    assert to_match_query("'it's' P1") == '"it s" "p1"'
+    assert to_match_query('OR OR box OR OR') == '"box"'
+    assert to_match_query('  --- ') == ''
+
+
+def test_search_filters_by_metadata(tmp_path):
+    index = RadioTranscriptIndex(str(tmp_path / 'radio.sqlite3'))
+    index.add('a.mp3', "Tyres are gone, box this lap", {'team_name': 'Ferrari', 'year': 2023, 'driver_number': 16})
+    index.add('b.mp3', "Box box, tyres feel fine", {'team_name': 'Mercedes', 'year': 2023, 'driver_number': 44})
+    assert {r['recording_url'] for r in index.search('box')} == {'a.mp3', 'b.mp3'}
+    assert [r['recording_url'] for r in index.search('"tyres are gone"')] == ['a.mp3']
+    assert [r['recording_url'] for r in index.search('tyres', team_name='Mercedes')] == ['b.mp3']
+    assert index.search('"') == []
+    assert index.get('a.mp3') == "Tyres are gone, box this lap"
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+from utils.records import RecordTable, to_frame
+
+
+def _laps_with_nulls():
+    return [
+        {'session_key': 1, 'driver_number': 44, 'lap_number': 1, 'date_start': None,
+         'lap_duration': None, 'i1_speed': None, 'is_pit_out_lap': None},
+        {'session_key': 1, 'driver_number': 44, 'lap_number': 2, 'date_start': '2023-03-05T15:03:12.5+00:00',
+         'lap_duration': 95.25, 'i1_speed': 301, 'is_pit_out_lap': True},
+    ]
+
+
+def _stints_with_nulls():
+    return [
+        {'session_key': 1, 'driver_number': 44, 'stint_number': 1, 'compound': None, 'lap_start': 1, 'lap_end': 20},
+        {'session_key': 1, 'driver_number': 44, 'stint_number': 2, 'compound': 'HARD', 'lap_start': 21,
+         'lap_end': None},
+    ]
+
+
+def test_records_round_trip_nulls():
+    laps = RecordTable.from_records(_laps_with_nulls(), 'laps')
+    assert laps[0].get('date_start') is None
+    assert laps[0].get('lap_duration') is None
+    assert laps[0].get('i1_speed') is None
+    assert laps[0].get('is_pit_out_lap') is None
+    assert laps[1]['date_start'] == '2023-03-05T15:03:12.500000+00:00'
+    assert laps[1]['lap_duration'] == 95.25
+    assert laps[1]['i1_speed'] == 301
+    assert laps[1]['is_pit_out_lap'] is True
+
+    stints = RecordTable.from_records(_stints_with_nulls(), 'stints')
+    assert stints[0].get('compound') is None
+    assert stints[1]['compound'] == 'HARD'
+    assert stints[1].get('lap_end') is None
+
+
+def test_to_frame_with_nulls():
+    laps_df = to_frame(RecordTable.from_records(_laps_with_nulls(), 'laps'))
+    assert pd.isna(laps_df['date_start'][0]) and laps_df['date_start'][1] == pd.Timestamp('2023-03-05T15:03:12.5Z')
+    assert np.isnan(laps_df['lap_duration'][0])
+    assert str(laps_df['i1_speed'].dtype) == 'Int32' and pd.isna(laps_df['i1_speed'][0])
+    assert str(laps_df['is_pit_out_lap'].dtype) == 'boolean'
+    assert pd.isna(laps_df['is_pit_out_lap'][0]) and laps_df['is_pit_out_lap'][1]
+
+    stint_df = to_frame(RecordTable.from_records(_stints_with_nulls(), 'stints'))
+    assert stint_df['compound'].isna().tolist() == [True, False]
+    assert pd.isna(stint_df['lap_end'][1])
+
+
+def test_to_frame_without_nulls_shares_buffers():
+    table = RecordTable.from_records(_laps_with_nulls()[1:], 'laps')
+    frame = table.to_frame()
+    assert np.shares_memory(frame['lap_duration'].to_numpy(), table.column('lap_duration'))
+    assert frame['is_pit_out_lap'].dtype == np.bool_
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from utils.scheduler import Priority, RequestScheduler, parse_retry_after
+
+# Slow enough that no token is refilled while a test runs
+NO_REFILL = 1e-6
+
+
+def _acquire_in_thread(scheduler: RequestScheduler, priority: Priority) -> threading.Thread:
+    thread = threading.Thread(target=scheduler.acquire, args=(priority,), daemon=True)
+    thread.start()
+    return thread
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_bulk_leaves_the_reserve_to_interactive():
+    scheduler = RequestScheduler(rate=NO_REFILL, min_rate=NO_REFILL, burst=2, bulk_reserve=1)
+    scheduler.acquire(Priority.BULK)
+    waiting = _acquire_in_thread(scheduler, Priority.BULK)
+    waiting.join(0.1)
+    assert waiting.is_alive()
+
+    # The last token is still free for an interactive request, ahead of the queued bulk one
+    assert scheduler.acquire(Priority.INTERACTIVE) == Priority.INTERACTIVE
+    metrics = scheduler.metrics()
+    assert metrics['queue_depth'] == {'interactive': 0, 'bulk': 1}
+    assert metrics['max_queue_depth']['bulk'] == 1
+
+    scheduler.rate = scheduler.max_rate = 1000.0
+    with scheduler._cond:
+        scheduler._cond.notify_all()
+    waiting.join(1)
+    assert not waiting.is_alive()
+
+
+def test_throttling_pauses_the_host_and_halves_the_rate():
+    scheduler = RequestScheduler(rate=4.0)
+    scheduler.release(scheduler.acquire(Priority.INTERACTIVE), status_code=429, retry_after="2")
+    metrics = scheduler.metrics()
+    assert metrics['throttled'] == 1
+    assert metrics['rate'] == 2.0
+    assert 1.5 < metrics['backoff_remaining_s'] <= 2.0
+
+    scheduler._paused_until = 0.0
+    scheduler._tokens = 1.0
+    scheduler.release(scheduler.acquire(Priority.INTERACTIVE), status_code=200)
+    assert scheduler.metrics()['rate'] == pytest.approx(2.2)
+
+
+def test_interrupted_wait_leaves_the_queue():
+    scheduler = RequestScheduler(rate=NO_REFILL, min_rate=NO_REFILL, burst=1)
+    scheduler.acquire(Priority.INTERACTIVE)
+
+    def interrupted(timeout=None):
+        raise KeyboardInterrupt
+
+    scheduler._cond.wait = interrupted
+    with pytest.raises(KeyboardInterrupt):
+        scheduler.acquire(Priority.INTERACTIVE)
+    assert scheduler.metrics()['queue_depth']['interactive'] == 0
+
+    del scheduler._cond.wait
+    scheduler._tokens = 1.0
+    start = time.monotonic()
+    scheduler.acquire(Priority.INTERACTIVE)
+    assert time.monotonic() - start < 0.5
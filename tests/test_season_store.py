@@ -0,0 +1,37 @@
+from utils.season_store import SeasonAggregateStore, compute_session_aggregates
+
+DRIVERS = [{'driver_number': 44, 'team_name': 'Mercedes', 'full_name': 'Lewis Hamilton'}]
+PITS = [{'session_key': 1, 'driver_number': 44, 'lap_number': 20, 'pit_duration': 22.5}]
+
+
+def _session(name: str, session_key: int = 1) -> dict:
+    return {'session_key': session_key, 'session_name': name, 'year': 2023, 'meeting_key': 10,
+            'circuit_short_name': 'Sakhir', 'date_end': '2023-03-05T17:00:00+00:00'}
+
+
+class _SessionClient:
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def fetch(session_key):
+            self.calls.append(name)
+            return DRIVERS if name == 'get_drivers' else PITS if name == 'get_pit_data' else []
+        return fetch
+
+
+def test_only_race_pit_stops_are_aggregated():
+    assert compute_session_aggregates(_session('Practice 1'), DRIVERS, PITS, [], [], [])['pit_by_team'] == []
+    race = compute_session_aggregates(_session('Race'), DRIVERS, PITS, [], [], [])
+    assert race['pit_by_team'] == [('Mercedes', 1, 22.5, 22.5)]
+
+
+def test_non_race_sessions_are_recorded_without_fetching(tmp_path):
+    store, client = SeasonAggregateStore(str(tmp_path / 'season.sqlite3')), _SessionClient()
+    assert store.ingest_session(client, _session('Qualifying', 2))
+    assert client.calls == []
+    assert store.is_ingested(2)
+
+    assert store.ingest_session(client, _session('Race', 3))
+    assert 'get_laps' in client.calls
+    assert store.pit_duration_by_team(2023)[0]['stops'] == 1
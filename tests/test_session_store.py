@@ -0,0 +1,66 @@
+from utils.api_client import OpenF1Client, uncached
+from utils.session_store import SessionStore
+
+
+class _CountingClient(OpenF1Client):
+    def __init__(self):
+        self.fetches = 0
+
+    def _get_records(self, url: str, endpoint: str):
+        self.fetches += 1
+        return [{'url': url}]
+
+
+def test_uncached_fetches_skip_the_client_cache():
+    client = _CountingClient()
+    with uncached():
+        client.get_laps(1, 44)
+        client.get_laps(1, 44)
+    assert client.fetches == 2
+    client.get_laps(1, 44)
+    client.get_laps(1, 44)
+    assert client.fetches == 3
+
+
+def test_evicted_entries_are_refetched():
+    client = _CountingClient()
+    store = SessionStore(max_bytes=1)
+
+    def load(driver_number):
+        with uncached():
+            return {'laps': client.get_laps(1, driver_number)}
+
+    for driver_number in (1, 44):
+        store.acquire((1, driver_number), 'viewer', lambda: load(driver_number))
+        store.release((1, driver_number), 'viewer')
+    assert store.stats()['evictions'] == 2
+    store.acquire((1, 1), 'viewer', lambda: load(1))
+    assert client.fetches == 3
+
+
+def test_leased_entries_are_not_evicted():
+    store = SessionStore(max_bytes=1)
+    first = store.acquire((1, 1), 'a', lambda: {'laps': list(range(100))})
+    store.acquire((1, 44), 'b', lambda: {'laps': list(range(100))})
+    assert store.acquire((1, 1), 'a', lambda: {}) is first
+    assert store.stats()['evictions'] == 0
+
+
+def test_versioned_sections_are_rebuilt_in_place():
+    store = SessionStore()
+    entry = store.acquire((1, 1), 'viewer', lambda: {'laps': []})
+    base = entry.nbytes
+    builds = []
+
+    def build(size):
+        builds.append(size)
+        return list(range(size))
+
+    store.section(entry, 'degradation', build, 10, version=1)
+    store.section(entry, 'degradation', build, 10, version=1)
+    grown = entry.nbytes
+    store.section(entry, 'degradation', build, 1000, version=2)
+    store.section(entry, 'degradation', build, 1000, version=2)
+    assert builds == [10, 1000]
+    assert len(entry.sections) == 1
+    assert entry.nbytes - base == entry.sections['degradation'][2] > grown - base
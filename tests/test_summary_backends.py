@@ -0,0 +1,21 @@
+from utils.summary_backends import LocalBackend
+
+METRICS = {
+    'driver_name': 'Lewis Hamilton', 'final_position': 3, 'start_position': 5, 'position_changes': 4,
+    'lap_count': 57, 'fastest_lap': 93.608, 'average_lap': 96.25, 'radio_count': 12,
+    'tire_strategy': [{'compound': 'MEDIUM', 'laps': '1-20', 'fastest': '94.100s'}],
+}
+
+
+def test_race_summary_template():
+    summary = LocalBackend().race_summary("", METRICS)
+    assert summary.startswith("Lewis Hamilton finished the session in P3 after running P5 at the start")
+    assert "(pit and neutralized laps excluded) was 96.250s" in summary
+    assert "MEDIUM for laps 1-20 (fastest 94.100s)" in summary
+
+
+def test_race_summary_without_positions():
+    metrics = {**METRICS, 'final_position': "N/A", 'start_position': "N/A", 'position_changes': 0}
+    summary = LocalBackend().race_summary("", metrics)
+    assert "N/A" not in summary
+    assert summary.startswith("Lewis Hamilton completed 57 laps in the session.")
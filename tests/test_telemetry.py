@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from utils.records import RecordTable
+from utils.telemetry import align_laps, lap_trace
+
+T0 = datetime(2023, 3, 5, 15, 0, tzinfo=timezone.utc)
+LAP_LENGTH_M = 5000.0
+PERIOD_S = 0.27
+
+
+def _car_data(laps: list, phase_s: float) -> RecordTable:
+    """Constant-speed samples every PERIOD_S, `phase_s` out of step with the first lap start
+
+    Sampling starts before the first lap and runs on past the last one.
+    """
+    records = []
+    t, lap_start = -phase_s, 0.0
+    for i, duration in enumerate(laps):
+        speed = LAP_LENGTH_M / duration * 3.6
+        lap_end = lap_start + duration + (1.0 if i == len(laps) - 1 else 0.0)
+        while t < lap_end:
+            records.append({'session_key': 1, 'meeting_key': 1, 'driver_number': 1,
+                            'date': (T0 + timedelta(seconds=t)).isoformat(), 'speed': speed,
+                            'throttle': 100, 'brake': 0, 'n_gear': 8, 'rpm': 11000, 'drs': 0})
+            t += PERIOD_S
+        lap_start += duration
+    return RecordTable.from_records(records, 'car_data')
+
+
+def _window(offset_s: float, duration: float) -> tuple:
+    start = np.datetime64(T0.replace(tzinfo=None) + timedelta(seconds=offset_s), 'ns')
+    return start, start + np.timedelta64(int(round(duration * 1e9)), 'ns')
+
+
+@pytest.mark.parametrize('phase_s', [0.0, 0.2])
+def test_lap_trace_starts_and_ends_on_the_line(phase_s):
+    car_data = _car_data([90.0], phase_s)
+    trace = lap_trace(car_data, *_window(0.0, 90.0))
+    assert trace[0, 0] == 0.0 and trace[0, 1] == 0.0
+    assert trace[-1, 0] == pytest.approx(90.0)
+    assert np.all(np.diff(trace[:, 0]) > 0)
+
+
+def test_delta_with_out_of_phase_samples():
+    # Integer speeds: the slower lap is not exactly LAP_LENGTH_M, as in OpenF1 data
+    car_data = _car_data([90.0, 90.105], 0.2)
+    trace_a = lap_trace(car_data, *_window(0.0, 90.0))
+    trace_b = lap_trace(car_data, *_window(90.0, 90.105))
+    comparison = align_laps(trace_a, trace_b)
+    assert comparison['time_a'].iloc[0] == 0.0
+    assert comparison['delta'].iloc[-1] == pytest.approx(0.105, abs=1e-3)
@@ -0,0 +1,55 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from utils import track_map
+from utils.track_map import LocationStore
+
+FINISHED = {'session_key': 1, 'date_end': '2023-03-05T17:00:00+00:00'}
+
+
+class _LocationClient:
+    def __init__(self, samples: int):
+        self.samples = samples
+        self.calls = 0
+
+    def get_location(self, session_key: int, driver_number: int) -> list:
+        self.calls += 1
+        return [{'date': f'2023-03-05T15:00:{i:02d}+00:00', 'x': i, 'y': -i, 'z': 0} for i in range(self.samples)]
+
+
+def test_finished_session_is_persisted_once(tmp_path):
+    store, client = LocationStore(str(tmp_path)), _LocationClient(10)
+    assert store.ensure(client, FINISHED, 44) == 10
+    assert store.ensure(client, FINISHED, 44) == 10
+    assert client.calls == 1
+    assert store.samples(1, 44)[-1, 0] == 9.0
+
+
+def test_empty_response_is_not_persisted(tmp_path, monkeypatch):
+    monkeypatch.setattr(track_map, 'LIVE_REFRESH_S', 0.0)
+    store, client = LocationStore(str(tmp_path)), _LocationClient(0)
+    assert store.ensure(client, FINISHED, 44) == 0
+    assert not store.has(1, 44)
+    client.samples = 5
+    assert store.ensure(client, FINISHED, 44) == 5
+    assert store.has(1, 44)
+
+
+def test_recently_ended_session_stays_in_memory(tmp_path):
+    session = {'session_key': 2, 'date_end': (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()}
+    store = LocationStore(str(tmp_path))
+    assert store.ensure(_LocationClient(10), session, 44) == 10
+    assert not store.has(2, 44)
+    assert len(store.samples(2, 44)) == 10
+    assert os.listdir(tmp_path) == []
+
+
+def test_offsets_follow_the_data_file(tmp_path):
+    store = LocationStore(str(tmp_path))
+    # Rows left behind by an index write that never happened
+    with open(tmp_path / '1.f32', 'wb') as f:
+        f.write(b'\0' * track_map.ROW_BYTES * 3)
+    store.ensure(_LocationClient(10), FINISHED, 44)
+    store.ensure(_LocationClient(4), FINISHED, 16)
+    assert store.samples(1, 44)[0, 0] == 0.0 and len(store.samples(1, 44)) == 10
+    assert len(store.samples(1, 16)) == 4
@@ -1,31 +1,70 @@
-import pandas as pd
 from datetime import datetime
 from utils.gpt_helper import GPTHelper
 
 class RaceAnalyzer:
-    def __init__(self):
-        self.gpt = GPTHelper()
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._gpt = None
+
+    @property
+    def gpt(self) -> GPTHelper:
+        """GPT helper, created on first use"""
+        if self._gpt is None:
+            self._gpt = GPTHelper(self._backend)
+        return self._gpt
     
     def generate_race_summary(self, driver_data: dict, radio_messages: list, 
                             laps: list, positions: list, stints: list, 
-                            selected_session: dict) -> str:
+                            selected_session: dict, pit_data: list = None) -> str:
         """Generate statistical race summary using measurable API data"""
+        metrics = self.compute_race_metrics(driver_data, radio_messages, laps, positions, stints, pit_data)
+        prompt = self._build_summary_prompt(metrics, selected_session)
+        return self.gpt.generate_race_summary(prompt, metrics)
+
+    def stream_race_summary(self, driver_data: dict, radio_messages: list,
+                            laps: list, positions: list, stints: list,
+                            selected_session: dict, pit_data: list = None):
+        """Same as generate_race_summary, but yields the summary text as it is generated"""
+        metrics = self.compute_race_metrics(driver_data, radio_messages, laps, positions, stints, pit_data)
+        prompt = self._build_summary_prompt(metrics, selected_session)
+        return self.gpt.stream_race_summary(prompt, metrics)
+
+    def compute_race_metrics(self, driver_data: dict, radio_messages: list, laps: list,
+                             positions: list, stints: list, pit_data: list = None,
+                             track_status=None) -> dict:
+        """Measurable race metrics shared by the LLM prompt and the offline summary template
+
+        Pit laps, and with `track_status` periods (see utils.race_control) safety
+        car, VSC and red flag laps, are left out of the fastest and average lap,
+        the speed and every per-stint statistic.
+        """
         # Prepare data
         radio_count = len(radio_messages)
         lap_count = len(laps)
         position_changes = self._calculate_position_changes(positions)
-        fastest_lap = min([lap['lap_duration'] for lap in laps if isinstance(lap.get('lap_duration'), (int, float))], default=0)
         final_position = positions[-1]['position'] if positions else "N/A"
         start_position = positions[0]['position'] if positions else "N/A"
 
-        # Calculate tire strategy metrics
+        # Racing laps: no pit laps and no safety car, VSC or red flag laps
+        pit_laps = [pit['lap_number'] for pit in (pit_data or [])]
+        racing_laps = [lap for lap in laps if lap.get('lap_number') not in pit_laps]
+        if track_status is not None and not track_status.empty and laps:
+            from utils.race_control import tag_laps
+            from utils.records import to_frame
+
+            tagged = tag_laps(to_frame(laps), track_status)
+            neutralized = set(tagged.loc[tagged['neutralized'], 'lap_number'])
+            racing_laps = [lap for lap in racing_laps if lap.get('lap_number') not in neutralized]
+
+        # Calculate tire strategy metrics over racing laps only
         tire_strategy = []
         if stints:
             for stint in stints:
-                stint_laps = [lap for lap in laps 
+                stint_laps = [lap for lap in racing_laps
                             if stint['lap_start'] <= lap['lap_number'] <= stint['lap_end']]
                 avg_speed = sum(lap.get('speed', 0) for lap in stint_laps) / len(stint_laps) if stint_laps else 0
-                fastest_lap_stint = min([lap.get('lap_duration', 0) for lap in stint_laps], default=0)
+                stint_times = [lap['lap_duration'] for lap in stint_laps if isinstance(lap.get('lap_duration'), (int, float))]
+                fastest_lap_stint = min(stint_times, default=0)
                 tire_strategy.append({
                     'compound': stint['compound'],
                     'laps': f"{stint['lap_start']}-{stint['lap_end']}",
@@ -33,21 +72,36 @@ class RaceAnalyzer:
                     'fastest': f"{fastest_lap_stint:.3f}s"
                 })
 
-        # Calculate overall speed (excluding pit laps)
-        pit_laps = [pit['lap_number'] for pit in (st.session_state.fetched_data.get('pit_data', []))]
-        racing_laps = [lap for lap in laps if lap.get('lap_number') not in pit_laps]
+        # Overall speed and lap time
         avg_speed = sum(lap.get('speed', 0) for lap in racing_laps) / len(racing_laps) if racing_laps else 0
+        racing_times = [lap['lap_duration'] for lap in racing_laps if isinstance(lap.get('lap_duration'), (int, float))]
+        average_lap = sum(racing_times) / len(racing_times) if racing_times else 0
+        fastest_lap = min(racing_times, default=0)
 
-        # Prepare prompt
+        return {
+            'driver_name': driver_data['full_name'],
+            'radio_count': radio_count,
+            'lap_count': lap_count,
+            'position_changes': position_changes,
+            'fastest_lap': fastest_lap,
+            'average_lap': average_lap,
+            'final_position': final_position,
+            'start_position': start_position,
+            'avg_speed': avg_speed,
+            'tire_strategy': tire_strategy,
+        }
+
+    def _build_summary_prompt(self, metrics: dict, selected_session: dict) -> str:
+        tire_strategy = metrics['tire_strategy']
         prompt = f"""
-        Generate a concise 3-paragraph statistical race summary for {driver_data['full_name']} using only measurable performance data.
+        Generate a concise 3-paragraph statistical race summary for {metrics['driver_name']} using only measurable performance data.
 
         Key Metrics:
-        - Position: {start_position} → {final_position} ({position_changes} position changes)
-        - Laps: {lap_count}/{selected_session.get('total_laps', 'N/A')} completed
-        - Fastest lap: {fastest_lap:.3f}s (vs session best: {selected_session.get('best_lap_time', 'N/A')})
-        - Average speed: {avg_speed:.1f} km/h (racing laps only)
-        - Radio messages: {radio_count}
+        - Position: {metrics['start_position']} → {metrics['final_position']} ({metrics['position_changes']} position changes)
+        - Laps: {metrics['lap_count']}/{selected_session.get('total_laps', 'N/A')} completed
+        - Fastest lap: {metrics['fastest_lap']:.3f}s (vs session best: {selected_session.get('best_lap_time', 'N/A')})
+        - Average speed: {metrics['avg_speed']:.1f} km/h (racing laps only)
+        - Radio messages: {metrics['radio_count']}
 
         Tire Performance:
         {chr(10).join(
@@ -62,8 +116,7 @@ class RaceAnalyzer:
 
         Include only verifiable data from the API. No subjective assessments.
         """
-        
-        return self.gpt.generate_race_summary(prompt)
+        return prompt
     
     def _calculate_position_changes(self, positions: list) -> int:
         if not positions:
@@ -1,101 +1,214 @@
+import contextvars
+import threading
 import requests
-import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from functools import lru_cache
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING
+from urllib.parse import quote, urlsplit
+from utils.scheduler import get_scheduler
+
+if TYPE_CHECKING:
+    from utils.records import RecordTable
+
+_use_cache = contextvars.ContextVar('use_response_cache', default=True)
+
+@contextmanager
+def uncached():
+    """Fetch inside the block without reading or filling the client's response caches
+
+    For callers that hold on to the results themselves (the session store), so
+    each response is kept, counted and evicted in exactly one place.
+    """
+    token = _use_cache.set(False)
+    try:
+        yield
+    finally:
+        _use_cache.reset(token)
+
+def memoized(maxsize: int = 128):
+    """lru_cache for a client method, skipped inside an uncached() block"""
+    def decorate(method):
+        cached = lru_cache(maxsize=maxsize)(method)
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not _use_cache.get():
+                return method(self, *args, **kwargs)
+            return cached(self, *args, **kwargs)
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+    return decorate
 
 class OpenF1Client:
     BASE_URL = "https://api.openf1.org/v1"
+    # Attempts per request when the host answers 429 Too Many Requests
+    MAX_ATTEMPTS = 4
+
+    def _send(self, url: str) -> requests.Response:
+        """GET through the host's shared scheduler, retrying after 429 backoffs
+
+        The request's priority comes from the surrounding
+        utils.scheduler.request_priority block (interactive by default).
+        """
+        scheduler = get_scheduler(urlsplit(url).netloc)
+        for _ in range(self.MAX_ATTEMPTS):
+            with scheduler.slot() as report:
+                response = requests.get(url, timeout=30)
+                report(response)
+            if response.status_code != 429:
+                break
+        response.raise_for_status()
+        return response
+
+    def _get(self, url: str):
+        return self._send(url).json()
+
+    def _get_records(self, url: str, endpoint: str):
+        """GET a dense endpoint and validate it once into a compact utils.records.RecordTable"""
+        from utils.records import RecordTable
+        return RecordTable.from_records(self._get(url), endpoint)
+
+    def download(self, url: str) -> bytes:
+        """Fetch a binary asset (e.g. a team radio recording) under the same scheduling"""
+        return self._send(url).content
+
+    def scheduler_metrics(self) -> dict:
+        """Queue depth, waits and backoff state of the OpenF1 host scheduler"""
+        return get_scheduler(urlsplit(self.BASE_URL).netloc).metrics()
     
-    @lru_cache(maxsize=128)
+    @memoized(maxsize=128)
     def get_meetings(self, year: int) -> list:
         url = f"{self.BASE_URL}/meetings?year={year}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url)
     
-    @lru_cache(maxsize=128)
+    @memoized(maxsize=128)
     def get_sessions(self, meeting_key: int) -> list:
         url = f"{self.BASE_URL}/sessions?meeting_key={meeting_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url)
     
-    @lru_cache(maxsize=128)
+    @memoized(maxsize=128)
     def get_drivers(self, session_key: int) -> list:
         url = f"{self.BASE_URL}/drivers?session_key={session_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url)
     
-    @lru_cache(maxsize=128)
-    def get_team_radio(self, session_key: int, driver_number: int = None) -> list:
+    @memoized(maxsize=128)
+    def get_team_radio(self, session_key: int, driver_number: int = None) -> 'RecordTable':
         url = f"{self.BASE_URL}/team_radio?session_key={session_key}"
         if driver_number:
             url += f"&driver_number={driver_number}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_records(url, 'team_radio')
     
-    @lru_cache(maxsize=128)
-    def get_all_team_radio(self, session_key: int) -> list:
+    @memoized(maxsize=128)
+    def get_all_team_radio(self, session_key: int) -> 'RecordTable':
         """Get all radio messages for a session more reliably"""
         url = f"{self.BASE_URL}/team_radio?session_key={session_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_records(url, 'team_radio')
     
-    @lru_cache(maxsize=128)
+    @memoized(maxsize=128)
     def get_car_data_at_time(self, session_key: int, driver_number: int, timestamp: str) -> list:
         url = f"{self.BASE_URL}/car_data?session_key={session_key}&driver_number={driver_number}&date={timestamp}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get(url)
     
-    @lru_cache(maxsize=128)
-    def get_laps(self, session_key: int, driver_number: int) -> list:
-        url = f"{self.BASE_URL}/laps?session_key={session_key}&driver_number={driver_number}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+    @memoized(maxsize=32)
+    def get_car_data(self, session_key: int, driver_number: int, date_start: str = None,
+                     date_end: str = None) -> 'RecordTable':
+        """Get ~3.7 Hz speed, throttle, brake, gear, RPM and DRS samples for a session/driver
+
+        Without a window this is the driver's whole session (tens of thousands of
+        rows, kept compact as a RecordTable); lap windows are then local slices.
+        """
+        url = f"{self.BASE_URL}/car_data?session_key={session_key}&driver_number={driver_number}"
+        if date_start:
+            url += f"&date>={quote(str(date_start), safe=':')}"
+        if date_end:
+            url += f"&date<={quote(str(date_end), safe=':')}"
+        return self._get_records(url, 'car_data')
+
+    @memoized(maxsize=128)
+    def get_laps(self, session_key: int, driver_number: int = None) -> 'RecordTable':
+        url = f"{self.BASE_URL}/laps?session_key={session_key}"
+        if driver_number:
+            url += f"&driver_number={driver_number}"
+        return self._get_records(url, 'laps')
     
-    @lru_cache(maxsize=128)
+    @memoized(maxsize=128)
     def get_session_data(self, session_key: int) -> dict:
         """Get comprehensive session data for a driver"""
         url = f"{self.BASE_URL}/sessions?session_key={session_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()[0] if response.json() else None
+        sessions = self._get(url)
+        return sessions[0] if sessions else None
     
-    @lru_cache(maxsize=128)
-    def get_position_data(self, session_key: int, driver_number: int) -> list:
+    @memoized(maxsize=128)
+    def get_position_data(self, session_key: int, driver_number: int = None) -> 'RecordTable':
         """Get position changes throughout session"""
-        url = f"{self.BASE_URL}/position?session_key={session_key}&driver_number={driver_number}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        url = f"{self.BASE_URL}/position?session_key={session_key}"
+        if driver_number:
+            url += f"&driver_number={driver_number}"
+        return self._get_records(url, 'position')
     
-    @lru_cache(maxsize=128)
-    def get_stints(self, session_key: int, driver_number: int = None) -> list:
+    @memoized(maxsize=128)
+    def get_stints(self, session_key: int, driver_number: int = None) -> 'RecordTable':
         url = f"{self.BASE_URL}/stints?session_key={session_key}"
         if driver_number:
             url += f"&driver_number={driver_number}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_records(url, 'stints')
 
-    @lru_cache(maxsize=128)
-    def get_weather(self, meeting_key: int) -> list:
+    @memoized(maxsize=128)
+    def get_weather(self, meeting_key: int) -> 'RecordTable':
+        """Get weather for a whole meeting (every practice, qualifying and race session)"""
         url = f"{self.BASE_URL}/weather?meeting_key={meeting_key}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_records(url, 'weather')
+
+    @memoized(maxsize=128)
+    def get_session_weather(self, session_key: int, date_start: str = None, date_end: str = None) -> 'RecordTable':
+        """Get weather for one session, optionally only samples between date_start and date_end
+
+        The window is filtered server side, so only the rows that are used are transferred.
+        """
+        url = f"{self.BASE_URL}/weather?session_key={session_key}"
+        if date_start:
+            url += f"&date>={quote(str(date_start), safe=':')}"
+        if date_end:
+            url += f"&date<={quote(str(date_end), safe=':')}"
+        return self._get_records(url, 'weather')
     
-    @lru_cache(maxsize=128)
-    def get_pit_data(self, session_key: int, driver_number: int = None) -> list:
+    @memoized(maxsize=128)
+    def get_pit_data(self, session_key: int, driver_number: int = None) -> 'RecordTable':
         """Get pit stop data for a session/driver"""
         url = f"{self.BASE_URL}/pit?session_key={session_key}"
         if driver_number:
             url += f"&driver_number={driver_number}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
\ No newline at end of file
+        return self._get_records(url, 'pit')
+
+    @memoized(maxsize=128)
+    def get_race_control(self, session_key: int) -> list:
+        """Get race control messages (flags, safety car, VSC) for a session"""
+        url = f"{self.BASE_URL}/race_control?session_key={session_key}"
+        return self._get(url)
+
+    def get_location(self, session_key: int, driver_number: int) -> list:
+        """Get x/y/z car location samples for a session/driver
+
+        Not memoized here: the payload is tens of thousands of rows, so callers
+        persist it compactly (see utils.track_map.LocationStore) instead.
+        """
+        url = f"{self.BASE_URL}/location?session_key={session_key}&driver_number={driver_number}"
+        return self._get(url)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_api_client() -> OpenF1Client:
+    """The process-wide client shared by every page and browser session
+
+    Its response caches are keyed on the instance, so one client per process
+    means every page hits the same caches.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenF1Client()
+        return _client
@@ -1,47 +1,46 @@
-import openai
-import os
-from tenacity import retry, stop_after_attempt, wait_exponential
+import time
+from utils.summary_backends import (
+    RACE_SUMMARY_SYSTEM_PROMPT, SUMMARY_SYSTEM_PROMPT, SummaryBackend, default_backend, get_openai,
+)
 
 class GPTHelper:
-    def __init__(self):
-        openai.api_key = os.getenv("OPENAI_API_KEY")
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def summarize_text(self, text: str, max_tokens: int = 150) -> str:
+    def __init__(self, backend: SummaryBackend = None):
+        # Remote OpenAI model or the offline LocalBackend, see utils.summary_backends
+        self.backend = backend or default_backend()
+        # Timing of the most recent streamed response:
+        # {'ttft_ms': time to first token, 'total_ms': full response, 'chunks': content chunks received}
+        self.last_timing = None
+
+    def summarize_text(self, text: str, max_tokens: int = 150, system_prompt: str = SUMMARY_SYSTEM_PROMPT) -> str:
         """General purpose text summarization"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes text concisely."},
-                {"role": "user", "content": f"Summarize this text: {text}"}
-            ],
-            max_tokens=max_tokens
-        )
-        return response.choices[0].message.content
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+        return self.backend.summarize_text(text, max_tokens, system_prompt)
+
     def analyze_sentiment(self, text: str) -> str:
         """Analyze sentiment of text"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Analyze the sentiment of this text. Respond with only one word: Positive, Neutral, or Negative."},
-                {"role": "user", "content": f"Text: {text}"}
-            ],
-            max_tokens=10
-        )
-        return response.choices[0].message.content
-    
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    def generate_race_summary(self, prompt: str) -> str:
+        return self.backend.analyze_sentiment(text)
+
+    def generate_race_summary(self, prompt: str, metrics: dict = None) -> str:
         """Generate a comprehensive race summary"""
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a Formula 1 analyst. Generate a comprehensive race summary based on the provided data."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.7
-        )
-        return response.choices[0].message.content
\ No newline at end of file
+        return self.backend.race_summary(prompt, metrics)
+
+    def stream_race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                            system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT):
+        """Generate a race summary, yielding text chunks as the backend produces them"""
+        return self._timed_stream(self.backend.stream_race_summary(prompt, metrics, max_tokens, system_prompt))
+
+    def _timed_stream(self, chunks):
+        """Pass chunks through, recording time-to-first-token and total latency in last_timing"""
+        start = time.perf_counter()
+        first_token = None
+        count = 0
+        for content in chunks:
+            if first_token is None:
+                first_token = time.perf_counter()
+            count += 1
+            yield content
+        end = time.perf_counter()
+        self.last_timing = {
+            'ttft_ms': ((first_token or end) - start) * 1000,
+            'total_ms': (end - start) * 1000,
+            'chunks': count,
+        }
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from utils.sections import parse_f1_datetimes
+
+# Track status in increasing severity; the most severe status overlapping a lap wins
+TRACK_STATUSES = ['GREEN', 'YELLOW', 'VSC', 'SC', 'RED']
+NEUTRALIZED = ['VSC', 'SC', 'RED']
+
+# Shading colour per status on lap-number charts
+STATUS_COLORS = {
+    'YELLOW': 'rgba(255, 215, 0, 0.12)',
+    'VSC': 'rgba(255, 165, 0, 0.18)',
+    'SC': 'rgba(255, 140, 0, 0.28)',
+    'RED': 'rgba(255, 0, 0, 0.25)',
+}
+
+
+def _upper(value) -> str:
+    # Missing fields come back as None or NaN once the messages go through pandas
+    return value.upper() if isinstance(value, str) else ''
+
+
+def _classify(message: dict):
+    """Map one race control message to (status it opens, statuses it closes)"""
+    text = _upper(message.get('message'))
+    flag = _upper(message.get('flag'))
+    scope = _upper(message.get('scope'))
+
+    if message.get('category') == 'SafetyCar':
+        if 'VIRTUAL' in text:
+            if 'ENDING' in text:
+                return None, ['VSC']
+            if 'DEPLOYED' in text:
+                return 'VSC', []
+        elif 'DEPLOYED' in text:
+            return 'SC', []
+        return None, []
+
+    if flag == 'RED':
+        return 'RED', []
+    if flag in ('YELLOW', 'DOUBLE YELLOW') and scope == 'SECTOR':
+        return 'YELLOW', []
+    if flag in ('GREEN', 'CLEAR'):
+        # A track-wide green restarts the race; a sector clear only ends that sector's yellow
+        if scope == 'TRACK':
+            return None, ['SC', 'RED', 'YELLOW']
+        return None, ['YELLOW']
+    return None, []
+
+
+def build_track_status_periods(race_control: list, session_end=None) -> pd.DataFrame:
+    """Interval index of yellow, VSC, SC and red flag periods for one session
+
+    Returns a frame indexed by a left-closed pd.IntervalIndex of timestamps with
+    `status`, `sector` and `message` columns. Periods still open at the end of
+    the messages run until `session_end` (or indefinitely).
+    """
+    columns = ['status', 'sector', 'message']
+    if not race_control:
+        empty = pd.IntervalIndex.from_arrays(pd.DatetimeIndex([], tz='UTC'), pd.DatetimeIndex([], tz='UTC'), closed='left')
+        return pd.DataFrame(columns=columns, index=empty)
+
+    rc_df = pd.DataFrame(race_control)
+    rc_df['date'] = parse_f1_datetimes(rc_df['date'])
+    rc_df = rc_df.dropna(subset=['date']).sort_values('date', kind='stable')
+
+    # Race control logs a few hundred messages per race, far fewer than laps, so a
+    # single pass over them is cheap; all per-lap work happens in tag_laps
+    open_periods, rows = {}, []
+    for message in rc_df.to_dict('records'):
+        opens, closes = _classify(message)
+        sector = message.get('sector') if pd.notna(message.get('sector')) else None
+        for status in closes:
+            for key in [k for k in open_periods if k[0] == status and (status != 'YELLOW' or sector is None or k[1] == sector)]:
+                start, text = open_periods.pop(key)
+                rows.append((start, message['date'], status, key[1], text))
+        if opens and (opens, sector) not in open_periods:
+            open_periods[(opens, sector)] = (message['date'], message.get('message'))
+
+    end = parse_f1_datetimes([session_end]).iloc[0] if session_end else pd.Timestamp.max.tz_localize('UTC')
+    for (status, sector), (start, text) in open_periods.items():
+        rows.append((start, max(start, end), status, sector, text))
+
+    periods = pd.DataFrame(rows, columns=['start', 'end', *columns]).sort_values('start', kind='stable')
+    periods.index = pd.IntervalIndex.from_arrays(periods.pop('start'), periods.pop('end'), closed='left')
+    return periods
+
+
+def tag_laps(laps_df: pd.DataFrame, periods: pd.DataFrame) -> pd.DataFrame:
+    """Add `track_status` and `neutralized` columns to laps of any number of drivers
+
+    A lap takes the most severe status of every period overlapping its
+    [date_start, date_start + lap_duration) window, computed as one
+    laps x periods overlap matrix.
+    """
+    laps_df = laps_df.copy()
+    laps_df['track_status'] = 'GREEN'
+    if periods is None or periods.empty or 'date_start' not in laps_df:
+        laps_df['neutralized'] = False
+        return laps_df
+
+    lap_start = parse_f1_datetimes(laps_df['date_start']).to_numpy(dtype='datetime64[ns]')
+    duration = pd.to_timedelta(pd.to_numeric(laps_df['lap_duration'], errors='coerce').fillna(0), unit='s')
+    lap_end = lap_start + duration.to_numpy(dtype='timedelta64[ns]')
+
+    period_start = periods.index.left.to_numpy(dtype='datetime64[ns]')
+    period_end = periods.index.right.to_numpy(dtype='datetime64[ns]')
+    severity = periods['status'].map(TRACK_STATUSES.index).to_numpy()
+
+    overlaps = (period_start[None, :] < lap_end[:, None]) & (period_end[None, :] > lap_start[:, None])
+    lap_severity = np.where(overlaps, severity[None, :], 0).max(axis=1)
+    # Laps without a start time can't be placed on the timeline and stay green
+    lap_severity[np.isnat(lap_start)] = 0
+
+    laps_df['track_status'] = np.asarray(TRACK_STATUSES, dtype=object)[lap_severity]
+    laps_df['neutralized'] = laps_df['track_status'].isin(NEUTRALIZED)
+    return laps_df
+
+
+def status_spans(laps_df: pd.DataFrame) -> list:
+    """Contiguous lap ranges per non-green status, as (first_lap, last_lap, status)"""
+    if 'track_status' not in laps_df:
+        return []
+    flagged = laps_df.loc[laps_df['track_status'] != 'GREEN', ['lap_number', 'track_status']]
+    flagged = flagged.drop_duplicates().sort_values('lap_number')
+    if flagged.empty:
+        return []
+    # A new span starts whenever the status changes or a lap number is skipped
+    breaks = (flagged['track_status'] != flagged['track_status'].shift()) | (flagged['lap_number'].diff() != 1)
+    spans = flagged.groupby(breaks.cumsum()).agg(first=('lap_number', 'min'), last=('lap_number', 'max'),
+                                                 status=('track_status', 'first'))
+    return list(spans.itertuples(index=False, name=None))
+
+
+def add_status_shading(fig, spans: list):
+    """Shade neutralized and yellow flag laps on a chart with lap number on the x axis"""
+    for first, last, status in spans:
+        fig.add_vrect(
+            x0=first - 0.5, x1=last + 0.5,
+            fillcolor=STATUS_COLORS[status], line_width=0, layer='below',
+            annotation_text=status if status != 'YELLOW' else None, annotation_position='top left'
+        )
+    return fig
@@ -0,0 +1,146 @@
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from utils.storage import get_data_dir
+
+# Columns stored next to every transcript, keyed by recording_url
+METADATA_FIELDS = [
+    'session_key', 'meeting_key', 'year', 'meeting_name', 'session_name',
+    'team_name', 'driver_number', 'driver_name', 'lap_number', 'date',
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY,
+    recording_url TEXT NOT NULL UNIQUE,
+    session_key INTEGER,
+    meeting_key INTEGER,
+    year INTEGER,
+    meeting_name TEXT,
+    session_name TEXT,
+    team_name TEXT,
+    driver_number INTEGER,
+    driver_name TEXT,
+    lap_number INTEGER,
+    date TEXT,
+    transcript TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_team_year ON transcripts (team_name, year);
+CREATE INDEX IF NOT EXISTS transcripts_session ON transcripts (session_key, driver_number);
+
+-- External-content FTS5 table: the inverted index over transcript text, kept in
+-- sync with the transcripts table by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    transcript, content='transcripts', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts (rowid, transcript) VALUES (new.id, new.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_au AFTER UPDATE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, transcript) VALUES ('delete', old.id, old.transcript);
+    INSERT INTO transcripts_fts (rowid, transcript) VALUES (new.id, new.transcript);
+END;
+"""
+
+def to_match_query(query: str) -> str:
+    """Turn user input into a safe FTS5 MATCH expression
+
+    "double quoted" text is a phrase, bare words must all match, and a bare OR
+    between terms/phrases means either. Every term is quoted so punctuation in
+    the input can never be parsed as FTS5 syntax.
+    """
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if word == 'OR':
+            if parts and parts[-1] != 'OR':
+                parts.append('OR')
+            continue
+        text = phrase if phrase else word.strip("'")
+        tokens = re.findall(r"\w+", text.lower())
+        if tokens:
+            parts.append('"' + " ".join(tokens) + '"')
+    while parts and parts[-1] == 'OR':
+        parts.pop()
+    return " ".join(parts)
+
+class RadioTranscriptIndex:
+    """Persistent full-text index of transcribed team radio across sessions and seasons"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_data_dir(), "radio_index.sqlite3")
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        # A short-lived connection per call keeps the index safe to share between
+        # Streamlit script threads; WAL lets searches run while a transcript is added
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def add(self, recording_url: str, transcript: str, metadata: dict = None):
+        """Insert or replace one transcript; only that row's postings are updated"""
+        metadata = metadata or {}
+        values = {field: metadata.get(field) for field in METADATA_FIELDS}
+        if values['lap_number'] is not None and not str(values['lap_number']).isdigit():
+            values['lap_number'] = None
+        if values['date'] is not None:
+            values['date'] = str(values['date'])
+        columns = ['recording_url', *METADATA_FIELDS, 'transcript', 'indexed_at']
+        row = [recording_url, *values.values(), transcript, datetime.now(timezone.utc).isoformat()]
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO transcripts ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (recording_url) DO UPDATE SET {updates}",
+                row
+            )
+
+    def get(self, recording_url: str) -> str:
+        """Stored transcript for a recording, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT transcript FROM transcripts WHERE recording_url = ?",
+                               (recording_url,)).fetchone()
+        return row['transcript'] if row else None
+
+    def search(self, query: str, team_name: str = None, year: int = None, session_key: int = None,
+               driver_number: int = None, limit: int = 200) -> list:
+        """Keyword/phrase search, best matches first, optionally filtered by metadata"""
+        match = to_match_query(query)
+        if not match:
+            return []
+        sql = [
+            "SELECT t.*, snippet(transcripts_fts, 0, '**', '**', ' … ', 12) AS snippet",
+            "FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid",
+            "WHERE transcripts_fts MATCH ?",
+        ]
+        params = [match]
+        for column, value in (('team_name', team_name), ('year', year),
+                              ('session_key', session_key), ('driver_number', driver_number)):
+            if value is not None:
+                sql.append(f"AND t.{column} = ?")
+                params.append(value)
+        sql.append("ORDER BY bm25(transcripts_fts), t.date LIMIT ?")
+        params.append(limit)
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(" ".join(sql), params)]
+
+    def facets(self) -> dict:
+        """Distinct seasons and teams present in the index, for search filters"""
+        with self._connect() as conn:
+            years = [r[0] for r in conn.execute("SELECT DISTINCT year FROM transcripts WHERE year IS NOT NULL ORDER BY year")]
+            teams = [r[0] for r in conn.execute("SELECT DISTINCT team_name FROM transcripts WHERE team_name IS NOT NULL ORDER BY team_name")]
+            count = conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+        return {'years': years, 'teams': teams, 'count': count}
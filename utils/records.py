@@ -0,0 +1,227 @@
+import sys
+from collections.abc import Mapping, Sequence
+import numpy as np
+
+# Field kinds and the column dtype each is stored as
+KIND_DTYPES = {
+    'int': np.int32,
+    'float': np.float64,
+    'bool': np.bool_,
+    'str': object,
+    'datetime': 'datetime64[ns]',
+}
+
+# Fields kept per endpoint. Anything else in a response is dropped at the
+# client boundary; fields missing from a record are stored as null.
+SCHEMAS = {
+    'laps': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'lap_number': 'int',
+        'date_start': 'datetime', 'lap_duration': 'float', 'duration_sector_1': 'float',
+        'duration_sector_2': 'float', 'duration_sector_3': 'float', 'i1_speed': 'int',
+        'i2_speed': 'int', 'st_speed': 'int', 'is_pit_out_lap': 'bool',
+    },
+    'position': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'date': 'datetime',
+        'position': 'int',
+    },
+    'stints': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'stint_number': 'int',
+        'compound': 'str', 'lap_start': 'int', 'lap_end': 'int', 'tyre_age_at_start': 'int',
+    },
+    'pit': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'lap_number': 'int',
+        'pit_duration': 'float', 'date': 'datetime',
+    },
+    'weather': {
+        'session_key': 'int', 'meeting_key': 'int', 'date': 'datetime', 'air_temperature': 'float',
+        'track_temperature': 'float', 'humidity': 'float', 'pressure': 'float', 'rainfall': 'float',
+        'wind_direction': 'int', 'wind_speed': 'float',
+    },
+    'car_data': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'date': 'datetime',
+        'speed': 'int', 'throttle': 'int', 'brake': 'int', 'n_gear': 'int', 'rpm': 'int', 'drs': 'int',
+    },
+    'team_radio': {
+        'session_key': 'int', 'meeting_key': 'int', 'driver_number': 'int', 'date': 'datetime',
+        'recording_url': 'str',
+    },
+}
+
+
+class SchemaError(ValueError):
+    """An API response does not match the expected endpoint schema"""
+
+
+def _build_column(values: list, kind: str):
+    """Typed, read-only column for one field plus its null mask (None when nothing is null)
+
+    Only int and bool columns carry a mask; datetime, float and str columns
+    hold their own nulls (NaT, NaN, None).
+    """
+    nulls = np.fromiter((v is None for v in values), dtype=np.bool_, count=len(values))
+    mask = nulls if nulls.any() else None
+
+    if kind == 'datetime':
+        import pandas as pd
+
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), format='ISO8601', utc=True)
+        column = parsed.dt.tz_localize(None).to_numpy(dtype='datetime64[ns]')
+        mask = None  # NaT is its own null
+    elif kind == 'str':
+        # One shared object per distinct string (compounds, URLs repeat across rows)
+        column = np.array([None if v is None else sys.intern(str(v)) for v in values], dtype=object)
+        mask = None  # None is its own null
+    elif kind == 'float':
+        column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        mask = None  # NaN is its own null
+    elif kind == 'bool':
+        column = np.array([bool(v) for v in values], dtype=np.bool_)
+    else:
+        column = np.array([0 if v is None else v for v in values], dtype=KIND_DTYPES[kind])
+    column.flags.writeable = False
+    return column, mask
+
+
+class Record(Mapping):
+    """Read-only dict-like view of one row of a RecordTable"""
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: 'RecordTable', index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, field: str):
+        return self._table.value(field, self._index)
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self) -> int:
+        return len(self._table.columns)
+
+    def __repr__(self) -> str:
+        return f"Record({dict(self)!r})"
+
+
+class RecordTable(Sequence):
+    """Columnar, schema-checked container for one endpoint's records
+
+    Columns are compact typed numpy arrays (int32, float64, bool, datetime64,
+    interned strings) instead of one dict per record. The table still behaves
+    like the list of dicts it replaces: len(), truthiness, iteration, [i] and
+    [i]['field'] return plain Python values (timestamps as ISO strings) and
+    slices are views. to_frame() hands the columns to pandas without copying
+    the numeric, boolean and string data.
+    """
+    __slots__ = ('endpoint', 'columns', 'masks', '_length')
+
+    def __init__(self, endpoint: str, columns: dict, masks: dict, length: int):
+        self.endpoint = endpoint
+        self.columns = columns
+        self.masks = masks
+        self._length = length
+
+    @classmethod
+    def from_records(cls, records: list, endpoint: str) -> 'RecordTable':
+        """Validate and convert one API response; raises SchemaError on malformed data"""
+        schema = SCHEMAS[endpoint]
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            raise SchemaError(f"{endpoint}: expected a list of objects, got {type(records).__name__}")
+        columns, masks = {}, {}
+        for field, kind in schema.items():
+            try:
+                columns[field], mask = _build_column([r.get(field) for r in records], kind)
+            except (TypeError, ValueError, OverflowError) as e:
+                raise SchemaError(f"{endpoint}.{field}: expected {kind} values ({e})") from e
+            if mask is not None:
+                masks[field] = mask
+        return cls(endpoint, columns, masks, len(records))
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(index)
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("record index out of range")
+        return Record(self, index)
+
+    def __repr__(self) -> str:
+        return f"RecordTable({self.endpoint!r}, {self._length} records)"
+
+    def value(self, field: str, index: int):
+        """One cell as a plain Python value, None when null"""
+        mask = self.masks.get(field)
+        if mask is not None and mask[index]:
+            return None
+        value = self.columns[field][index]
+        kind = SCHEMAS[self.endpoint][field]
+        if kind == 'datetime':
+            if np.isnat(value):
+                return None
+            return np.datetime_as_string(value, unit='us') + '+00:00'
+        if kind == 'float' and np.isnan(value):
+            return None
+        return value.item() if isinstance(value, np.generic) else value
+
+    def column(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def take(self, rows) -> 'RecordTable':
+        """Rows selected by a slice (a view), a boolean mask or indices (copies)"""
+        columns = {field: column[rows] for field, column in self.columns.items()}
+        masks = {field: mask[rows] for field, mask in self.masks.items()}
+        length = len(next(iter(columns.values()))) if columns else 0
+        return RecordTable(self.endpoint, columns, masks, length)
+
+    def where(self, field: str, value) -> 'RecordTable':
+        return self.take(self.columns[field] == value)
+
+    def group_by(self, field: str) -> dict:
+        """One table per distinct value of an integer field, e.g. per driver_number"""
+        keys = self.columns[field]
+        order = np.argsort(keys, kind='stable')
+        unique, starts = np.unique(keys[order], return_index=True)
+        bounds = list(starts[1:]) + [len(order)]
+        return {key.item(): self.take(order[start:end]) for key, start, end in zip(unique, starts, bounds)}
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns, counting each distinct string object once"""
+        total = sum(column.nbytes for column in self.columns.values())
+        total += sum(mask.nbytes for mask in self.masks.values())
+        for field, column in self.columns.items():
+            if column.dtype == object:
+                total += sum(sys.getsizeof(s) for s in {id(v): v for v in column if v is not None}.values())
+        return total
+
+    def to_frame(self):
+        """pandas DataFrame over the same column buffers"""
+        import pandas as pd
+
+        data = {}
+        for field, column in self.columns.items():
+            mask = self.masks.get(field)
+            if mask is not None and column.dtype == np.bool_:
+                data[field] = pd.arrays.BooleanArray(column, mask)
+            elif mask is not None:
+                data[field] = pd.arrays.IntegerArray(column, mask)
+            elif column.dtype.kind == 'M':
+                # Timestamps come back as UTC-aware, like parse_f1_datetimes produces
+                data[field] = pd.Series(column, copy=False).dt.tz_localize('UTC')
+            else:
+                data[field] = pd.Series(column, dtype=column.dtype, copy=False)
+        return pd.DataFrame(data, copy=False)
+
+
+def to_frame(records, columns: list = None):
+    """DataFrame for API records, whether a RecordTable or a plain list of dicts"""
+    import pandas as pd
+
+    if isinstance(records, RecordTable):
+        frame = records.to_frame()
+        return frame[columns] if columns else frame
+    return pd.DataFrame(records, columns=columns)
@@ -0,0 +1,195 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from email.utils import parsedate_to_datetime
+
+class Priority(IntEnum):
+    """Request classes, most urgent first"""
+    INTERACTIVE = 0  # sidebar cascade, Submit bundle: a user is waiting on it
+    BULK = 1         # prefetching, season ingestion, report generation, radio downloads
+
+_current_priority = contextvars.ContextVar('request_priority', default=Priority.INTERACTIVE)
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Run every scheduled request made inside the block with the given priority"""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority() -> Priority:
+    return _current_priority.get()
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RequestScheduler:
+    """Token-bucket admission control for one upstream host
+
+    Requests wait in per-priority FIFO queues. A queued request is admitted when
+    no more urgent request is waiting, a token and a concurrency slot are free
+    and the host is not backing off after a 429. Bulk requests may not take the
+    last `bulk_reserve` tokens or more than `bulk_concurrency` slots, so
+    interactive requests find capacity immediately while bulk work soaks up
+    whatever budget is left. A 429 pauses the host for Retry-After (or an
+    exponential backoff) and halves the refill rate, which then recovers
+    additively with every successful response.
+    """
+
+    def __init__(self, rate: float = 3.0, burst: int = 3, max_concurrency: int = 4,
+                 bulk_reserve: int = 1, bulk_concurrency: int = 2, min_rate: float = 0.2):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.bulk_reserve = bulk_reserve
+        self.bulk_concurrency = bulk_concurrency
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._consecutive_429 = 0
+        self._next_ticket = 0
+        self._queues = {p: [] for p in Priority}
+        self._in_flight = {p: 0 for p in Priority}
+        self._stats = {p: {'admitted': 0, 'wait_s': 0.0, 'max_wait_s': 0.0, 'max_queue_depth': 0} for p in Priority}
+        self._throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _admissible(self, priority: Priority, ticket: int, now: float) -> bool:
+        if now < self._paused_until:
+            return False
+        # Strict priority across classes, FIFO within a class
+        for other in Priority:
+            if other < priority and self._queues[other]:
+                return False
+        if self._queues[priority][0] != ticket:
+            return False
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return False
+        if priority == Priority.INTERACTIVE:
+            return self._tokens >= 1
+        return self._in_flight[priority] < self.bulk_concurrency and self._tokens >= 1 + self.bulk_reserve
+
+    def _wait_timeout(self, priority: Priority, now: float) -> float:
+        # Sleep until the next token (or the end of a backoff pause) could admit us;
+        # releases and 429s notify the condition early
+        needed = 1 if priority == Priority.INTERACTIVE else 1 + self.bulk_reserve
+        token_wait = max(0.0, (needed - self._tokens) / self.rate)
+        return max(token_wait, self._paused_until - now, 0.005)
+
+    def acquire(self, priority: Priority = None) -> Priority:
+        priority = current_priority() if priority is None else priority
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._queues[priority].append(ticket)
+            stats = self._stats[priority]
+            stats['max_queue_depth'] = max(stats['max_queue_depth'], len(self._queues[priority]))
+            queued_at = time.monotonic()
+            admitted = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._admissible(priority, ticket, now):
+                        admitted = True
+                        break
+                    self._cond.wait(self._wait_timeout(priority, now))
+            finally:
+                if not admitted:
+                    # An interrupted wait (e.g. a stopped script run) must not leave
+                    # its ticket at the head of the queue, blocking everyone behind it
+                    self._queues[priority].remove(ticket)
+                    self._cond.notify_all()
+            self._queues[priority].pop(0)
+            self._tokens -= 1
+            self._in_flight[priority] += 1
+
+            waited = time.monotonic() - queued_at
+            stats['admitted'] += 1
+            stats['wait_s'] += waited
+            stats['max_wait_s'] = max(stats['max_wait_s'], waited)
+            # The next request in line may now be admissible
+            self._cond.notify_all()
+        return priority
+
+    def release(self, priority: Priority, status_code: int = None, retry_after: str = None):
+        with self._cond:
+            self._in_flight[priority] -= 1
+            if status_code == 429:
+                self._throttled += 1
+                self._consecutive_429 += 1
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = min(30.0, 0.5 * 2 ** self._consecutive_429)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0.0)
+            elif status_code is not None and status_code < 500:
+                self._consecutive_429 = 0
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Priority = None):
+        """Hold one admitted request slot; call report(response) inside to feed the backoff"""
+        admitted = self.acquire(priority)
+        outcome = {}
+        try:
+            yield lambda response: outcome.update(
+                status_code=response.status_code, retry_after=response.headers.get('Retry-After')
+            )
+        finally:
+            self.release(admitted, **outcome)
+
+    def metrics(self) -> dict:
+        """Queue depth (now and peak), in-flight requests, wait times and backoff state"""
+        with self._cond:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                'queue_depth': {p.name.lower(): len(self._queues[p]) for p in Priority},
+                'max_queue_depth': {p.name.lower(): self._stats[p]['max_queue_depth'] for p in Priority},
+                'in_flight': {p.name.lower(): self._in_flight[p] for p in Priority},
+                'admitted': {p.name.lower(): self._stats[p]['admitted'] for p in Priority},
+                'avg_wait_ms': {
+                    p.name.lower(): 1000 * self._stats[p]['wait_s'] / self._stats[p]['admitted']
+                    if self._stats[p]['admitted'] else 0.0
+                    for p in Priority
+                },
+                'max_wait_ms': {p.name.lower(): 1000 * self._stats[p]['max_wait_s'] for p in Priority},
+                'tokens': self._tokens,
+                'rate': self.rate,
+                'throttled': self._throttled,
+                'backoff_remaining_s': max(0.0, self._paused_until - now),
+            }
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_scheduler(host: str, **limits) -> RequestScheduler:
+    """Process-wide scheduler for a host, so every client and browser session shares its budget"""
+    with _schedulers_lock:
+        if host not in _schedulers:
+            _schedulers[host] = RequestScheduler(**limits)
+        return _schedulers[host]
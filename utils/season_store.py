@@ -0,0 +1,255 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from utils.scheduler import Priority, request_priority
+from utils.storage import get_data_dir
+
+# Every aggregate keeps running sums/counts/extremes only, so adding a session is
+# an upsert of a few rows and reading an average is a single keyed lookup
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingested_sessions (
+    session_key INTEGER PRIMARY KEY,
+    year INTEGER,
+    meeting_key INTEGER,
+    circuit TEXT,
+    session_name TEXT,
+    ingested_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pit_by_team (
+    year INTEGER, team_name TEXT,
+    stops INTEGER NOT NULL, total_duration REAL NOT NULL, fastest REAL,
+    PRIMARY KEY (year, team_name)
+);
+CREATE TABLE IF NOT EXISTS stints_by_compound (
+    year INTEGER, circuit TEXT, compound TEXT,
+    stints INTEGER NOT NULL, total_laps INTEGER NOT NULL, longest INTEGER,
+    PRIMARY KEY (year, circuit, compound)
+);
+CREATE TABLE IF NOT EXISTS laps_by_team (
+    year INTEGER, circuit TEXT, team_name TEXT,
+    laps INTEGER NOT NULL, total_time REAL NOT NULL, fastest REAL,
+    PRIMARY KEY (year, circuit, team_name)
+);
+CREATE TABLE IF NOT EXISTS positions_by_driver (
+    year INTEGER, driver_number INTEGER, driver_name TEXT, team_name TEXT,
+    races INTEGER NOT NULL, positions_gained INTEGER NOT NULL, best_gain INTEGER,
+    PRIMARY KEY (year, driver_number)
+);
+"""
+
+# Session types that are aggregated at all; practice and qualifying garage visits,
+# runs and grids would skew pit durations, stint lengths, race pace and positions
+RACE_SESSIONS = ("Race", "Sprint")
+
+# Bumped whenever what the aggregates mean changes; older stores are rebuilt empty
+SCHEMA_VERSION = 3
+
+_TABLES = ('ingested_sessions', 'pit_by_team', 'stints_by_compound', 'laps_by_team', 'positions_by_driver')
+
+def session_finished(session: dict, grace: timedelta = timedelta(0)) -> bool:
+    """Whether a session's date_end (plus `grace`) has passed; sessions without one count as running"""
+    date_end = session.get('date_end')
+    if not date_end:
+        return False
+    return datetime.fromisoformat(date_end) + grace < datetime.now(timezone.utc)
+
+def compute_session_aggregates(session: dict, drivers: list, pit_data: list, stints: list,
+                               laps: list, positions: list) -> dict:
+    """Reduce one session's session-wide records to per-key partial sums"""
+    import pandas as pd
+    from utils.records import to_frame
+
+    teams = {d['driver_number']: d.get('team_name') for d in drivers}
+    names = {d['driver_number']: d.get('full_name') for d in drivers}
+    partials = {'pit_by_team': [], 'stints_by_compound': [], 'laps_by_team': [], 'positions_by_driver': []}
+    is_race = session.get('session_name') in RACE_SESSIONS
+
+    pit_df = to_frame(pit_data)
+    if is_race and not pit_df.empty and 'pit_duration' in pit_df:
+        pit_df = pit_df.dropna(subset=['pit_duration'])
+        pit_df['team_name'] = pit_df['driver_number'].map(teams)
+        grouped = pit_df.groupby('team_name')['pit_duration'].agg(['count', 'sum', 'min'])
+        partials['pit_by_team'] = [
+            (team, int(row['count']), float(row['sum']), float(row['min'])) for team, row in grouped.iterrows()
+        ]
+
+    stint_df = to_frame(stints)
+    if is_race and not stint_df.empty:
+        stint_df = stint_df.dropna(subset=['compound', 'lap_start', 'lap_end'])
+        stint_df['length'] = stint_df['lap_end'] - stint_df['lap_start'] + 1
+        grouped = stint_df.groupby('compound')['length'].agg(['count', 'sum', 'max'])
+        partials['stints_by_compound'] = [
+            (compound, int(row['count']), int(row['sum']), int(row['max'])) for compound, row in grouped.iterrows()
+        ]
+
+    laps_df = to_frame(laps)
+    if is_race and not laps_df.empty and 'lap_duration' in laps_df:
+        # Pit in/out laps would skew pace, drop them
+        laps_df = laps_df.dropna(subset=['lap_duration'])
+        if 'is_pit_out_lap' in laps_df:
+            laps_df = laps_df[~laps_df['is_pit_out_lap'].fillna(False).astype(bool)]
+        pit_laps = {(p['driver_number'], p['lap_number']) for p in pit_data}
+        if pit_laps:
+            keys = pd.Series(list(zip(laps_df['driver_number'], laps_df['lap_number'])), index=laps_df.index)
+            laps_df = laps_df[~keys.isin(pit_laps)]
+        laps_df['team_name'] = laps_df['driver_number'].map(teams)
+        grouped = laps_df.groupby('team_name')['lap_duration'].agg(['count', 'sum', 'min'])
+        partials['laps_by_team'] = [
+            (team, int(row['count']), float(row['sum']), float(row['min'])) for team, row in grouped.iterrows()
+        ]
+
+    pos_df = to_frame(positions)
+    if is_race and not pos_df.empty:
+        pos_df = pos_df.sort_values('date')
+        grouped = pos_df.groupby('driver_number')['position'].agg(['first', 'last'])
+        partials['positions_by_driver'] = [
+            (int(number), names.get(number), teams.get(number), int(row['first'] - row['last']))
+            for number, row in grouped.iterrows()
+        ]
+    return partials
+
+class SeasonAggregateStore:
+    """Materialized season-level aggregates, updated one finished session at a time"""
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_data_dir(), "season_aggregates.sqlite3")
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                # Earlier versions mixed practice and qualifying into the aggregates;
+                # start over so every session is re-ingested under the current rules
+                for table in _TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def is_ingested(self, session_key: int) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM ingested_sessions WHERE session_key = ?",
+                                (session_key,)).fetchone() is not None
+
+    def apply_session(self, session: dict, partials: dict) -> bool:
+        """Fold one session's partial sums into the aggregates; a session is only ever counted once"""
+        year, circuit = session.get('year'), session.get('circuit_short_name')
+        with self._connect() as conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO ingested_sessions VALUES (?, ?, ?, ?, ?, ?)",
+                (session['session_key'], year, session.get('meeting_key'), circuit,
+                 session.get('session_name'), datetime.now(timezone.utc).isoformat())
+            ).rowcount
+            if not inserted:
+                return False
+            conn.executemany(
+                "INSERT INTO pit_by_team VALUES (?, ?, ?, ?, ?) ON CONFLICT (year, team_name) DO UPDATE SET "
+                "stops = stops + excluded.stops, total_duration = total_duration + excluded.total_duration, "
+                "fastest = min(fastest, excluded.fastest)",
+                [(year, *row) for row in partials['pit_by_team']]
+            )
+            conn.executemany(
+                "INSERT INTO stints_by_compound VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (year, circuit, compound) DO UPDATE SET "
+                "stints = stints + excluded.stints, total_laps = total_laps + excluded.total_laps, "
+                "longest = max(longest, excluded.longest)",
+                [(year, circuit, *row) for row in partials['stints_by_compound']]
+            )
+            conn.executemany(
+                "INSERT INTO laps_by_team VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (year, circuit, team_name) DO UPDATE SET "
+                "laps = laps + excluded.laps, total_time = total_time + excluded.total_time, "
+                "fastest = min(fastest, excluded.fastest)",
+                [(year, circuit, *row) for row in partials['laps_by_team']]
+            )
+            conn.executemany(
+                "INSERT INTO positions_by_driver VALUES (?, ?, ?, ?, 1, ?, ?) ON CONFLICT (year, driver_number) DO UPDATE SET "
+                "driver_name = coalesce(excluded.driver_name, driver_name), "
+                "team_name = coalesce(excluded.team_name, team_name), races = races + 1, "
+                "positions_gained = positions_gained + excluded.positions_gained, "
+                "best_gain = max(best_gain, excluded.best_gain)",
+                [(year, number, name, team, gained, gained) for number, name, team, gained in partials['positions_by_driver']]
+            )
+        return True
+
+    def ingest_session(self, api_client, session: dict) -> bool:
+        """Fetch one session's session-wide data and fold it in, unless already ingested"""
+        if self.is_ingested(session['session_key']):
+            return False
+        session_key = session['session_key']
+        if session.get('session_name') not in RACE_SESSIONS:
+            # Nothing of it is aggregated: record it as seen without fetching anything
+            return self.apply_session(session, compute_session_aggregates(session, [], [], [], [], []))
+        partials = compute_session_aggregates(
+            session,
+            api_client.get_drivers(session_key),
+            api_client.get_pit_data(session_key),
+            api_client.get_stints(session_key),
+            api_client.get_laps(session_key),
+            api_client.get_position_data(session_key),
+        )
+        return self.apply_session(session, partials)
+
+    def ingest_season(self, api_client, year: int, progress=None) -> int:
+        """Ingest every finished session of a season not yet in the store, at bulk priority"""
+        added = 0
+        with request_priority(Priority.BULK):
+            for meeting in api_client.get_meetings(year):
+                for session in api_client.get_sessions(meeting['meeting_key']):
+                    if not session_finished(session):
+                        continue
+                    if self.ingest_session(api_client, session):
+                        added += 1
+                    if progress:
+                        progress(meeting, session)
+        return added
+
+    def _rows(self, sql: str, params: tuple) -> list:
+        with self._connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def pit_duration_by_team(self, year: int) -> list:
+        return self._rows(
+            "SELECT team_name, stops, total_duration / stops AS avg_pit_duration, fastest "
+            "FROM pit_by_team WHERE year = ? ORDER BY avg_pit_duration", (year,)
+        )
+
+    def stint_length_by_compound(self, year: int, circuit: str = None) -> list:
+        if circuit:
+            return self._rows(
+                "SELECT circuit, compound, stints, 1.0 * total_laps / stints AS avg_stint_length, longest "
+                "FROM stints_by_compound WHERE year = ? AND circuit = ? ORDER BY compound", (year, circuit)
+            )
+        return self._rows(
+            "SELECT circuit, compound, stints, 1.0 * total_laps / stints AS avg_stint_length, longest "
+            "FROM stints_by_compound WHERE year = ? ORDER BY circuit, compound", (year,)
+        )
+
+    def lap_pace_by_team(self, year: int, circuit: str) -> list:
+        return self._rows(
+            "SELECT team_name, laps, total_time / laps AS avg_lap, fastest "
+            "FROM laps_by_team WHERE year = ? AND circuit = ? ORDER BY avg_lap", (year, circuit)
+        )
+
+    def positions_gained_by_driver(self, year: int) -> list:
+        return self._rows(
+            "SELECT driver_number, driver_name, team_name, races, positions_gained, best_gain "
+            "FROM positions_by_driver WHERE year = ? ORDER BY positions_gained DESC", (year,)
+        )
+
+    def circuits(self, year: int) -> list:
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(
+                "SELECT DISTINCT circuit FROM ingested_sessions WHERE year = ? AND circuit IS NOT NULL ORDER BY circuit",
+                (year,)
+            )]
+
+    def ingested_count(self, year: int) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM ingested_sessions WHERE year = ?", (year,)).fetchone()[0]
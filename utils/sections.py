@@ -0,0 +1,308 @@
+from collections import namedtuple
+
+import pandas as pd
+import plotly.express as px
+from utils.records import to_frame
+from utils.styling import get_plotly_theme
+
+# Computed output of a dashboard section: the derived frame, its figure (if any)
+# and a warning to show instead when the data is not usable
+SectionResult = namedtuple('SectionResult', ['frame', 'figure', 'warning'], defaults=(None, None, None))
+
+# Weather is sampled about once a minute: windows are padded by this much and
+# a lap only takes a sample this close to it
+WEATHER_PADDING = pd.Timedelta(minutes=5)
+# Conditions attached to every lap by build_lap_weather
+LAP_WEATHER_FIELDS = ['air_temperature', 'track_temperature', 'rainfall', 'wind_speed', 'wind_direction']
+
+
+def parse_f1_datetimes(values) -> pd.Series:
+    """Parse a whole column of F1 timestamps in one vectorized call"""
+    series = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    try:
+        return pd.to_datetime(series, format='ISO8601')
+    except (ValueError, TypeError):
+        try:
+            return pd.to_datetime(series, format='mixed')
+        except (ValueError, TypeError):
+            return pd.to_datetime(series, errors='coerce')
+
+
+def calculate_position_changes(positions: list) -> int:
+    """Calculate total number of position changes"""
+    if not positions:
+        return 0
+    changes = 0
+    prev_pos = positions[0]['position']
+    for pos in positions[1:]:
+        if pos['position'] != prev_pos:
+            changes += abs(pos['position'] - prev_pos)
+            prev_pos = pos['position']
+    return changes
+
+
+def build_summary_data(driver_details: dict, team: str, session_name: str, positions: list,
+                       laps: list, stints: list, weather: list, radio_messages: list) -> dict:
+    """Collect the key race metrics fed to the race summary prompt"""
+    return {
+        "driver_name": driver_details['full_name'],
+        "team": team,
+        "session": session_name,
+        "total_laps": len(laps) if laps else 0,
+        "final_position": positions[-1]['position'] if positions else "N/A",
+        "position_changes": calculate_position_changes(positions) if positions else 0,
+        "fastest_lap": min([lap['lap_duration'] for lap in laps if isinstance(lap.get('lap_duration'), (int, float))], default=0),
+        "tire_strategy": [{"stint": s['stint_number'], "compound": s['compound'], "laps": s['lap_end'] - s['lap_start'] + 1} for s in stints] if stints else [],
+        "weather_changes": len(weather) > 1 if weather else False,
+        "radio_messages_count": len(radio_messages)
+    }
+
+
+def build_position_section(positions: list, laps: list, periods: pd.DataFrame = None) -> SectionResult:
+    """Merge position samples onto laps and build the position-by-lap chart
+
+    `periods` (from race_control.build_track_status_periods) shades safety car,
+    VSC, red flag and yellow flag laps.
+    """
+    if not (positions and laps):
+        return SectionResult(warning="No position or lap data available for this session")
+
+    pos_df = to_frame(positions)
+    pos_df['date'] = parse_f1_datetimes(pos_df['date'])
+
+    laps_df = to_frame(laps)
+    laps_df['date_start'] = parse_f1_datetimes(laps_df['date_start'])
+
+    pos_df = pos_df.dropna(subset=['date'])
+    laps_df = laps_df.dropna(subset=['date_start', 'lap_number'])
+
+    if pos_df.empty or laps_df.empty:
+        return SectionResult(warning="Not enough valid position or lap data available")
+
+    merged_df = pd.merge_asof(
+        pos_df.sort_values('date'),
+        laps_df[['date_start', 'lap_number']].sort_values('date_start'),
+        left_on='date',
+        right_on='date_start',
+        direction='nearest'
+    )
+    merged_df = merged_df.dropna(subset=['lap_number'])
+
+    if merged_df.empty:
+        return SectionResult(warning="Could not merge position and lap data")
+
+    fig = px.line(
+        merged_df,
+        x='lap_number',
+        y='position',
+        markers=True,
+        title="Position by Lap Number",
+        labels={'lap_number': 'Lap Number', 'position': 'Position'}
+    )
+    fig.update_yaxes(autorange="reversed")
+    if periods is not None:
+        from utils.race_control import add_status_shading, status_spans, tag_laps
+        add_status_shading(fig, status_spans(tag_laps(laps_df, periods)))
+    fig.update_layout(**get_plotly_theme()['layout'])
+    return SectionResult(frame=merged_df, figure=fig)
+
+
+def build_weather_section(weather: list) -> SectionResult:
+    """Build the air/track temperature trend chart"""
+    if not weather:
+        return SectionResult(warning="No weather data available for this session")
+
+    weather_df = to_frame(weather)
+    weather_df['date'] = parse_f1_datetimes(weather_df['date'])
+
+    fig = px.line(
+        weather_df,
+        x='date',
+        y=['air_temperature', 'track_temperature'],
+        title="Temperature Trends",
+        labels={'value': 'Temperature (°C)', 'variable': 'Metric'}
+    )
+    fig.update_layout(**get_plotly_theme()['layout'])
+    return SectionResult(frame=weather_df, figure=fig)
+
+
+def weather_window(session: dict) -> tuple:
+    """(date_start, date_end) of a session padded by WEATHER_PADDING, as ISO strings (None if unknown)"""
+    bounds = []
+    for field, pad in (('date_start', -WEATHER_PADDING), ('date_end', WEATHER_PADDING)):
+        value = pd.to_datetime(session.get(field), utc=True, errors='coerce') if session else pd.NaT
+        bounds.append(None if pd.isna(value) else (value + pad).isoformat())
+    return tuple(bounds)
+
+
+def build_lap_weather(laps: list, weather: list) -> pd.DataFrame:
+    """Track/air temperature, rainfall and wind on every lap
+
+    Each lap takes the weather sample nearest its midpoint in one as-of join;
+    laps with no sample within WEATHER_PADDING get NaN. One row per lap with
+    driver_number, lap_number and LAP_WEATHER_FIELDS.
+    """
+    columns = ['driver_number', 'lap_number'] + LAP_WEATHER_FIELDS
+    if not laps:
+        return pd.DataFrame(columns=columns)
+
+    laps_df = to_frame(laps, columns=['driver_number', 'lap_number', 'date_start', 'lap_duration'])
+    laps_df['date_start'] = parse_f1_datetimes(laps_df['date_start'])
+    laps_df['midpoint'] = laps_df['date_start'] + pd.to_timedelta(laps_df['lap_duration'].astype(float).fillna(0) / 2, unit='s')
+    laps_df = laps_df.dropna(subset=['midpoint']).sort_values('midpoint')
+    if not weather or laps_df.empty:
+        return laps_df.reindex(columns=columns).sort_values(['driver_number', 'lap_number']).reset_index(drop=True)
+
+    weather_df = to_frame(weather, columns=['date'] + LAP_WEATHER_FIELDS)
+    weather_df['date'] = parse_f1_datetimes(weather_df['date'])
+    weather_df = weather_df.dropna(subset=['date']).sort_values('date')
+
+    joined = pd.merge_asof(laps_df, weather_df, left_on='midpoint', right_on='date',
+                           direction='nearest', tolerance=WEATHER_PADDING)
+    return joined[columns].sort_values(['driver_number', 'lap_number']).reset_index(drop=True)
+
+
+def build_lap_section(laps: list, pit_data: list, periods: pd.DataFrame = None,
+                      lap_weather: pd.DataFrame = None) -> SectionResult:
+    """Build the lap time chart with pit stop annotations
+
+    With `periods` every lap is tagged with its track status and neutralized
+    laps are shaded. With `lap_weather` (from build_lap_weather) every lap
+    carries its track/air temperature, rainfall and wind.
+    """
+    if not laps:
+        return SectionResult(warning="No lap data available for this session")
+
+    laps_df = to_frame(laps)
+    laps_df = laps_df[laps_df['lap_duration'].notna()]
+
+    if laps_df.empty:
+        return SectionResult(warning="No valid lap time data available")
+
+    from utils.race_control import add_status_shading, status_spans, tag_laps
+    laps_df = tag_laps(laps_df, periods)
+    hover = ['track_status']
+    if lap_weather is not None and not lap_weather.empty:
+        laps_df = laps_df.merge(lap_weather.drop_duplicates(['driver_number', 'lap_number']),
+                                on=['driver_number', 'lap_number'], how='left')
+        hover += ['track_temperature', 'air_temperature', 'rainfall']
+
+    # Mark pit laps
+    pit_laps = []
+    laps_df['is_pit'] = False
+    if pit_data:
+        pit_df = to_frame(pit_data)
+        pit_laps = pit_df['lap_number'].unique().tolist()
+        laps_df['is_pit'] = laps_df['lap_number'].isin(pit_laps)
+
+    # Create plot
+    fig = px.line(
+        laps_df,
+        x='lap_number',
+        y='lap_duration',
+        title="Lap Times",
+        labels={'lap_number': 'Lap Number', 'lap_duration': 'Lap Time (s)'},
+        hover_data=hover,
+        height=500
+    )
+    add_status_shading(fig, status_spans(laps_df))
+
+    # Highlight pit stops if they exist
+    if pit_laps:
+        pit_lap_data = laps_df[laps_df['is_pit']]
+        fig.add_trace(px.scatter(
+            pit_lap_data,
+            x='lap_number',
+            y='lap_duration',
+            color_discrete_sequence=['red'],
+            hover_data={'is_pit': True}
+        ).data[0])
+
+        # One join gives every stop the duration of the lap it was made on
+        annotated = pit_df.merge(laps_df[['lap_number', 'lap_duration']].drop_duplicates('lap_number'),
+                                 on='lap_number', how='inner')
+        for pit in annotated.itertuples(index=False):
+            fig.add_annotation(
+                x=pit.lap_number,
+                y=pit.lap_duration,
+                text=f"Pit: {pit.pit_duration:.2f}s",
+                showarrow=True,
+                arrowhead=1,
+                yshift=10
+            )
+
+    fig.update_layout(**get_plotly_theme()['layout'])
+    return SectionResult(frame=laps_df, figure=fig)
+
+
+def representative_laps(laps_df: pd.DataFrame) -> pd.DataFrame:
+    """Laps run at racing pace: no pit laps and no safety car, VSC or red flag laps"""
+    mask = ~laps_df['is_pit'] if 'is_pit' in laps_df else pd.Series(True, index=laps_df.index)
+    if 'neutralized' in laps_df:
+        mask &= ~laps_df['neutralized']
+    return laps_df[mask]
+
+
+def build_lap_metrics(laps_df: pd.DataFrame) -> dict:
+    """Fastest and average lap, excluding pit and neutralized laps"""
+    normal_laps = representative_laps(laps_df)
+    return {
+        'fastest_lap': normal_laps['lap_duration'].min(),
+        'avg_lap': normal_laps['lap_duration'].mean(),
+        'excludes_pits': bool(laps_df['is_pit'].any()),
+        'excludes_neutralized': bool(laps_df.get('neutralized', pd.Series(dtype=bool)).any()),
+    }
+
+
+def build_stint_table(stints: list, laps_df: pd.DataFrame) -> pd.DataFrame:
+    """Tire strategy table with the fastest and average racing lap of every stint"""
+    stint_df = to_frame(stints).sort_values('lap_start')
+
+    # Assign every racing lap to the stint it was driven on in one as-of join
+    racing = representative_laps(laps_df)[['lap_number', 'lap_duration']].sort_values('lap_number')
+    assigned = pd.merge_asof(racing, stint_df[['lap_start', 'lap_end', 'stint_number']],
+                             left_on='lap_number', right_on='lap_start', direction='backward')
+    assigned = assigned[assigned['lap_number'] <= assigned['lap_end']]
+    per_stint = assigned.groupby('stint_number')['lap_duration'].agg(['min', 'mean'])
+    stint_df = stint_df.join(per_stint, on='stint_number')
+
+    return pd.DataFrame({
+        "Laps": stint_df['lap_start'].astype(str) + "-" + stint_df['lap_end'].astype(str),
+        "Compound": stint_df['compound'],
+        "Stint Length": stint_df['lap_end'] - stint_df['lap_start'] + 1,
+        "Fastest Lap": stint_df['min'].map(lambda t: f"{t:.3f}s" if pd.notna(t) else "N/A"),
+        "Average Lap": stint_df['mean'].map(lambda t: f"{t:.3f}s" if pd.notna(t) else "N/A"),
+    }).reset_index(drop=True)
+
+
+def build_radio_frame(radio_messages: list, laps: list) -> pd.DataFrame:
+    """Radio messages sorted by time, each tagged with the lap it was sent on"""
+    radio_df = to_frame(radio_messages)
+    radio_df['date'] = parse_f1_datetimes(radio_df['date'])
+    radio_df = radio_df.sort_values('date')
+    radio_df['lap_number'] = pd.Series("?", index=radio_df.index, dtype=object)  # Initialize with default value
+
+    if not laps:
+        return radio_df
+
+    laps_df = to_frame(laps)
+    laps_df['date_start'] = parse_f1_datetimes(laps_df['date_start'])
+    laps_df = laps_df.dropna(subset=['date_start', 'lap_duration'])
+    if laps_df.empty:
+        return radio_df
+    laps_df['date_end'] = laps_df['date_start'] + pd.to_timedelta(laps_df['lap_duration'].astype(float), unit='s')
+
+    # Match each message to the latest lap started before it, then keep it
+    # only if the message falls inside that lap's window
+    matched = pd.merge_asof(
+        radio_df[['date']].reset_index().dropna(subset=['date']).sort_values('date'),
+        laps_df[['date_start', 'date_end', 'lap_number']].sort_values('date_start'),
+        left_on='date',
+        right_on='date_start',
+        direction='backward'
+    ).set_index('index')
+    in_lap = matched['date'] <= matched['date_end']
+    radio_df.loc[matched.index[in_lap], 'lap_number'] = matched.loc[in_lap, 'lap_number'].astype(int)
+    return radio_df
@@ -0,0 +1,170 @@
+import os
+import sys
+import threading
+import time
+
+# Default cap on resident bytes, overridable with F1_SESSION_STORE_MB
+DEFAULT_MAX_MB = 256
+# A viewer that hasn't rerun for this long is assumed gone (browser sessions
+# don't announce when a tab closes) and its reference lapses
+DEFAULT_LEASE_TTL_S = 15 * 60
+
+
+def estimate_nbytes(value, seen: set = None) -> int:
+    """Approximate resident bytes of fetched records, frames, figures and section results"""
+    seen = set() if seen is None else seen
+    if value is None or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):  # DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes'):  # RecordTable, numpy array
+        return int(value.nbytes)
+    if hasattr(value, 'to_plotly_json'):  # plotly Figure: size of its serialized spec
+        return len(value.to_json())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v, seen) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v, seen) for v in value)
+    return sys.getsizeof(value)
+
+
+class SessionEntry:
+    """Immutable fetched data for one (session, driver) plus the sections derived from it"""
+    __slots__ = ('key', 'data', 'sections', 'leases', 'nbytes', 'last_used', 'lock')
+
+    def __init__(self, key: tuple, data: dict):
+        self.key = key
+        self.data = data
+        self.sections = {}
+        self.leases = {}
+        self.nbytes = estimate_nbytes(data)
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """Process-wide, reference-counted store of per-session data and derived frames
+
+    Browser sessions keep only a key in st.session_state and take a lease on
+    the entry while they view it, so 50 viewers of the same race share one copy
+    of its records, frames and figures. Leases are released on Submit/Reset or
+    lapse after `lease_ttl_s` without a rerun. When resident bytes exceed
+    `max_bytes`, entries without live leases are evicted, least recently used
+    first; referenced entries are never evicted.
+    """
+
+    def __init__(self, max_bytes: int = None, lease_ttl_s: float = DEFAULT_LEASE_TTL_S):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('F1_SESSION_STORE_MB', DEFAULT_MAX_MB)) * 2 ** 20
+        self.max_bytes = max_bytes
+        self.lease_ttl_s = lease_ttl_s
+        self._entries = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'loads': 0, 'section_builds': 0, 'section_hits': 0, 'evictions': 0}
+
+    def _live_leases(self, entry: SessionEntry, now: float) -> int:
+        for holder in [h for h, seen in entry.leases.items() if now - seen > self.lease_ttl_s]:
+            del entry.leases[holder]
+        return len(entry.leases)
+
+    def _evict(self):
+        # Called with self._lock held
+        now = time.monotonic()
+        resident = sum(e.nbytes for e in self._entries.values())
+        for entry in sorted(self._entries.values(), key=lambda e: e.last_used):
+            if resident <= self.max_bytes:
+                break
+            if self._live_leases(entry, now):
+                continue
+            del self._entries[entry.key]
+            resident -= entry.nbytes
+            self._stats['evictions'] += 1
+
+    def acquire(self, key: tuple, holder: str, loader) -> SessionEntry:
+        """Lease the entry for `key`, loading it with loader() once if it isn't resident
+
+        Concurrent first requests for the same key wait for a single load.
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.leases[holder] = entry.last_used = time.monotonic()
+                    self._stats['hits'] += 1
+                    return entry
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            entry = SessionEntry(key, loader())
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+        with self._lock:
+            entry.leases[holder] = entry.last_used
+            self._entries[key] = entry
+            self._stats['loads'] += 1
+            self._evict()
+        return entry
+
+    def release(self, key: tuple, holder: str):
+        """Drop a holder's lease; the entry stays resident until evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases.pop(holder, None)
+                self._evict()
+
+    def section(self, entry: SessionEntry, name: str, builder, *args, version=None):
+        """Build a derived section once per entry; every viewer gets the same object
+
+        A section depending on state outside the entry passes that state's
+        `version`; one built for another version is rebuilt in its place.
+        """
+        with entry.lock:
+            cached = entry.sections.get(name)
+            if cached is not None and cached[0] == version:
+                self._stats['section_hits'] += 1
+                return cached[1]
+            result = builder(*args)
+            nbytes = estimate_nbytes(result)
+            if cached is not None:
+                entry.nbytes -= cached[2]
+            entry.sections[name] = (version, result, nbytes)
+            entry.nbytes += nbytes
+            self._stats['section_builds'] += 1
+        with self._lock:
+            self._evict()
+        return result
+
+    def stats(self) -> dict:
+        """Resident bytes, entry and lease counts, hit and eviction counters"""
+        with self._lock:
+            now = time.monotonic()
+            entries = list(self._entries.values())
+            return {
+                'entries': len(entries),
+                'referenced': sum(1 for e in entries if self._live_leases(e, now)),
+                'leases': sum(len(e.leases) for e in entries),
+                'resident_bytes': sum(e.nbytes for e in entries),
+                'max_bytes': self.max_bytes,
+                **self._stats,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """The process-wide store shared by every browser session"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
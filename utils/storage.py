@@ -0,0 +1,10 @@
+import os
+
+def get_data_dir(*parts: str) -> str:
+    """Directory for persistent local data (indexes, stores), created on demand
+
+    Defaults to .f1_data in the working directory; override with F1_DATA_DIR.
+    """
+    path = os.path.join(os.getenv("F1_DATA_DIR", ".f1_data"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
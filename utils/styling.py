@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 DARK_THEME = {
     "bg": "#0E1117",        # Dark background
     "text": "#FAFAFA",      # Light text
@@ -184,6 +186,7 @@ def apply_dark_theme():
     </style>
     """
 
+@lru_cache(maxsize=32)
 def apply_team_dark_style(team_name):
     style = get_team_style(team_name)
     dark_style = style.get("dark", style['primary'])
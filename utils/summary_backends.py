@@ -0,0 +1,205 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that summarizes text concisely."
+SENTIMENT_SYSTEM_PROMPT = "Analyze the sentiment of this text. Respond with only one word: Positive, Neutral, or Negative."
+RACE_SUMMARY_SYSTEM_PROMPT = "You are a Formula 1 analyst. Generate a comprehensive race summary based on the provided data."
+
+def get_openai():
+    """Import and configure the OpenAI SDK on first use; it is too heavy to load before the sidebar renders"""
+    import openai
+    if openai.api_key is None:
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+    return openai
+
+class SummaryBackend(ABC):
+    """Interface implemented by every summarization backend used by GPTHelper"""
+    name = "base"
+
+    @abstractmethod
+    def summarize_text(self, text: str, max_tokens: int = 150, system_prompt: str = SUMMARY_SYSTEM_PROMPT) -> str:
+        ...
+
+    @abstractmethod
+    def analyze_sentiment(self, text: str) -> str:
+        """One of Positive, Neutral or Negative"""
+
+    @abstractmethod
+    def race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                     system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT) -> str:
+        ...
+
+    def stream_race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                            system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT):
+        """Yield the race summary in chunks; backends without streaming yield it whole"""
+        yield self.race_summary(prompt, metrics, max_tokens, system_prompt)
+
+class OpenAIBackend(SummaryBackend):
+    """Remote chat model through the OpenAI API"""
+    name = "openai"
+
+    def __init__(self, model: str = "gpt-3.5-turbo"):
+        self.model = model
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _complete(self, messages: list, max_tokens: int, temperature: float = None) -> str:
+        kwargs = {'temperature': temperature} if temperature is not None else {}
+        response = get_openai().ChatCompletion.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        return response.choices[0].message.content
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
+    def _create_stream(self, messages: list, max_tokens: int, temperature: float):
+        # Retries cover opening the stream; once tokens flow a failure is surfaced to the caller
+        return get_openai().ChatCompletion.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+
+    def summarize_text(self, text: str, max_tokens: int = 150, system_prompt: str = SUMMARY_SYSTEM_PROMPT) -> str:
+        return self._complete([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Summarize this text: {text}"}
+        ], max_tokens)
+
+    def analyze_sentiment(self, text: str) -> str:
+        return self._complete([
+            {"role": "system", "content": SENTIMENT_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Text: {text}"}
+        ], 10)
+
+    def race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                     system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT) -> str:
+        return self._complete([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ], max_tokens, temperature=0.7)
+
+    def stream_race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                            system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT):
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        for chunk in self._create_stream(messages, max_tokens, 0.7):
+            content = chunk['choices'][0]['delta'].get('content')
+            if content:
+                yield content
+
+# Weighted team radio vocabulary; a phrase and the single words inside it both count
+POSITIVE_TERMS = {
+    "good job": 2, "well done": 2, "great job": 2, "mega": 2, "get in": 2, "p1": 1, "purple": 1,
+    "fastest": 1, "good": 1, "great": 1, "nice": 1, "perfect": 1, "brilliant": 2, "fantastic": 2,
+    "awesome": 2, "gap is growing": 1, "pulling away": 1, "good pace": 1, "happy": 1, "yes": 1,
+}
+NEGATIVE_TERMS = {
+    "tyres are gone": 2, "tires are gone": 2, "no grip": 2, "no power": 2, "lost power": 2,
+    "puncture": 2, "damage": 2, "problem": 1, "issue": 1, "penalty": 1, "slow": 1, "lost": 1,
+    "unsafe": 2, "crash": 2, "dangerous": 2, "stupid": 2, "terrible": 2, "disaster": 2, "sorry": 1,
+    "struggling": 1, "graining": 1, "blistering": 1, "vibration": 1, "overheating": 1, "retire": 2,
+}
+NEGATIONS = {"not", "no", "never", "isn't", "aren't", "don't", "can't", "wasn't"}
+STOPWORDS = {
+    "the", "a", "an", "and", "or", "to", "of", "in", "on", "is", "are", "was", "it", "we", "you",
+    "i", "for", "this", "that", "with", "at", "be", "so", "just", "ok", "okay", "yeah", "copy",
+}
+
+def _sentences(text: str) -> list:
+    return [s.strip() for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s.strip()]
+
+def _words(text: str) -> list:
+    return re.findall(r"[a-z0-9']+", text.lower())
+
+class LocalBackend(SummaryBackend):
+    """Deterministic offline backend: extractive/template summaries and a lexicon sentiment"""
+    name = "local"
+
+    def summarize_text(self, text: str, max_tokens: int = 150, system_prompt: str = SUMMARY_SYSTEM_PROMPT) -> str:
+        """Keep the highest-scoring sentences (by content word frequency), in original order"""
+        sentences = _sentences(text)
+        if len(sentences) <= 2:
+            return " ".join(sentences)
+        frequency = Counter(w for w in _words(text) if w not in STOPWORDS)
+        scores = [
+            (sum(frequency[w] for w in _words(s) if w not in STOPWORDS) / (len(_words(s)) or 1), i)
+            for i, s in enumerate(sentences)
+        ]
+        chosen, budget = [], max_tokens
+        for _, i in sorted(scores, reverse=True):
+            length = len(_words(sentences[i]))
+            if length > budget and chosen:
+                continue
+            chosen.append(i)
+            budget -= length
+            if budget <= 0 or len(chosen) == 2:
+                break
+        return " ".join(sentences[i] for i in sorted(chosen))
+
+    def analyze_sentiment(self, text: str) -> str:
+        """Sum lexicon weights of matched phrases, flipping terms preceded by a negation"""
+        lowered = " " + " ".join(_words(text)) + " "
+        score = 0
+        for lexicon, sign in ((POSITIVE_TERMS, 1), (NEGATIVE_TERMS, -1)):
+            for term, weight in lexicon.items():
+                for match in re.finditer(rf"(?<=\s){re.escape(term)}(?=\s)", lowered):
+                    preceding = lowered[:match.start()].split()[-1:]
+                    negated = bool(preceding) and preceding[0] in NEGATIONS
+                    score += -sign * weight if negated else sign * weight
+        if score > 0:
+            return "Positive"
+        if score < 0:
+            return "Negative"
+        return "Neutral"
+
+    def race_summary(self, prompt: str, metrics: dict = None, max_tokens: int = 300,
+                     system_prompt: str = RACE_SUMMARY_SYSTEM_PROMPT) -> str:
+        """Fill a fixed three-paragraph template from the metrics RaceAnalyzer computed"""
+        if not metrics:
+            return self.summarize_text(prompt, max_tokens)
+
+        if metrics.get('final_position') in (None, "N/A"):
+            # Without position data there are no places to report
+            outcome = f"{metrics['driver_name']} completed {metrics['lap_count']} laps in the session."
+        else:
+            outcome = f"{metrics['driver_name']} finished the session in P{metrics['final_position']}"
+            if metrics.get('start_position') not in (None, "N/A"):
+                outcome += f" after running P{metrics['start_position']} at the start"
+            outcome += (f", with {metrics['position_changes']} places of position change recorded "
+                        f"over {metrics['lap_count']} completed laps.")
+
+        pace = f"The fastest lap was {metrics['fastest_lap']:.3f}s"
+        if metrics.get('average_lap'):
+            pace += (f" and the average racing lap (pit and neutralized laps excluded) "
+                     f"was {metrics['average_lap']:.3f}s")
+        pace += f". {metrics['radio_count']} team radio messages were exchanged."
+
+        if metrics['tire_strategy']:
+            stints = "; ".join(f"{s['compound']} for laps {s['laps']} (fastest {s['fastest']})"
+                               for s in metrics['tire_strategy'])
+            tires = f"The tire strategy used {len(metrics['tire_strategy'])} stints: {stints}."
+        else:
+            tires = "No tire stint data is available for this session."
+
+        return "\n\n".join([outcome, pace, tires])
+
+BACKENDS = {
+    'openai': OpenAIBackend,
+    'local': LocalBackend,
+}
+
+def default_backend() -> SummaryBackend:
+    """SUMMARY_BACKEND selects the backend; without it, use OpenAI only when an API key is configured"""
+    name = os.getenv("SUMMARY_BACKEND") or ('openai' if os.getenv("OPENAI_API_KEY") else 'local')
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown SUMMARY_BACKEND '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,138 @@
+from functools import lru_cache
+import numpy as np
+
+# Channels carried through a comparison, after time and distance
+CHANNELS = ('speed', 'throttle', 'brake')
+# Spacing of the common distance grid both laps are resampled onto
+GRID_STEP_M = 5.0
+
+
+def lap_window(laps, lap_number: int):
+    """(start, end) of one lap as datetime64 values, or None without a start time or duration
+
+    `laps` is the RecordTable returned by OpenF1Client.get_laps.
+    """
+    lap = laps.where('lap_number', lap_number)
+    if not len(lap):
+        return None
+    start, duration = lap.column('date_start')[0], lap.column('lap_duration')[0]
+    if np.isnat(start) or np.isnan(duration):
+        return None
+    return start, start + np.timedelta64(int(round(duration * 1e9)), 'ns')
+
+
+def lap_trace(car_data, start, end) -> np.ndarray:
+    """Rows of (time, distance, *CHANNELS) from the lap line at `start` to the one at `end`
+
+    Samples are located by binary search on the date column, which OpenF1
+    returns in time order. The nearest sample on each side of the window is
+    kept, and the first and last rows are interpolated at exactly `start` and
+    `end`: at ~3.7 Hz the nearest sample inside can be a quarter of a second
+    off the line, as much as the deltas being compared. Time is in seconds
+    since `start`; distance (m) integrates speed over time with the trapezoid
+    rule from the lap line.
+    """
+    dates = car_data.column('date')
+    lo = max(np.searchsorted(dates, start, side='left') - 1, 0)
+    hi = min(np.searchsorted(dates, end, side='right') + 1, len(dates))
+    if hi - lo < 2:
+        return np.empty((0, 2 + len(CHANNELS)))
+    time = (dates[lo:hi] - start) / np.timedelta64(1, 's')
+    speed = car_data.column('speed')[lo:hi].astype(np.float64)
+    step = np.diff(time) * (speed[1:] + speed[:-1]) / 2 / 3.6
+    distance = np.concatenate(([0.0], np.cumsum(step)))
+    samples = np.column_stack([time, distance, *(car_data.column(c)[lo:hi] for c in CHANNELS)]).astype(np.float64)
+
+    duration = (end - start) / np.timedelta64(1, 's')
+    rows = [samples[(time > 0) & (time < duration)]]
+    # A line with no sample beyond it (the ends of the data) keeps its nearest sample instead
+    if time[0] <= 0:
+        rows.insert(0, [np.interp(0.0, time, column) for column in samples.T])
+    if time[-1] >= duration:
+        rows.append([np.interp(duration, time, column) for column in samples.T])
+    trace = np.vstack(rows)
+    trace[:, 1] -= trace[0, 1]
+    return trace
+
+
+def resample(trace: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Every column of a trace linearly interpolated at the grid distances, in one pass
+
+    One binary search places all grid points; the same weights then
+    interpolate time and every channel at once.
+    """
+    distance = trace[:, 1]
+    idx = np.clip(np.searchsorted(distance, grid, side='right'), 1, len(distance) - 1)
+    d0, d1 = distance[idx - 1], distance[idx]
+    weight = np.divide(grid - d0, d1 - d0, out=np.zeros_like(grid), where=d1 > d0)
+    weight = np.clip(weight, 0.0, 1.0)[:, None]
+    return trace[idx - 1] + (trace[idx] - trace[idx - 1]) * weight
+
+
+def align_laps(trace_a: np.ndarray, trace_b: np.ndarray, step: float = GRID_STEP_M):
+    """Both laps on a common distance grid plus the running time delta (B minus A)
+
+    Integrated distances drift by a few metres per lap, so each lap is scaled
+    to the mean of the two lengths first; otherwise the drift would show up
+    as time delta near the line.
+    """
+    import pandas as pd
+
+    length = (trace_a[-1, 1] + trace_b[-1, 1]) / 2
+    grid = np.append(np.arange(0.0, length, step), length)
+    resampled = []
+    for trace in (trace_a, trace_b):
+        scaled = trace.copy()
+        if scaled[-1, 1] > 0:
+            scaled[:, 1] *= length / scaled[-1, 1]
+        resampled.append(resample(scaled, grid))
+    a, b = resampled
+
+    comparison = {'distance': grid, 'time_a': a[:, 0], 'time_b': b[:, 0], 'delta': b[:, 0] - a[:, 0]}
+    for i, channel in enumerate(CHANNELS, start=2):
+        comparison[f'{channel}_a'] = a[:, i]
+        comparison[f'{channel}_b'] = b[:, i]
+    return pd.DataFrame(comparison)
+
+
+@lru_cache(maxsize=256)
+def compare_lap_pair(api_client, session_key: int, lap_a: tuple, lap_b: tuple, step: float = GRID_STEP_M):
+    """Distance-aligned comparison of two (driver_number, lap_number) laps, cached per pair
+
+    Each driver's car_data is fetched once for the whole session (and kept
+    by the client), so any lap is a local slice and a new pair costs only the
+    resampling. Returns None when either lap has no window or telemetry. The
+    frame is shared between callers; treat it as read-only.
+    """
+    traces = []
+    for driver_number, lap_number in (lap_a, lap_b):
+        window = lap_window(api_client.get_laps(session_key, driver_number), lap_number)
+        if window is None:
+            return None
+        trace = lap_trace(api_client.get_car_data(session_key, driver_number), *window)
+        if len(trace) < 2:
+            return None
+        traces.append(trace)
+    return align_laps(*traces, step=step)
+
+
+def build_lap_delta_figure(comparison, label_a: str, label_b: str, color_a: str = None, color_b: str = None):
+    """Speed, throttle and brake traces of both laps over distance, with the running delta below"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from utils.styling import get_plotly_theme
+
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.03,
+                        row_heights=[0.4, 0.15, 0.15, 0.3],
+                        subplot_titles=("Speed (km/h)", "Throttle (%)", "Brake", f"Delta (s, + = {label_b} slower)"))
+    for row, channel in enumerate(CHANNELS, start=1):
+        for suffix, label, color in (('a', label_a, color_a), ('b', label_b, color_b)):
+            fig.add_trace(go.Scattergl(x=comparison['distance'], y=comparison[f'{channel}_{suffix}'], mode='lines',
+                                       name=label, legendgroup=label, showlegend=row == 1,
+                                       line=dict(color=color, width=1.5)), row=row, col=1)
+    fig.add_trace(go.Scattergl(x=comparison['distance'], y=comparison['delta'], mode='lines', name="Delta",
+                               line=dict(color='#000000', width=2), fill='tozeroy', showlegend=False), row=4, col=1)
+    fig.update_layout(**get_plotly_theme()['layout'])
+    fig.update_layout(height=800, hovermode='x unified')
+    fig.update_xaxes(title_text="Distance (m)", row=4, col=1)
+    return fig
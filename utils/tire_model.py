@@ -0,0 +1,447 @@
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+from utils.scheduler import Priority, request_priority
+from utils.season_store import session_finished
+from utils.storage import get_data_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+
+# Regressors of the lap time model, in coefficient order:
+# lap_time = b0 + b1*age + b2*age^2 + b3*lap_number + b4*exp(-age/WARMUP_LAPS) + b5*(track_temp - ref)
+# Tyre age carries degradation, lap number the fuel burn-off, the decaying
+# term the warm-up of a fresh set and the last term track temperature
+FEATURES = ('intercept', 'tyre_age', 'tyre_age_sq', 'lap_number', 'warmup', 'track_temp')
+# Laps over which a new set comes up to temperature
+WARMUP_LAPS = 1.5
+# Track temperature every curve is normalized to unless another is given
+REFERENCE_TRACK_TEMP = 35.0
+# Laps slower than this multiple of the driver's fastest clean lap (traffic,
+# mistakes, in-laps the pit data missed) are left out of the fit
+SLOW_LAP_FACTOR = 1.07
+# Ridge term keeping the normal equations solvable when a regressor doesn't
+# vary, e.g. constant track temperature in a single session
+RIDGE = 1e-3
+# Fewest laps a (circuit, season, compound) model is served from
+MIN_LAPS = 20
+
+# Session types the model learns from: full-fuel race running
+MODEL_SESSIONS = ("Race", "Sprint")
+
+
+def design_matrix(tyre_age, lap_number, track_temperature=None) -> np.ndarray:
+    """One row of FEATURES per lap; missing track temperatures count as the reference"""
+    tyre_age = np.asarray(tyre_age, dtype=np.float64)
+    lap_number = np.broadcast_to(np.asarray(lap_number, dtype=np.float64), tyre_age.shape)
+    if track_temperature is None:
+        temp = np.zeros_like(tyre_age)
+    else:
+        temp = np.broadcast_to(np.asarray(track_temperature, dtype=np.float64), tyre_age.shape)
+        temp = np.nan_to_num(temp - REFERENCE_TRACK_TEMP)
+    return np.column_stack([np.ones_like(tyre_age), tyre_age, tyre_age ** 2, lap_number,
+                            np.exp(-tyre_age / WARMUP_LAPS), temp])
+
+
+def prepare_model_laps(laps: list, stints: list, pit_data: list, periods=None, lap_weather=None):
+    """Clean racing laps of every driver with compound, tyre age and track temperature
+
+    Pit in/out laps, safety car/VSC/red flag laps and slow outliers are
+    dropped. `periods` comes from race_control.build_track_status_periods and
+    `lap_weather` from sections.build_lap_weather.
+    """
+    import pandas as pd
+    from utils.race_control import tag_laps
+    from utils.records import to_frame
+
+    columns = ['driver_number', 'lap_number', 'compound', 'tyre_age', 'track_temperature', 'lap_duration']
+    laps_df = to_frame(laps)
+    stint_df = to_frame(stints)
+    if laps_df.empty or stint_df.empty:
+        return pd.DataFrame(columns=columns)
+
+    laps_df = laps_df.dropna(subset=['lap_duration', 'lap_number'])
+    laps_df = laps_df[~laps_df['is_pit_out_lap'].fillna(False).astype(bool)]
+    pit_df = to_frame(pit_data, columns=['driver_number', 'lap_number'])
+    if not pit_df.empty:
+        in_laps = pd.MultiIndex.from_frame(pit_df.dropna())
+        laps_df = laps_df[~pd.MultiIndex.from_frame(laps_df[['driver_number', 'lap_number']]).isin(in_laps)]
+    laps_df = tag_laps(laps_df, periods)
+    laps_df = laps_df[~laps_df['neutralized']]
+
+    # Every lap joins the stint it was driven on, per driver, in one as-of join
+    stint_df = stint_df.dropna(subset=['compound', 'lap_start', 'lap_end'])
+    laps_df = pd.merge_asof(
+        laps_df.sort_values('lap_number'),
+        stint_df[['driver_number', 'lap_start', 'lap_end', 'compound', 'tyre_age_at_start']].sort_values('lap_start'),
+        left_on='lap_number', right_on='lap_start', by='driver_number', direction='backward'
+    )
+    laps_df = laps_df[laps_df['lap_number'] <= laps_df['lap_end']]
+    laps_df['tyre_age'] = laps_df['tyre_age_at_start'].fillna(0) + laps_df['lap_number'] - laps_df['lap_start']
+
+    fastest = laps_df.groupby('driver_number')['lap_duration'].transform('min')
+    laps_df = laps_df[laps_df['lap_duration'] <= fastest * SLOW_LAP_FACTOR]
+
+    if lap_weather is not None and not lap_weather.empty:
+        laps_df = laps_df.merge(lap_weather[['driver_number', 'lap_number', 'track_temperature']],
+                                on=['driver_number', 'lap_number'], how='left')
+    else:
+        laps_df['track_temperature'] = np.nan
+    return laps_df[columns].reset_index(drop=True)
+
+
+def _group_sums(codes: np.ndarray, groups: int, X: np.ndarray, y: np.ndarray) -> tuple:
+    """XᵀX, Xᵀy, yᵀy, ΣX and row counts per group, as a few matrix products"""
+    onehot = np.zeros((groups, len(codes)))
+    onehot[codes, np.arange(len(codes))] = 1.0
+    xtx = np.einsum('gn,ni,nj->gij', onehot, X, X)
+    return xtx, onehot @ (X * y[:, None]), onehot @ (y * y), onehot @ X, onehot @ y, onehot.sum(axis=1)
+
+
+class TireModelStore:
+    """Tire degradation and warm-up models per (season, circuit, compound), plus per-driver residuals
+
+    Only sufficient statistics are kept: XᵀX, Xᵀy, yᵀy and n per model and
+    ΣX, Σy and n per driver. Adding a session adds its sums, so fits update
+    incrementally without revisiting any lap, and a fit is one small ridge
+    solve. Everything lives in one compact `tire_models.npz` file.
+
+    Every write re-reads the file under an exclusive lock first, so stores in
+    other processes never drop each other's sessions, and reads pick up a file
+    another process rewrote. `generation` changes whenever the models do.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(get_data_dir(), "tire_models.npz")
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._models = {}
+        self._drivers = {}
+        self._sessions = set()
+        self._fits = {}
+        self._ingesting = {}
+        self._background = set()
+        self._stamp = None
+        with self._lock:
+            self._refresh()
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self):
+        # Called with self._lock held; reloads everything when the file changed on disk
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        self._models, self._drivers, self._sessions = {}, {}, set()
+        self._fits.clear()
+        self._stamp = stamp
+        self.generation += 1
+        if stamp is None:
+            return
+        with np.load(self.path) as data:
+            self._sessions = set(data['sessions'].tolist())
+            models = list(zip(data['model_year'].tolist(), data['model_circuit'].tolist(),
+                              data['model_compound'].tolist()))
+            for i, key in enumerate(models):
+                self._models[key] = [data['xtx'][i], data['xty'][i], float(data['yty'][i]), int(data['n'][i])]
+            for i, (model, driver) in enumerate(zip(data['driver_model'].tolist(), data['driver_number'].tolist())):
+                self._drivers[(*models[model], driver)] = [data['driver_sx'][i], float(data['driver_sy'][i]),
+                                                           int(data['driver_n'][i])]
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock serializing writers of the model file across processes
+
+        Without fcntl only self._lock, already held by the caller, applies.
+        """
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self):
+        # Called with self._lock and the file lock held; written to a temporary file and swapped in
+        models = list(self._models)
+        model_index = {key: i for i, key in enumerate(models)}
+        drivers = list(self._drivers)
+        k = len(FEATURES)
+        arrays = {
+            'sessions': np.array(sorted(self._sessions), dtype=np.int64),
+            'model_year': np.array([m[0] for m in models], dtype=np.int32),
+            'model_circuit': np.array([m[1] for m in models], dtype=str),
+            'model_compound': np.array([m[2] for m in models], dtype=str),
+            'xtx': np.array([self._models[m][0] for m in models]).reshape(-1, k, k),
+            'xty': np.array([self._models[m][1] for m in models]).reshape(-1, k),
+            'yty': np.array([self._models[m][2] for m in models], dtype=np.float64),
+            'n': np.array([self._models[m][3] for m in models], dtype=np.int64),
+            'driver_model': np.array([model_index[d[:3]] for d in drivers], dtype=np.int32),
+            'driver_number': np.array([d[3] for d in drivers], dtype=np.int32),
+            'driver_sx': np.array([self._drivers[d][0] for d in drivers]).reshape(-1, k),
+            'driver_sy': np.array([self._drivers[d][1] for d in drivers], dtype=np.float64),
+            'driver_n': np.array([self._drivers[d][2] for d in drivers], dtype=np.int64),
+        }
+        tmp_path = self.path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, self.path)
+        self._stamp = self._file_stamp()
+
+    def is_ingested(self, session_key: int) -> bool:
+        with self._lock:
+            self._refresh()
+            return session_key in self._sessions
+
+    def apply_session(self, session: dict, model_laps) -> bool:
+        """Add one session's prepared laps (see prepare_model_laps); a session is only ever counted once"""
+        year, circuit = session.get('year'), session.get('circuit_short_name')
+        compounds = model_laps['compound'].astype(str).to_numpy()
+        drivers = model_laps['driver_number'].to_numpy(dtype=np.int64)
+        X = design_matrix(model_laps['tyre_age'].to_numpy(dtype=np.float64),
+                          model_laps['lap_number'].to_numpy(dtype=np.float64),
+                          model_laps['track_temperature'].to_numpy(dtype=np.float64))
+        y = model_laps['lap_duration'].to_numpy(dtype=np.float64)
+
+        compound_keys, compound_codes = np.unique(compounds, return_inverse=True)
+        pairs = np.column_stack([compound_codes, drivers])
+        pair_keys, pair_codes = np.unique(pairs, axis=0, return_inverse=True)
+        xtx, xty, yty, _, _, n = _group_sums(compound_codes, len(compound_keys), X, y)
+        _, _, _, sx, sy, dn = _group_sums(pair_codes.ravel(), len(pair_keys), X, y)
+
+        with self._lock, self._file_lock():
+            # Merge onto what is on disk now, which may hold sessions other processes added
+            self._refresh()
+            if session['session_key'] in self._sessions:
+                return False
+            for i, compound in enumerate(compound_keys.tolist()):
+                model = self._models.setdefault((year, circuit, compound), [np.zeros_like(xtx[i]), np.zeros_like(xty[i]), 0.0, 0])
+                model[0] = model[0] + xtx[i]
+                model[1] = model[1] + xty[i]
+                model[2] += float(yty[i])
+                model[3] += int(n[i])
+                self._fits.pop((year, circuit, compound), None)
+            for i, (code, driver) in enumerate(pair_keys.tolist()):
+                key = (year, circuit, str(compound_keys[code]), driver)
+                stats = self._drivers.setdefault(key, [np.zeros_like(sx[i]), 0.0, 0])
+                stats[0] = stats[0] + sx[i]
+                stats[1] += float(sy[i])
+                stats[2] += int(dn[i])
+            self._sessions.add(session['session_key'])
+            self._save()
+            self.generation += 1
+        return True
+
+    def ingest_session(self, api_client, session: dict) -> bool:
+        """Fetch one race's session-wide laps and fold them into the models, unless already ingested"""
+        from utils.race_control import build_track_status_periods
+        from utils.sections import build_lap_weather, weather_window
+
+        session_key = session['session_key']
+        if self.is_ingested(session_key) or session.get('session_name') not in MODEL_SESSIONS:
+            return False
+        laps = api_client.get_laps(session_key)
+        periods = build_track_status_periods(api_client.get_race_control(session_key), session.get('date_end'))
+        weather = api_client.get_session_weather(session_key, *weather_window(session))
+        model_laps = prepare_model_laps(laps, api_client.get_stints(session_key), api_client.get_pit_data(session_key),
+                                        periods, build_lap_weather(laps, weather))
+        return self.apply_session(session, model_laps)
+
+    def ensure_session(self, api_client, session: dict) -> bool:
+        """Ingest a finished race the first time it is viewed; True once its laps are in the models"""
+        if self.is_ingested(session['session_key']):
+            return True
+        if not session_finished(session):
+            return False
+        # Viewers opening the same race together wait for one ingestion
+        with self._lock:
+            session_lock = self._ingesting.setdefault(session['session_key'], threading.Lock())
+        with session_lock:
+            self.ingest_session(api_client, session)
+        return self.is_ingested(session['session_key'])
+
+    def ingest_in_background(self, api_client, session: dict) -> bool:
+        """Start ensure_session on a background thread at bulk priority; True if already ingested
+
+        Viewers never wait on the download: the degradation section is drawn
+        from the current models and picks up the race once it is in.
+        """
+        session_key = session['session_key']
+        if self.is_ingested(session_key):
+            return True
+        if session.get('session_name') not in MODEL_SESSIONS or not session_finished(session):
+            return False
+        with self._lock:
+            if session_key in self._background:
+                return False
+            self._background.add(session_key)
+
+        def run():
+            try:
+                with request_priority(Priority.BULK):
+                    self.ensure_session(api_client, session)
+            finally:
+                with self._lock:
+                    self._background.discard(session_key)
+
+        threading.Thread(target=run, name=f"tire-ingest-{session_key}", daemon=True).start()
+        return False
+
+    def is_ingesting(self, session_key: int) -> bool:
+        with self._lock:
+            return session_key in self._background
+
+    def ingest_season(self, api_client, year: int, progress=None) -> int:
+        """Ingest every finished race and sprint of a season not yet in the store, at bulk priority"""
+        added = 0
+        with request_priority(Priority.BULK):
+            for meeting in api_client.get_meetings(year):
+                for session in api_client.get_sessions(meeting['meeting_key']):
+                    if session.get('session_name') not in MODEL_SESSIONS or not session_finished(session):
+                        continue
+                    if self.ingest_session(api_client, session):
+                        added += 1
+                    if progress:
+                        progress(meeting, session)
+        return added
+
+    def fit(self, year: int, circuit: str, compound: str) -> dict:
+        """Coefficients (by FEATURES), lap count and RMSE of one model, or None with too few laps"""
+        key = (year, circuit, compound)
+        with self._lock:
+            self._refresh()
+            if key in self._fits:
+                return self._fits[key]
+            model = self._models.get(key)
+            if model is None or model[3] < MIN_LAPS:
+                return None
+            xtx, xty, yty, n = model
+            # The intercept is not shrunk, only the shape terms
+            penalty = np.diag([0.0] + [RIDGE] * (len(FEATURES) - 1))
+            beta = np.linalg.solve(xtx + penalty, xty)
+            sse = max(yty - 2 * beta @ xty + beta @ xtx @ beta, 0.0)
+            fit = {'coefficients': beta, 'n': n, 'rmse': float(np.sqrt(sse / n))}
+            self._fits[key] = fit
+            return fit
+
+    def driver_offset(self, year: int, circuit: str, compound: str, driver_number: int) -> float:
+        """Mean residual of a driver's laps against the current fit (seconds, negative = faster)"""
+        fit = self.fit(year, circuit, compound)
+        stats = self._drivers.get((year, circuit, compound, driver_number))
+        if fit is None or stats is None or not stats[2]:
+            return None
+        sx, sy, n = stats
+        # Residuals are linear in the coefficients, so their mean needs only ΣX and Σy
+        return float((sy - sx @ fit['coefficients']) / n)
+
+    def expected_curve(self, year: int, circuit: str, compound: str, tyre_age, lap_number,
+                       track_temperature=None, driver_number: int = None) -> np.ndarray:
+        """Expected lap times for the given tyre ages and lap numbers, or None without a model"""
+        fit = self.fit(year, circuit, compound)
+        if fit is None:
+            return None
+        curve = design_matrix(tyre_age, lap_number, track_temperature) @ fit['coefficients']
+        if driver_number is not None:
+            curve += self.driver_offset(year, circuit, compound, driver_number) or 0.0
+        return curve
+
+    def degradation(self, year: int, circuit: str, compound: str, tyre_age: float = 10.0) -> float:
+        """Lap time lost per extra lap of tyre age at `tyre_age`, fuel effect excluded"""
+        fit = self.fit(year, circuit, compound)
+        if fit is None:
+            return None
+        beta = fit['coefficients']
+        return float(beta[1] + 2 * beta[2] * tyre_age - beta[4] / WARMUP_LAPS * np.exp(-tyre_age / WARMUP_LAPS))
+
+    def compounds(self, year: int, circuit: str) -> list:
+        with self._lock:
+            self._refresh()
+            return sorted(c for y, ci, c in self._models if y == year and ci == circuit)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_tire_store() -> TireModelStore:
+    """The process-wide model store shared by every page and browser session"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TireModelStore()
+        return _store
+
+
+def build_degradation_section(store: TireModelStore, session: dict, driver_number: int,
+                              stints: list, laps_df):
+    """Expected lap-time curve of every stint next to the laps actually driven
+
+    `laps_df` is the lap section's frame. Returns a SectionResult whose frame
+    has one row per stint and whose figure overlays the model curves; stints
+    without a model keep their actual average and leave the model columns empty,
+    and without any model there is no figure.
+    """
+    import pandas as pd
+    import plotly.graph_objects as go
+    from utils.records import to_frame
+    from utils.sections import SectionResult, representative_laps
+    from utils.styling import get_plotly_theme
+
+    year, circuit = session.get('year'), session.get('circuit_short_name')
+    rows = []
+    fig = go.Figure()
+    racing = representative_laps(laps_df)
+    stint_df = to_frame(stints).dropna(subset=['compound', 'lap_start', 'lap_end']).sort_values('lap_start')
+    modelled = False
+    for stint in stint_df.itertuples(index=False):
+        compound = stint.compound
+        first, last = int(stint.lap_start), int(stint.lap_end)
+        laps_on = racing[(racing['lap_number'] >= first) & (racing['lap_number'] <= last)]
+        row = {
+            "Stint": stint.stint_number,
+            "Compound": compound,
+            "Model Deg (s/lap)": np.nan,
+            "Expected Avg": np.nan,
+            "Actual Avg": float(laps_on['lap_duration'].mean()) if len(laps_on) else np.nan,
+            "Vs Model": np.nan,
+            "Driver Offset": np.nan,
+        }
+        rows.append(row)
+        fig.add_trace(go.Scatter(x=laps_on['lap_number'], y=laps_on['lap_duration'], mode='markers',
+                                 name=f"{compound} (actual)"))
+        if store.fit(year, circuit, compound) is None:
+            continue
+
+        modelled = True
+        lap_numbers = np.arange(first, last + 1)
+        ages = (stint.tyre_age_at_start if pd.notna(stint.tyre_age_at_start) else 0) + lap_numbers - first
+        expected = store.expected_curve(year, circuit, compound, ages, lap_numbers, driver_number=driver_number)
+        driven = laps_on['lap_number'].to_numpy(dtype=np.int64)
+        actual_expected = store.expected_curve(year, circuit, compound, ages[driven - first], driven,
+                                               laps_on.get('track_temperature'), driver_number=driver_number)
+        row.update({
+            "Model Deg (s/lap)": store.degradation(year, circuit, compound, float(ages.mean())),
+            "Expected Avg": float(expected.mean()),
+            "Vs Model": float((laps_on['lap_duration'] - actual_expected).mean()) if len(laps_on) else np.nan,
+            "Driver Offset": store.driver_offset(year, circuit, compound, driver_number),
+        })
+        fig.add_trace(go.Scatter(x=lap_numbers, y=expected, mode='lines', name=f"{compound} (model)",
+                                 line=dict(dash='dash')))
+
+    if not rows:
+        return SectionResult(warning="No tire stint data for this driver")
+    if not modelled:
+        return SectionResult(frame=pd.DataFrame(rows))
+    fig.update_layout(**get_plotly_theme()['layout'])
+    fig.update_layout(title="Expected vs Actual Lap Times by Stint", xaxis_title="Lap Number",
+                      yaxis_title="Lap Time (s)", height=450)
+    return SectionResult(frame=pd.DataFrame(rows), figure=fig)
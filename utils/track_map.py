@@ -0,0 +1,223 @@
+import json
+import math
+import os
+import threading
+import time
+from datetime import timedelta
+import numpy as np
+from utils.season_store import session_finished
+from utils.storage import get_data_dir
+
+# Columns of every stored sample: seconds since the session's first sample, then x/y/z
+COLUMNS = ('t', 'x', 'y', 'z')
+ROW_BYTES = len(COLUMNS) * np.dtype(np.float32).itemsize
+# Sessions still running are kept in memory, refetched at most this often, and never written to disk
+LIVE_REFRESH_S = 10.0
+# How long after date_end a session's locations are taken as complete and written to disk
+FINAL_GRACE = timedelta(minutes=30)
+# Upper bound on points drawn per trace; longer windows are decimated to fit
+MAX_POINTS = 1500
+
+# Replay zoom levels: how much of the path before the replay position is drawn at full detail
+ZOOM_LEVELS = {
+    "Last lap": 100.0,
+    "Last 5 laps": 500.0,
+    "Full session": None,
+}
+
+
+def decimate(samples: np.ndarray, max_points: int = MAX_POINTS) -> np.ndarray:
+    """Every n-th sample so at most max_points remain; a strided view, nothing is copied"""
+    step = max(1, math.ceil(len(samples) / max_points))
+    return samples[::step]
+
+
+class LocationStore:
+    """Per-session car location samples as float32 rows in memory-mapped files
+
+    Each session gets an append-only `<session_key>.f32` file of (t, x, y, z)
+    rows and a small `<session_key>.json` index of where every driver's rows
+    start. Once a driver's samples are written, replay windows are slices of the
+    memory map: no download, no JSON parsing and only the touched pages are read.
+    Only finished sessions are written; a live session's samples stay in memory
+    and are refreshed every LIVE_REFRESH_S.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or get_data_dir("locations")
+        self._lock = threading.Lock()
+        self._maps = {}
+        self._live = {}
+        self._live_t0 = {}
+
+    def _paths(self, session_key: int):
+        base = os.path.join(self.root, str(session_key))
+        return base + ".f32", base + ".json"
+
+    def _index(self, session_key: int) -> dict:
+        _, index_path = self._paths(session_key)
+        if not os.path.exists(index_path):
+            return {'t0': None, 'rows': 0, 'drivers': {}}
+        with open(index_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def has(self, session_key: int, driver_number: int) -> bool:
+        return str(driver_number) in self._index(session_key)['drivers']
+
+    @staticmethod
+    def _to_rows(locations: list, t0) -> tuple:
+        """float32 (t, x, y, z) rows in time order, and the t0 they are relative to"""
+        import pandas as pd
+        from utils.sections import parse_f1_datetimes
+
+        loc_df = pd.DataFrame(locations, columns=['date', 'x', 'y', 'z'])
+        loc_df['date'] = parse_f1_datetimes(loc_df['date'])
+        loc_df = loc_df.dropna(subset=['date']).sort_values('date', kind='stable')
+        if t0 is None and not loc_df.empty:
+            t0 = loc_df['date'].iloc[0]
+
+        rows = np.empty((len(loc_df), len(COLUMNS)), dtype=np.float32)
+        if len(loc_df):
+            rows[:, 0] = (loc_df['date'] - t0).dt.total_seconds().to_numpy()
+            rows[:, 1:] = loc_df[['x', 'y', 'z']].to_numpy(dtype=np.float32)
+        return rows, t0
+
+    def add(self, session_key: int, driver_number: int, locations: list) -> int:
+        """Append one driver's location records; returns the number of rows stored"""
+        import pandas as pd
+
+        data_path, index_path = self._paths(session_key)
+        with self._lock:
+            index = self._index(session_key)
+            if str(driver_number) in index['drivers']:
+                return index['drivers'][str(driver_number)][1]
+            t0 = pd.Timestamp(index['t0']) if index['t0'] else self._live_t0.get(session_key)
+            rows, t0 = self._to_rows(locations, t0)
+            if not len(rows):
+                # Nothing is recorded, so has() stays False and a later call fetches again
+                return 0
+            index['t0'] = t0.isoformat() if t0 is not None else None
+
+            # The offset comes from the file itself, so rows left behind by a failed
+            # index write are skipped instead of shifting every later driver
+            offset = os.path.getsize(data_path) // ROW_BYTES if os.path.exists(data_path) else 0
+            with open(data_path, 'ab') as f:
+                f.write(rows.tobytes())
+
+            index['drivers'][str(driver_number)] = [offset, len(rows)]
+            index['rows'] = offset + len(rows)
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, index_path)
+            self._live.pop((session_key, driver_number), None)
+        return len(rows)
+
+    def _fetch(self, api_client, session_key: int, driver_number: int, final: bool) -> int:
+        key = (session_key, driver_number)
+        fetched = self._live.get(key)
+        if fetched is not None and time.monotonic() - fetched[0] < LIVE_REFRESH_S:
+            return len(fetched[1])
+        locations = api_client.get_location(session_key, driver_number)
+        if final and locations:
+            return self.add(session_key, driver_number, locations)
+        with self._lock:
+            rows, t0 = self._to_rows(locations, self._live_t0.get(session_key))
+            if t0 is not None:
+                self._live_t0.setdefault(session_key, t0)
+            rows.flags.writeable = False
+            self._live[key] = (time.monotonic(), rows)
+        return len(rows)
+
+    def ensure(self, api_client, session: dict, driver_number: int) -> int:
+        """Download a driver's locations; finished sessions once, to the local file
+
+        Until FINAL_GRACE past the session's end, and whenever the response is
+        empty, the samples are only held in memory and refetched every
+        LIVE_REFRESH_S, so a partial or missing trace is never frozen on disk.
+        """
+        session_key = session['session_key']
+        if self.has(session_key, driver_number):
+            return self._index(session_key)['drivers'][str(driver_number)][1]
+        return self._fetch(api_client, session_key, driver_number, session_finished(session, FINAL_GRACE))
+
+    def _map(self, session_key: int, rows: int) -> np.ndarray:
+        # Reopen the map only when rows were appended since it was created
+        mapped = self._maps.get(session_key)
+        if mapped is None or len(mapped) < rows:
+            data_path, _ = self._paths(session_key)
+            mapped = np.memmap(data_path, dtype=np.float32, mode='r').reshape(-1, len(COLUMNS))
+            self._maps[session_key] = mapped
+        return mapped
+
+    def samples(self, session_key: int, driver_number: int) -> np.ndarray:
+        """All (t, x, y, z) rows of one driver as a read-only view of the memory map"""
+        index = self._index(session_key)
+        if str(driver_number) not in index['drivers'] and (session_key, driver_number) in self._live:
+            return self._live[(session_key, driver_number)][1]
+        offset, count = index['drivers'].get(str(driver_number), (0, 0))
+        if not count:
+            return np.empty((0, len(COLUMNS)), dtype=np.float32)
+        return self._map(session_key, index['rows'])[offset:offset + count]
+
+    def start_time(self, session_key: int):
+        """Wall-clock time of t == 0 for a session, or None"""
+        import pandas as pd
+
+        t0 = self._index(session_key)['t0']
+        return pd.Timestamp(t0) if t0 else self._live_t0.get(session_key)
+
+    def window(self, session_key: int, driver_number: int, t_start: float = None, t_end: float = None,
+               max_points: int = MAX_POINTS) -> np.ndarray:
+        """Decimated rows with t_start <= t <= t_end, located by binary search on t"""
+        samples = self.samples(session_key, driver_number)
+        times = samples[:, 0]
+        lo = 0 if t_start is None else int(np.searchsorted(times, t_start, side='left'))
+        hi = len(samples) if t_end is None else int(np.searchsorted(times, t_end, side='right'))
+        return decimate(samples[lo:hi], max_points)
+
+    def position_at(self, session_key: int, driver_number: int, t: float) -> np.ndarray:
+        """The last sample at or before t (or the first sample), or None without data"""
+        samples = self.samples(session_key, driver_number)
+        if not len(samples):
+            return None
+        i = int(np.searchsorted(samples[:, 0], t, side='right')) - 1
+        return samples[max(i, 0)]
+
+
+def lap_start_offsets(laps: list, t0) -> tuple:
+    """Lap start times in seconds relative to t0 (sorted) and their lap numbers"""
+    from utils.records import to_frame
+    from utils.sections import parse_f1_datetimes
+
+    laps_df = to_frame(laps, columns=['date_start', 'lap_number'])
+    laps_df['date_start'] = parse_f1_datetimes(laps_df['date_start'])
+    laps_df = laps_df.dropna(subset=['date_start']).sort_values('date_start')
+    if t0 is None or laps_df.empty:
+        return np.empty(0), np.empty(0, dtype=int)
+    offsets = (laps_df['date_start'] - t0).dt.total_seconds().to_numpy()
+    return offsets, laps_df['lap_number'].to_numpy()
+
+
+def build_track_map_figure(outline: np.ndarray, trail: np.ndarray, car: np.ndarray = None,
+                           team_color: str = '#000000'):
+    """Track outline, the recent path and the car's current position on an x/y plane"""
+    import plotly.graph_objects as go
+    from utils.styling import get_plotly_theme
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(x=outline[:, 1], y=outline[:, 2], mode='lines', name='Track',
+                               line=dict(color='#CCCCCC', width=6), hoverinfo='skip'))
+    if len(trail):
+        fig.add_trace(go.Scattergl(x=trail[:, 1], y=trail[:, 2], mode='lines', name='Path',
+                                   line=dict(color=team_color, width=2), hoverinfo='skip'))
+    if car is not None:
+        fig.add_trace(go.Scattergl(x=[car[1]], y=[car[2]], mode='markers', name='Car',
+                                   marker=dict(color=team_color, size=14, line=dict(color='#000000', width=2)),
+                                   hovertemplate=f"x={car[1]:.0f} y={car[2]:.0f} z={car[3]:.0f}<extra></extra>"))
+    fig.update_xaxes(visible=False)
+    # Equal scaling keeps the circuit's shape
+    fig.update_yaxes(visible=False, scaleanchor='x', scaleratio=1)
+    fig.update_layout(**get_plotly_theme()['layout'])
+    fig.update_layout(height=550, showlegend=False, margin=dict(l=10, r=10, t=10, b=10))
+    return fig